@@ -47,6 +47,45 @@ def create_app() -> Flask:
         MAIL_SENDER_NAME=os.environ.get("MAIL_SENDER_NAME", "RH Platform"),
         MAIL_SENDER=os.environ.get("MAIL_SENDER", "noreply@example.com"),
         MAIL_BACKEND=os.environ.get("MAIL_BACKEND"),
+        # Group commit des pointages (voir services/punch_buffer.py)
+        PUNCH_BUFFER_ENABLED=_as_bool(os.environ.get("PUNCH_BUFFER_ENABLED")),
+        PUNCH_BUFFER_WINDOW_MS=int(os.environ.get("PUNCH_BUFFER_WINDOW_MS", "5")),
+        PUNCH_BUFFER_MAX_BATCH=int(os.environ.get("PUNCH_BUFFER_MAX_BATCH", "200")),
+        PUNCH_BUFFER_TIMEOUT_S=float(os.environ.get("PUNCH_BUFFER_TIMEOUT_S", "5")),
+        PUNCH_BUFFER_METRICS=_as_bool(os.environ.get("PUNCH_BUFFER_METRICS") or "1"),
+        # Synchro hors-ligne (/attendance/punch/bulk)
+        PUNCH_SYNC_MAX_ITEMS=int(os.environ.get("PUNCH_SYNC_MAX_ITEMS", "1000")),
+        PUNCH_SYNC_MAX_AGE_DAYS=int(os.environ.get("PUNCH_SYNC_MAX_AGE_DAYS", "7")),
+        PUNCH_SYNC_MAX_SKEW_S=int(os.environ.get("PUNCH_SYNC_MAX_SKEW_S", "300")),
+        # Cache de vérification / anti-rejeu des QR (voir services/nonce_store.py)
+        QR_NONCE_BACKEND=os.environ.get("QR_NONCE_BACKEND", "memory"),
+        QR_NONCE_MAX_ENTRIES=int(os.environ.get("QR_NONCE_MAX_ENTRIES", "10000")),
+        QR_NONCE_REDIS_URL=os.environ.get("QR_NONCE_REDIS_URL", os.environ.get("REDIS_URL", "redis://localhost:6379/0")),
+        # QR pré-rendus par tranche de temps (voir services/qr_render.py)
+        QR_BUCKET_SECONDS=int(os.environ.get("QR_BUCKET_SECONDS", "60")),
+        QR_TOKEN_TTL=int(os.environ.get("QR_TOKEN_TTL", "120")),
+        QR_CLOCK_SKEW_S=int(os.environ.get("QR_CLOCK_SKEW_S", "30")),  # jeton signé « dans le futur » toléré
+        QR_STREAM_MAX_SECONDS=int(os.environ.get("QR_STREAM_MAX_SECONDS", "300")),
+        # Géorepérage des pointages (voir services/geofence.py) : off | flag | enforce
+        GEOFENCE_MODE=os.environ.get("GEOFENCE_MODE", "flag"),
+        GEOFENCE_CELL_DEG=float(os.environ.get("GEOFENCE_CELL_DEG", "0.01")),
+        GEOFENCE_INDEX_TTL=float(os.environ.get("GEOFENCE_INDEX_TTL", "60")),
+        # Versions de données / ETag des API (voir services/data_version.py) : db | redis | memory
+        DATA_VERSION_BACKEND=os.environ.get("DATA_VERSION_BACKEND", "db"),
+        DATA_VERSION_REDIS_URL=os.environ.get("DATA_VERSION_REDIS_URL", os.environ.get("REDIS_URL", "redis://localhost:6379/0")),
+        # Flux SSE du dashboard (/api/dashboard/stream)
+        DASHBOARD_STREAM_MAX_SECONDS=int(os.environ.get("DASHBOARD_STREAM_MAX_SECONDS", "300")),
+        DASHBOARD_STREAM_MIN_INTERVAL_S=float(os.environ.get("DASHBOARD_STREAM_MIN_INTERVAL_S", "2")),
+        # Mémo des classements employé·e du mois (entrées LRU)
+        AWARD_SCORE_CACHE_SIZE=int(os.environ.get("AWARD_SCORE_CACHE_SIZE", "128")),
+        # Calendrier des jours ouvrés (voir services/calendar_service.py)
+        WORK_CALENDAR_COUNTRY=os.environ.get("WORK_CALENDAR_COUNTRY", "FR"),
+        WORK_CALENDAR_WEEKEND=os.environ.get("WORK_CALENDAR_WEEKEND", "5,6"),
+        WORK_CALENDAR_HOLIDAYS=os.environ.get("WORK_CALENDAR_HOLIDAYS", ""),
+        # Cube des coûts salariaux (voir services/payroll_cube.py)
+        OVERTIME_MULTIPLIER=float(os.environ.get("OVERTIME_MULTIPLIER", "1.25")),
+        PAYROLL_LEAVE_DAY_HOURS=float(os.environ.get("PAYROLL_LEAVE_DAY_HOURS", "8")),
+        PAYROLL_CURRENCY=os.environ.get("PAYROLL_CURRENCY", "XOF"),
         # ADDED (dev confort) : rechargement auto des templates
         TEMPLATES_AUTO_RELOAD=True,
     )
@@ -85,6 +124,26 @@ def create_app() -> Flask:
     else:
         app.logger.warning("Mail désactivé (Flask-Mailman non installé).")
 
+    # --- Tampon de pointage (group commit, optionnel) ---
+    from .services import punch_buffer
+    punch_buffer.init_app(app)
+
+    # --- Nonces QR (anti-rejeu) ---
+    from .services import nonce_store
+    nonce_store.init_app(app)
+
+    # --- Schéma Attendance résolu une fois (pointage / exports sans réflexion) ---
+    from .services import schema_adapter
+    schema_adapter.init_app(app)
+
+    # --- Calendrier des jours ouvrés (fériés précalculés par année) ---
+    from .services import calendar_service
+    calendar_service.init_app(app)
+
+    # --- Schéma budget / bulletins sondé une fois (page /costs) ---
+    from .services import costs_service
+    costs_service.init_app(app)
+
     # --- Blueprints "globaux" ---
     from .routes import register_blueprints
     register_blueprints(app)
@@ -102,6 +161,10 @@ def create_app() -> Flask:
     except Exception as e:
         app.logger.debug("Attendance API non chargée: %s", e)
 
+    # Commandes CLI (flask rollup rebuild, ...)
+    from .cli import register_cli
+    register_cli(app)
+
     # ADDED : helpers accessibles dans les templates
     def url_public(path: str) -> str:
         base = app.config["PUBLIC_BASE_URL"].rstrip("/")
@@ -112,30 +175,39 @@ def create_app() -> Flask:
     # --- Jinja context (Role + Employé·e du mois) ---
     from .models.enums import Role
     from sqlalchemy import func
+    from sqlalchemy.orm import joinedload
     from .models.employee_of_month import EmployeeOfMonth
+    from .models.user import User
+    from .services import data_version
+
+    data_version.init_app(app)
+    # Tables dont dépend l'encart : recalcul seulement après un COMMIT qui les touche
+    EOM_TABLES = ("employee_of_month", "awards", "users", "departments")
+
+    def _employee_of_month():
+        latest = db.session.query(func.max(EmployeeOfMonth.period)).scalar_subquery()
+        e = (db.session.query(EmployeeOfMonth)
+             .options(joinedload(EmployeeOfMonth.user).joinedload(User.department))
+             .filter(EmployeeOfMonth.period == latest)
+             .first())
+        if not e or not e.user:
+            return None
+        return {
+            "name": f"{e.user.first_name} {e.user.last_name}".strip() or e.user.email,
+            "department": getattr(e.user.department, "name", None),
+            "period_label": fr_month_label(e.period),
+            "period": str(e.period),
+            "note": e.note or "",
+            "user_id": e.user_id,
+        }
 
     @app.context_processor
     def inject_enums_and_config():
-        eom_obj = None
-        eom_name = None
         try:
-            period = db.session.query(func.max(EmployeeOfMonth.period)).scalar()
-            if period:
-                e = db.session.query(EmployeeOfMonth).filter_by(period=period).first()
-                if e and getattr(e, "user", None):
-                    eom_name = (f"{e.user.first_name} {e.user.last_name}".strip() or e.user.email)
-                    dept = getattr(getattr(e.user, "department", None), "name", None)
-                    eom_obj = {
-                        "name": eom_name,
-                        "department": dept,
-                        "period_label": fr_month_label(period),
-                        "period": str(period),
-                        "note": e.note or "",
-                        "user_id": e.user_id,
-                    }
+            eom_obj = data_version.cached("employee_of_month", EOM_TABLES, _employee_of_month)
         except Exception:
             eom_obj = None
-            eom_name = None
+        eom_name = eom_obj["name"] if eom_obj else None
 
         return {"Role": Role, "config": app.config, "eom_name": eom_name, "employee_of_month": eom_obj}
 
@@ -0,0 +1,115 @@
+# app/cli.py
+from __future__ import annotations
+
+from datetime import date
+
+import click
+from flask import Flask
+from flask.cli import AppGroup
+
+rollup_cli = AppGroup("rollup", help="Agrégats journaliers de pointage.")
+
+
+def _parse_date(value: str | None) -> date | None:
+    return date.fromisoformat(value) if value else None
+
+
+@rollup_cli.command("rebuild")
+@click.option("--start", help="Date de début (YYYY-MM-DD), défaut : tout l'historique")
+@click.option("--end", help="Date de fin incluse (YYYY-MM-DD)")
+def rollup_rebuild(start: str | None, end: str | None):
+    """Reconstruit daily_attendance_stats depuis attendances."""
+    from .services.rollup_service import rebuild
+    n = rebuild(_parse_date(start), _parse_date(end))
+    click.echo(f"daily_attendance_stats : {n} ligne(s) reconstruite(s).")
+
+
+geofence_cli = AppGroup("geofence", help="Géorepérage des pointages.")
+
+
+@geofence_cli.command("revalidate")
+@click.option("--start", help="Date de début (YYYY-MM-DD), défaut : tout l'historique")
+@click.option("--end", help="Date de fin incluse (YYYY-MM-DD)")
+@click.option("--batch-size", default=2000, show_default=True, help="Lignes par lot")
+def geofence_revalidate(start: str | None, end: str | None, batch_size: int):
+    """Reclasse les pointages géolocalisés sur les sites actuels."""
+    from .services.geofence import revalidate
+    n = revalidate(_parse_date(start), _parse_date(end), batch_size=batch_size)
+    click.echo(f"attendances : {n} pointage(s) reclassé(s).")
+
+
+awards_cli = AppGroup("awards", help="Employé·e du mois.")
+
+
+@awards_cli.command("close")
+@click.argument("months", nargs=-1, required=True)
+def awards_close(months: tuple[str, ...]):
+    """Fige les indicateurs de score des mois donnés (YYYY-MM)."""
+    from .services.award_service import close_month
+    for ym in months:
+        n = close_month(ym)
+        click.echo(f"{ym} : {n} salarié·e(s) figé·e(s).")
+
+
+@awards_cli.command("refresh-stale")
+def awards_refresh_stale():
+    """Re-clôture les mois modifiés après leur clôture."""
+    from .services.award_service import refresh_stale_months
+    months = refresh_stale_months()
+    click.echo(f"{len(months)} mois re-clôturé(s)" + (f" : {', '.join(months)}." if months else "."))
+
+
+@awards_cli.command("backfill")
+@click.option("--from", "first", required=True, help="Premier mois (YYYY-MM)")
+@click.option("--to", "last", required=True, help="Dernier mois inclus (YYYY-MM)")
+def awards_backfill(first: str, last: str):
+    """Calcule et enregistre les gagnant·es de chaque mois de la plage."""
+    from .services.award_service import backfill_winners
+    done = backfill_winners(first, last)
+    click.echo(f"{len(done)} mois enregistré(s).")
+
+
+payroll_cli = AppGroup("payroll", help="Cube des coûts salariaux (payroll_costs).")
+
+
+@payroll_cli.command("refresh")
+@click.argument("months", nargs=-1, required=True)
+def payroll_refresh(months: tuple[str, ...]):
+    """Rematérialise les mois donnés (YYYY-MM) ; les lignes figées sont conservées."""
+    from .services.payroll_cube import materialize
+    for ym in months:
+        click.echo(f"{ym} : {materialize(ym)} département(s).")
+
+
+@payroll_cli.command("refresh-stale")
+def payroll_refresh_stale():
+    """Rematérialise les mois ouverts modifiés depuis leur dernier passage."""
+    from .services.payroll_cube import refresh_stale
+    months = refresh_stale()
+    click.echo(f"{len(months)} mois rematérialisé(s)" + (f" : {', '.join(months)}." if months else "."))
+
+
+@payroll_cli.command("freeze")
+@click.argument("months", nargs=-1, required=True)
+def payroll_freeze(months: tuple[str, ...]):
+    """Matérialise puis fige les mois donnés (YYYY-MM)."""
+    from .services.payroll_cube import freeze
+    for ym in months:
+        click.echo(f"{ym} : {freeze(ym)} département(s) figé(s).")
+
+
+@payroll_cli.command("unfreeze")
+@click.argument("months", nargs=-1, required=True)
+def payroll_unfreeze(months: tuple[str, ...]):
+    """Rouvre les mois donnés au recalcul."""
+    from .services.payroll_cube import unfreeze
+    for ym in months:
+        unfreeze(ym)
+        click.echo(f"{ym} : rouvert.")
+
+
+def register_cli(app: Flask) -> None:
+    app.cli.add_command(rollup_cli)
+    app.cli.add_command(geofence_cli)
+    app.cli.add_command(awards_cli)
+    app.cli.add_command(payroll_cli)
@@ -4,5 +4,11 @@ from .department import Department
 from .user import User
 from .attendance import Attendance
 from .employee_of_month import EmployeeOfMonth   # <— IMPORTANT
+from .daily_attendance_stat import DailyAttendanceStat
+from .geo_site import GeoSite
+from .monthly_score import MonthlyScore, ScoreMonth
+from .payroll_cost import PayrollCost
+from .user_hourly_rate import UserHourlyRate
+from .data_version import DataVersion
 
-__all__ = ["db", "Department", "User", "Attendance", "EmployeeOfMonth"]
+__all__ = ["db", "Department", "User", "Attendance", "EmployeeOfMonth", "DailyAttendanceStat", "GeoSite", "MonthlyScore", "ScoreMonth", "PayrollCost", "UserHourlyRate", "DataVersion"]
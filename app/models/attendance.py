@@ -36,6 +36,10 @@ class Attendance(db.Model):
     longitude: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
 
     source: Mapped[Optional[str]] = mapped_column(String(20), nullable=True)  # 'qr' | 'manual'
+
+    # Géorepérage (services/geofence.py) : site reconnu et statut au pointage
+    site_id: Mapped[Optional[int]] = mapped_column(ForeignKey("geo_sites.id", ondelete="SET NULL"), nullable=True)
+    geo_status: Mapped[Optional[str]] = mapped_column(String(10), nullable=True)  # 'inside' | 'outside' | NULL (inconnu)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
 
     user: Mapped["User"] = relationship("User", back_populates="attendances")
@@ -0,0 +1,34 @@
+# app/models/daily_attendance_stat.py
+from __future__ import annotations
+
+from datetime import datetime, date
+
+from sqlalchemy import Integer, Date, DateTime, Float, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.extensions import db
+
+
+class DailyAttendanceStat(db.Model):
+    """
+    Agrégat journalier des pointages, par département.
+    Maintenu par attendance_service (punch_in/punch_out) dans la même transaction,
+    reconstructible via `flask rollup rebuild`.
+    Total du jour = SUM sur les départements (quelques lignes par jour).
+    """
+    __tablename__ = "daily_attendance_stats"
+    __table_args__ = (
+        UniqueConstraint("work_date", "department_id", name="uq_daily_att_stats_day_dep"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    work_date: Mapped[date] = mapped_column(Date, nullable=False, index=True)
+    # Pas de FK : 0 = salarié·e sans département (évite les NULL dans la contrainte unique)
+    department_id: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    present_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)   # salariés avec check-in
+    checkin_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)   # check-in enregistrés (re-pointages inclus)
+    total_hours: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    late_minutes: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
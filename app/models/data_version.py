@@ -0,0 +1,19 @@
+# app/models/data_version.py
+from __future__ import annotations
+
+from sqlalchemy import Float, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.extensions import db
+
+
+class DataVersion(db.Model):
+    """
+    Compteur d'écritures par table (services/data_version.py, backend "db").
+    Partagé par tous les workers / instances : la base fait foi.
+    """
+    __tablename__ = "data_versions"
+
+    name: Mapped[str] = mapped_column(String(64), primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    updated_at: Mapped[float] = mapped_column(Float, nullable=False)  # epoch (s), fraction incluse
@@ -1,10 +1,11 @@
 from __future__ import annotations
 
 from datetime import datetime
+from decimal import Decimal
 from typing import List
 
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import Integer, String, DateTime
+from sqlalchemy import Boolean, Integer, Numeric, String, DateTime, true
 from app.extensions import db
 
 
@@ -16,9 +17,21 @@ class Department(db.Model):
     code: Mapped[str] = mapped_column(String(20), unique=True, nullable=False, index=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
 
+    # Budget mensuel et frais généraux (% appliqué au coût réel) : services/costs_service.py
+    budget_monthly: Mapped[Decimal] = mapped_column(Numeric(14, 2), default=0, server_default="0", nullable=False)
+    overhead_rate: Mapped[Decimal] = mapped_column(Numeric(5, 2), default=0, server_default="0", nullable=False)
+    currency: Mapped[str] = mapped_column(String(8), default="XOF", server_default="XOF", nullable=False)
+    is_active: Mapped[bool] = mapped_column(Boolean, default=True, server_default=true(), nullable=False)
+
     # relation typée (assure-toi que User.department back_populates pointe ici)
     users: Mapped[List["User"]] = relationship(
         "User",
         back_populates="department",
         cascade="all, delete-orphan"
     )
+
+    payroll_costs: Mapped[List["PayrollCost"]] = relationship(
+        "PayrollCost",
+        back_populates="department",
+        cascade="all, delete-orphan"
+    )
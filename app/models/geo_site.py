@@ -0,0 +1,43 @@
+# app/models/geo_site.py
+from __future__ import annotations
+
+import json
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import Integer, String, Float, Boolean, DateTime, Text, CheckConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.extensions import db
+
+
+class GeoSite(db.Model):
+    """
+    Site de pointage (géorepérage) : cercle (centre + rayon en mètres)
+    ou polygone (liste de sommets [lat, lon] en JSON).
+    Indexé en mémoire par services/geofence.py.
+    """
+    __tablename__ = "geo_sites"
+    __table_args__ = (
+        CheckConstraint("kind IN ('circle','polygon')", name="ck_geo_site_kind"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    name: Mapped[str] = mapped_column(String(120), nullable=False)
+    kind: Mapped[str] = mapped_column(String(10), nullable=False, default="circle")
+
+    center_lat: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    center_lon: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    radius_m: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    polygon: Mapped[Optional[str]] = mapped_column(Text, nullable=True)  # JSON [[lat, lon], ...]
+
+    is_active: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
+    @property
+    def points(self) -> List[Tuple[float, float]]:
+        return [(float(a), float(b)) for a, b in json.loads(self.polygon or "[]")]
+
+    @points.setter
+    def points(self, value) -> None:
+        self.polygon = json.dumps([[float(a), float(b)] for a, b in value])
@@ -0,0 +1,48 @@
+# app/models/monthly_score.py
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import Integer, String, Float, DateTime, ForeignKey, UniqueConstraint, CheckConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.extensions import db
+
+
+class MonthlyScore(db.Model):
+    """
+    Indicateurs de score d'un·e salarié·e pour un mois clôturé (entrées de
+    ScoreRow, hors pondérations : le score se recalcule à la lecture).
+    Écrit par award_service.close_month, lu tant que le mois est « closed ».
+    """
+    __tablename__ = "monthly_scores"
+    __table_args__ = (
+        UniqueConstraint("month", "user_id", name="uq_monthly_scores_month_user"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    month: Mapped[str] = mapped_column(String(7), nullable=False)  # 'YYYY-MM'
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+
+    present_days: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    total_hours: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    overtime_hours: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    leave_days: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+
+
+class ScoreMonth(db.Model):
+    """
+    État d'un mois de scores : « closed » (instantané à jour) ou « stale »
+    (correction rétroactive reçue depuis la clôture : calcul en direct).
+    """
+    __tablename__ = "score_months"
+    __table_args__ = (
+        CheckConstraint("status IN ('closed','stale')", name="ck_score_month_status"),
+    )
+
+    month: Mapped[str] = mapped_column(String(7), primary_key=True)
+    status: Mapped[str] = mapped_column(String(10), nullable=False, default="closed")
+    workdays: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    closed_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    stale_since: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
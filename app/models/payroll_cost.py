@@ -2,6 +2,7 @@
 from __future__ import annotations
 from datetime import datetime
 from decimal import Decimal
+from typing import Optional
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy import Integer, Numeric, String, ForeignKey, DateTime, UniqueConstraint, Index
 from app.extensions import db
@@ -22,6 +23,10 @@ class PayrollCost(db.Model):
     currency:       Mapped[str]     = mapped_column(String(8), default="XOF", nullable=False)
 
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    # Renseigné à la clôture : la ligne n'est plus recalculée (services/payroll_cube.py)
+    frozen_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    # Une table source a changé depuis la matérialisation : lu en direct jusqu'au prochain refresh
+    stale_since: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
 
     department = relationship("Department", back_populates="payroll_costs")
 
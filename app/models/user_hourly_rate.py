@@ -0,0 +1,34 @@
+# app/models/user_hourly_rate.py
+from __future__ import annotations
+
+from datetime import date, datetime
+from typing import Optional
+
+from sqlalchemy import Integer, Float, Date, DateTime, ForeignKey, UniqueConstraint, CheckConstraint
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from app.extensions import db
+
+
+class UserHourlyRate(db.Model):
+    """
+    Taux horaire d'un·e salarié·e sur [valid_from, valid_to) ; valid_to NULL =
+    taux en vigueur. Les intervalles d'un·e même salarié·e ne se chevauchent
+    pas (tenus par services/rate_history.py) : un coût se calcule avec le
+    taux valable à la date travaillée, pas avec le taux actuel.
+    """
+    __tablename__ = "user_hourly_rates"
+    __table_args__ = (
+        # Sert aussi d'index à la jointure par intervalle (user_id, valid_from)
+        UniqueConstraint("user_id", "valid_from", name="uq_user_hourly_rates_user_from"),
+        CheckConstraint("valid_to IS NULL OR valid_to > valid_from", name="ck_user_hourly_rates_interval"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    rate: Mapped[float] = mapped_column(Float, nullable=False)
+    valid_from: Mapped[date] = mapped_column(Date, nullable=False)
+    valid_to: Mapped[Optional[date]] = mapped_column(Date, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
+    user = relationship("User")
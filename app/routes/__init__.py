@@ -55,6 +55,7 @@ def register_blueprints(app: Flask) -> None:
         "workflow",        # sprint 8
         "admin_geofence",  # sprint 8
         "exports_pdf",
+        "costs",
     ]
     for m in optional:
         _register(app, m, required=False)
@@ -0,0 +1,111 @@
+# app/routes/admin_geofence.py
+from __future__ import annotations
+
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, abort
+from flask_login import login_required
+
+from ..extensions import db
+from ..models.enums import Role
+from ..models.geo_site import GeoSite
+from ..services import geofence
+from ..services.authz import roles_required
+
+bp = Blueprint("admin_geofence", __name__, url_prefix="/admin/geofence")
+
+
+def _parse_polygon(text: str):
+    """Un sommet 'lat, lon' par ligne."""
+    pts = []
+    for line in (text or "").splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        lat, lon = (float(x) for x in line.replace(";", ",").split(",")[:2])
+        pts.append((lat, lon))
+    if len(pts) < 3:
+        raise ValueError("Un polygone demande au moins 3 sommets.")
+    return pts
+
+
+@bp.get("/")
+@login_required
+@roles_required(Role.ADMIN)
+def list_sites():
+    sites = db.session.query(GeoSite).order_by(GeoSite.name.asc()).all()
+    return render_template("admin/geofence.html", sites=sites, mode=geofence.mode())
+
+
+@bp.post("/")
+@login_required
+@roles_required(Role.ADMIN)
+def create_site():
+    f = request.form
+    name = (f.get("name") or "").strip()
+    kind = f.get("kind") or "circle"
+    if not name or kind not in ("circle", "polygon"):
+        flash("Nom et type de site requis.", "warning")
+        return redirect(url_for("admin_geofence.list_sites"))
+    site = GeoSite(name=name, kind=kind)
+    try:
+        if kind == "circle":
+            site.center_lat = float(f.get("center_lat"))
+            site.center_lon = float(f.get("center_lon"))
+            site.radius_m = float(f.get("radius_m"))
+            if site.radius_m <= 0:
+                raise ValueError("Le rayon doit être positif.")
+        else:
+            site.points = _parse_polygon(f.get("polygon"))
+    except (TypeError, ValueError) as e:
+        flash(f"Site invalide : {e}", "warning")
+        return redirect(url_for("admin_geofence.list_sites"))
+    db.session.add(site)
+    db.session.commit()
+    geofence.invalidate()
+    flash("Site ajouté.", "success")
+    return redirect(url_for("admin_geofence.list_sites"))
+
+
+@bp.post("/<int:site_id>/toggle")
+@login_required
+@roles_required(Role.ADMIN)
+def toggle_site(site_id: int):
+    site = db.session.get(GeoSite, site_id) or abort(404)
+    site.is_active = not site.is_active
+    db.session.commit()
+    geofence.invalidate()
+    return redirect(url_for("admin_geofence.list_sites"))
+
+
+@bp.post("/<int:site_id>/delete")
+@login_required
+@roles_required(Role.ADMIN)
+def delete_site(site_id: int):
+    site = db.session.get(GeoSite, site_id) or abort(404)
+    db.session.delete(site)
+    db.session.commit()
+    geofence.invalidate()
+    flash("Site supprimé.", "success")
+    return redirect(url_for("admin_geofence.list_sites"))
+
+
+@bp.get("/check")
+@login_required
+@roles_required(Role.ADMIN)
+def check():
+    """Teste une position : /admin/geofence/check?lat=..&lon=.."""
+    try:
+        lat, lon = float(request.args["lat"]), float(request.args["lon"])
+    except (KeyError, ValueError):
+        return jsonify(ok=False, error="lat/lon requis"), 400
+    index = geofence.get_index()
+    site_id = index.locate(lat, lon)
+    return jsonify(ok=True, site_id=site_id, status=geofence.status_for(site_id, index))
+
+
+@bp.post("/revalidate")
+@login_required
+@roles_required(Role.ADMIN)
+def revalidate():
+    n = geofence.revalidate()
+    flash(f"{n} pointage(s) reclassé(s).", "success")
+    return redirect(url_for("admin_geofence.list_sites"))
@@ -1,4 +1,5 @@
 from __future__ import annotations
+from datetime import date
 from functools import wraps
 
 from flask import (
@@ -12,6 +13,7 @@ from ..extensions import db
 from ..models.user import User
 from ..models.enums import Role
 from ..models.department import Department
+from ..services.rate_history import set_rate
 
 bp = Blueprint("admin_users", __name__, url_prefix="/admin/users")
 
@@ -123,9 +125,19 @@ def edit_user(user_id: int):
         u.role = new_role
         u.department_id = int(dept_id) if dept_id else None
         try:
-            u.hourly_rate = float(hourly_rate) if hourly_rate not in (None, "",) else 0.0
+            new_rate = float(hourly_rate) if hourly_rate not in (None, "",) else 0.0
         except ValueError:
-            u.hourly_rate = 0.0
+            new_rate = 0.0
+        effective = request.form.get("rate_effective")
+        if effective and new_rate != u.hourly_rate:
+            # Date d'effet explicite (rétroactive ou planifiée)
+            try:
+                set_rate(u, new_rate, date.fromisoformat(effective))
+            except ValueError:
+                flash("Date d'effet invalide.", "warning")
+                return redirect(url_for("admin_users.edit_user", user_id=user_id))
+        else:
+            u.hourly_rate = new_rate  # historisé à la date du jour
 
         if password:
             u.set_password(password)
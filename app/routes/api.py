@@ -1,75 +1,136 @@
 # app/routes/api.py
 from __future__ import annotations
-from datetime import date, timedelta
-from flask import Blueprint, jsonify, request, current_app
+import json, time
+from datetime import date
+from flask import Blueprint, Response, jsonify, request, current_app, stream_with_context
 from flask_login import login_required
-from sqlalchemy import func, distinct
+from sqlalchemy import func
 
 from ..extensions import db
-from ..models.attendance import Attendance
+from ..models.daily_attendance_stat import DailyAttendanceStat
 from ..models.overtime import Overtime
 from ..models.enums import RequestStatus
-from ..services.cost_service import department_costs
+from ..services import data_version
+from ..services.cost_service import department_costs, department_cost_series
+from ..services.dashboard_bundle import BUNDLE_TABLES, build_bundle, kpis
+from ..services.http_cache import conditional
+from ..services.timeseries_service import BUCKETS, series, chart_payload, window
 
 bp = Blueprint("api", __name__, url_prefix="/api")
 
+MAX_SERIES_DAYS = 3660  # ~10 ans
+MAX_SERIES_MONTHS = 120
+
 @bp.get("/dashboard/stats")
 @login_required
+@conditional(*BUNDLE_TABLES)
 def dashboard_stats():
-    today = date.today()
-    present = db.session.query(
-        func.count(distinct(Attendance.user_id))
-    ).filter(
-        Attendance.work_date == today,
-        Attendance.check_in.isnot(None)
-    ).scalar() or 0
-    hours = db.session.query(
-        func.sum(Attendance.total_hours)
-    ).filter(
-        Attendance.work_date == today
-    ).scalar() or 0.0
-    return jsonify({"date": str(today), "present": int(present), "hours": float(hours)})
+    s = kpis(date.today())
+    # "present" / "hours" : noms historiques conservés
+    return jsonify({**s, "present": s["present_today"], "hours": s["hours_today"]})
+
+@bp.get("/dashboard/bundle")
+@login_required
+@conditional(*BUNDLE_TABLES)
+def dashboard_bundle():
+    """
+    Tous les widgets du dashboard en une réponse.
+    ETag = versions des tables lues + URL + jour : 304 sans aucune requête
+    d'agrégat tant que rien n'a changé.
+    """
+    try:
+        days = max(1, min(int(request.args.get("days", 14)), MAX_SERIES_DAYS))
+    except (TypeError, ValueError):
+        days = 14
+    return jsonify(build_bundle(date.today(), days))
+
+@bp.get("/dashboard/stream")
+@login_required
+def dashboard_stream():
+    """
+    Flux SSE du dashboard : un évènement `stats` à la connexion, puis un `delta`
+    (champs modifiés uniquement) après chaque COMMIT touchant les tables du
+    dashboard. Les rafales sont regroupées (DASHBOARD_STREAM_MIN_INTERVAL_S) et
+    le calcul est partagé entre connexions (data_version.cached).
+    """
+    cfg = current_app.config
+    max_seconds = float(cfg.get("DASHBOARD_STREAM_MAX_SECONDS", 300))
+    min_interval = float(cfg.get("DASHBOARD_STREAM_MIN_INTERVAL_S", 2))
+
+    def snapshot():
+        today = date.today()
+        try:
+            return data_version.cached(f"dashboard_kpis:{today}", BUNDLE_TABLES, lambda: kpis(today))
+        finally:
+            db.session.remove()  # pas de transaction ouverte pendant l'attente
+
+    def sse(event, data):
+        return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+    def events():
+        deadline = time.monotonic() + max_seconds
+        seen = data_version.versions(*BUNDLE_TABLES)
+        last = snapshot()
+        yield "retry: 3000\n\n"
+        yield sse("stats", last)
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            current = data_version.wait_for_change(BUNDLE_TABLES, seen, timeout=min(15.0, remaining))
+            if current == seen:
+                yield ": ping\n\n"  # keep-alive pour les proxys
+                continue
+            seen = current
+            snap = snapshot()
+            delta = {k: v for k, v in snap.items() if last.get(k) != v}
+            last = snap
+            if delta:
+                yield sse("delta", delta)
+            time.sleep(min_interval)
+
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return Response(stream_with_context(events()), mimetype="text/event-stream", headers=headers)
+
+def _series_args():
+    """Lit ?days=N&bucket=day|week|month (défaut 14 jours, par jour)."""
+    try:
+        days = int(request.args.get("days", 14))
+    except (TypeError, ValueError):
+        days = 14
+    days = max(1, min(days, MAX_SERIES_DAYS))
+    bucket = (request.args.get("bucket") or "day").lower()
+    if bucket not in BUCKETS:
+        bucket = "day"
+    start, end = window(days)
+    return start, end, bucket
 
 @bp.get("/charts/presence")
 @login_required
+@conditional("daily_attendance_stats")
 def chart_presence():
-    days = int(request.args.get("days", 14))
-    end = date.today()
-    start = end - timedelta(days=days - 1)
-    labels, values = [], []
-    for i in range(days):
-        d = start + timedelta(days=i)
-        labels.append(d.strftime("%d/%m"))
-        c = db.session.query(
-            func.count(distinct(Attendance.user_id))
-        ).filter(
-            Attendance.work_date == d,
-            Attendance.check_in.isnot(None)
-        ).scalar() or 0
-        values.append(int(c))
-    return jsonify({"labels": labels, "values": values})
+    start, end, bucket = _series_args()
+    # Lecture du rollup journalier : SUM(present_count) = jours-présence
+    points = series(
+        DailyAttendanceStat.work_date, func.sum(DailyAttendanceStat.present_count),
+        start, end, bucket, cast_fn=int,
+    )
+    return jsonify(chart_payload(points, bucket))
 
 @bp.get("/charts/overtime")
 @login_required
+@conditional("overtimes")
 def chart_overtime():
-    days = int(request.args.get("days", 14))
-    end = date.today()
-    start = end - timedelta(days=days - 1)
-    labels, values = [], []
-    for i in range(days):
-        d = start + timedelta(days=i)
-        labels.append(d.strftime("%d/%m"))
-        s = db.session.query(
-            func.sum(Overtime.hours)
-        ).filter(
-            Overtime.work_date == d,
-            Overtime.status == RequestStatus.APPROVED
-        ).scalar() or 0.0
-        values.append(float(s))
-    return jsonify({"labels": labels, "values": values})
+    start, end, bucket = _series_args()
+    points = series(
+        Overtime.work_date, func.sum(Overtime.hours), start, end, bucket,
+        filters=[Overtime.status == RequestStatus.APPROVED],
+    )
+    return jsonify(chart_payload(points, bucket))
 
 @bp.get("/charts/department-costs")
 @login_required
+@conditional("attendances", "overtimes", "leaves", "users", "departments", "user_hourly_rates", "payroll_costs")
 def chart_dept_costs():
     # accepte ?ym=YYYY-MM ou ?month=YYYY-MM ; défaut = mois courant
     ym = request.args.get("ym") or request.args.get("month")
@@ -84,3 +145,21 @@ def chart_dept_costs():
         current_app.logger.exception("department-costs failed for %s", ym)
         # pour ne pas casser le dashboard si une erreur survient :
         return jsonify([]), 200
+
+@bp.get("/charts/department-costs/series")
+@login_required
+@conditional("attendances", "overtimes", "leaves", "users", "departments", "user_hourly_rates", "payroll_costs")
+def chart_dept_cost_series():
+    # ?from=YYYY-MM&to=YYYY-MM ; défaut = 12 derniers mois (mois courant inclus)
+    t = date.today()
+    last = request.args.get("to") or f"{t.year:04d}-{t.month:02d}"
+    try:
+        y, m = map(int, last.split("-"))
+        first = request.args.get("from") or (f"{y - 1:04d}-{m + 1:02d}" if m < 12 else f"{y:04d}-01")
+        fy, fm = map(int, first.split("-"))
+        span = (y - fy) * 12 + (m - fm) + 1
+    except ValueError:
+        return jsonify({"error": "from/to attendus au format YYYY-MM"}), 400
+    if not 1 <= span <= MAX_SERIES_MONTHS:
+        return jsonify({"error": f"Plage de 1 à {MAX_SERIES_MONTHS} mois"}), 400
+    return jsonify(department_cost_series(first, last))
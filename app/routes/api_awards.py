@@ -2,20 +2,31 @@
 from datetime import date
 from flask import Blueprint, jsonify, request
 from flask_login import login_required
-from ..services.award_service import compute_month_scores, get_weights
+from ..services.award_service import SCORE_TABLES, award_history, top_scores
 from ..models.award import Award
+from ..services.http_cache import conditional
 
 bp = Blueprint("api_awards", __name__, url_prefix="/api/awards")
 
 @bp.get("/current")
 @login_required
+@conditional("awards", "app_settings", *SCORE_TABLES)
 def current():
     ym = request.args.get("month") or date.today().strftime("%Y-%m")
     stored = Award.query.filter_by(month=ym).first()
     if stored:
         return jsonify({"month": ym, "user_id": stored.user_id, "score": float(stored.score)})
-    scores = compute_month_scores(ym)
+    scores = top_scores(ym, 1)
     if not scores:
         return jsonify({"month": ym, "user_id": None, "score": None})
     top = scores[0]
     return jsonify({"month": ym, "user_id": top.user_id, "score": float(top.score)})
+
+@bp.get("/history")
+@login_required
+@conditional("awards", "users")
+def history():
+    page = max(1, request.args.get("page", 1, type=int))
+    per_page = max(1, min(request.args.get("per_page", 12, type=int), 100))
+    items, total = award_history(page, per_page, request.args.get("from"), request.args.get("to"))
+    return jsonify({"items": items, "page": page, "per_page": per_page, "total": total})
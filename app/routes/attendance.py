@@ -1,8 +1,13 @@
 
-from flask import Blueprint, request, jsonify, render_template
+from flask import Blueprint, request, jsonify, render_template, current_app
 from flask_login import login_required, current_user
-from ..services.attendance_service import punch_in, punch_out
-from ..services.security import verify_token
+from ..models.enums import Role
+from ..services.authz import roles_required
+from ..services.punch_buffer import record_punch, buffer_stats, PunchTimeout
+from ..services.punch_sync import sync_punches
+from ..services.geofence import GeofenceViolation
+from ..services.nonce_store import NonceStoreFull
+from ..services.security import action_allowed, consume_token, verify_token
 
 bp = Blueprint("attendance", __name__, url_prefix="/attendance")
 
@@ -23,11 +28,48 @@ def punch():
     if token and not verify_token(token):
         return jsonify({"ok": False, "error": "QR invalide ou expiré"}), 400
 
-    if action == "checkin":
-        att = punch_in(current_user.id, lat, lon, source="qr" if token else "manual")
-    elif action == "checkout":
-        att = punch_out(current_user.id, lat, lon, source="qr" if token else "manual")
-    else:
+    if action not in ("checkin", "checkout"):
         return jsonify({"ok": False, "error": "Action invalide"}), 400
 
+    if token and not action_allowed(token, action):
+        return jsonify({"ok": False, "error": "QR émis pour une autre action"}), 400
+
+    try:
+        if token and not consume_token(token, scope=f"{current_user.id}:{action}"):
+            return jsonify({"ok": False, "error": "QR déjà utilisé"}), 409
+    except NonceStoreFull:
+        current_app.logger.warning("Table des nonces QR pleine (QR_NONCE_MAX_ENTRIES).")
+        return jsonify({"ok": False, "error": "Pointage momentanément indisponible, réessayez."}), 503
+
+    try:
+        att = record_punch(current_user.id, action, lat, lon, source="qr" if token else "manual")
+    except GeofenceViolation as e:
+        return jsonify({"ok": False, "error": str(e)}), 403
+    except PunchTimeout as e:
+        return jsonify({"ok": False, "error": str(e)}), 503
+
     return jsonify({"ok": True, "attendance_id": att.id})
+
+@bp.post("/punch/bulk")
+@login_required
+def punch_bulk():
+    """
+    Rejoue des pointages hors-ligne : {"punches": [{id, action, at, token, lat, lon}, ...]}.
+    Réponse : résultat par élément (applied / merged / duplicate / replayed / unavailable / rejected).
+    """
+    payload = request.get_json(silent=True) or {}
+    items = payload.get("punches")
+    if not isinstance(items, list):
+        return jsonify({"ok": False, "error": "Liste 'punches' requise"}), 400
+    limit = int(current_app.config.get("PUNCH_SYNC_MAX_ITEMS", 1000))
+    if len(items) > limit:
+        return jsonify({"ok": False, "error": f"Maximum {limit} pointages par requête"}), 413
+
+    out = sync_punches(current_user.id, items)
+    return jsonify({"ok": True, **out})
+
+@bp.get("/buffer/stats")
+@login_required
+@roles_required(Role.ADMIN)
+def punch_buffer_stats():
+    return jsonify(buffer_stats())
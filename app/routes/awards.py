@@ -4,11 +4,13 @@ from flask import Blueprint, render_template, request, redirect, url_for, flash,
 from flask_login import login_required
 from ..services.authz import roles_required
 from ..models.enums import Role
-from ..services.award_service import get_weights, set_weights, compute_month_scores, pick_winner
+from ..services.award_service import get_weights, set_weights, compute_month_scores, pick_winner, preview, close_month, score_cache_info
 from ..models.award import Award
 
 bp = Blueprint("awards", __name__, url_prefix="/admin/awards")
 
+MAX_PREVIEW_SETS = 100
+
 @bp.get("/")
 @login_required
 @roles_required(Role.ADMIN, Role.MANAGER)
@@ -29,6 +31,40 @@ def save_weights():
     flash("Pondérations enregistrées.", "success")
     return redirect(url_for("awards.index", month=payload.get("month")))
 
+@bp.post("/preview")
+@login_required
+@roles_required(Role.ADMIN, Role.MANAGER)
+def preview_weights():
+    """Classements « et si » pour une liste de pondérations, sans rien enregistrer."""
+    payload = request.get_json(silent=True) or {}
+    ym = payload.get("month") or date.today().strftime("%Y-%m")
+    sets = payload.get("weights")
+    if isinstance(sets, dict):
+        sets = [sets]
+    if not isinstance(sets, list) or not sets or not all(isinstance(w, dict) for w in sets):
+        return jsonify({"ok": False, "error": "Paramètre weights requis (liste de pondérations)"}), 400
+    if len(sets) > MAX_PREVIEW_SETS:
+        return jsonify({"ok": False, "error": f"Au plus {MAX_PREVIEW_SETS} jeux de pondérations"}), 400
+    try:
+        top = max(1, min(int(payload.get("top", 10)), 100))
+        results = preview(ym, sets, top)
+    except (TypeError, ValueError):
+        return jsonify({"ok": False, "error": "Paramètres invalides"}), 400
+    return jsonify({"ok": True, "month": ym, "results": results})
+
+@bp.post("/close")
+@login_required
+@roles_required(Role.ADMIN, Role.MANAGER)
+def close():
+    ym = request.form.get("month") or (request.json or {}).get("month")
+    if not ym:
+        return jsonify({"ok": False, "error": "Paramètre month requis (YYYY-MM)"}), 400
+    try:
+        n = close_month(ym)
+    except ValueError as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
+    return jsonify({"ok": True, "month": ym, "rows": n})
+
 @bp.post("/run")
 @login_required
 @roles_required(Role.ADMIN, Role.MANAGER)
@@ -40,3 +76,9 @@ def run_award():
     if not a:
         return jsonify({"ok": False, "error": "Aucune donnée pour ce mois"}), 400
     return jsonify({"ok": True, "winner_id": a.user_id, "month": a.month, "score": a.score})
+
+@bp.get("/cache/stats")
+@login_required
+@roles_required(Role.ADMIN)
+def cache_stats():
+    return jsonify(score_cache_info())
@@ -4,9 +4,10 @@ from __future__ import annotations
 from datetime import datetime
 from flask import Blueprint, request, render_template, jsonify
 from flask_login import login_required
-from ..services.costs_service import summarize_month
+from ..services.costs_service import SUMMARY_TABLES, payslips_marker, summarize_month
 from ..services.authz import roles_required
 from ..models.enums import Role
+from ..services.http_cache import conditional
 
 bp = Blueprint("costs", __name__, url_prefix="/costs")
 
@@ -18,15 +19,31 @@ def index():
     today = datetime.utcnow().date()
     return render_template("costs/index.html", year=today.year, month=today.month)
 
+def _period():
+    """(année, mois) de ?period=YYYY-MM, mois courant par défaut ; ValueError sinon."""
+    period = request.args.get("period")
+    if not period:
+        today = datetime.utcnow().date()
+        return today.year, today.month
+    y, m = map(int, period.split("-"))
+    if not 1 <= m <= 12:
+        raise ValueError(period)
+    return y, m
+
+def _payslips_marker():
+    try:
+        return payslips_marker(*_period())
+    except ValueError:
+        return None
+
 @bp.get("/api/summary")
 @login_required
 @roles_required(Role.ADMIN, Role.MANAGER)
+@conditional(*SUMMARY_TABLES, marker=_payslips_marker)
 def api_summary():
-    period = request.args.get("period")  # YYYY-MM
-    if not period:
-        today = datetime.utcnow().date()
-        y, m = today.year, today.month
-    else:
-        y, m = map(int, period.split("-"))
+    try:
+        y, m = _period()
+    except ValueError:
+        return jsonify({"error": "period attendu au format YYYY-MM"}), 400
     data = summarize_month(y, m)
     return jsonify(data)
@@ -6,7 +6,7 @@ from sqlalchemy import func
 from ..extensions import db
 from ..models.user import User
 from ..models.department import Department
-from ..models.attendance import Attendance
+from ..services.rollup_service import day_totals
 
 bp = Blueprint("dashboard", __name__, url_prefix="/")
 
@@ -16,11 +16,7 @@ def index():
     today = date.today()
     total_users = db.session.query(func.count(User.id)).scalar() or 0
     total_departments = db.session.query(func.count(Department.id)).scalar() or 0
-    todays_att = (
-        db.session.query(func.count(Attendance.id))
-        .filter(Attendance.work_date == today)
-        .scalar() or 0
-    )
+    todays_att, _hours = day_totals(today)
     return render_template("dashboard/index.html",
                            stats=dict(users=total_users, depts=total_departments, today=todays_att),
                            today=today)
@@ -2,13 +2,13 @@ import csv, io
 from datetime import date
 from flask import Blueprint, Response, request, render_template
 from flask_login import login_required
-from sqlalchemy import func, literal
 from ..extensions import db
 from ..models.attendance import Attendance   # ⚠️ modèle anglais sans accent
 from ..models.overtime import Overtime
 from ..models.leave import Leave
 from ..models.user import User
 from ..services.cost_service import department_costs
+from ..services.schema_adapter import get_schema
 
 bp = Blueprint("exports", __name__, url_prefix="/exports")
 
@@ -39,28 +39,10 @@ def stream_csv(rows, headers, filename):
 @login_required
 def export_attendance():
     """
-    Exporte les pointages. Tolérant aux schémas :
-      - source facultatif
-      - geo_lat/geo_lon ou lat/lon facultatifs
+    Exporte les pointages. Colonnes optionnelles (source, lat/lon, total_hours)
+    résolues une fois au démarrage par services/schema_adapter.py.
     """
-    # Colonnes optionnelles
-    source_col = getattr(Attendance, "source", literal(None).label("source"))
-
-    if hasattr(Attendance, "geo_lat") and hasattr(Attendance, "geo_lon"):
-        lat_col = getattr(Attendance, "geo_lat")
-        lon_col = getattr(Attendance, "geo_lon")
-        lat_label, lon_label = "geo_lat", "geo_lon"
-    elif hasattr(Attendance, "lat") and hasattr(Attendance, "lon"):
-        lat_col = getattr(Attendance, "lat")
-        lon_col = getattr(Attendance, "lon")
-        lat_label, lon_label = "lat", "lon"
-    else:
-        lat_col = literal(None).label("lat")
-        lon_col = literal(None).label("lon")
-        lat_label, lon_label = "lat", "lon"
-
-    total_hours_col = getattr(Attendance, "total_hours", literal(0).label("total_hours"))
-
+    schema = get_schema()
     q = (
         db.session.query(
             Attendance.id,
@@ -68,16 +50,13 @@ def export_attendance():
             Attendance.work_date,
             Attendance.check_in,
             Attendance.check_out,
-            total_hours_col,
-            source_col,
-            lat_col,
-            lon_col,
+            *schema.export_columns,
         )
         .join(User, User.id == Attendance.user_id)
         .order_by(Attendance.work_date.desc(), Attendance.id.desc())
     )
     rows = q.all()
-    headers = ["id","email","date","check_in","check_out","total_hours","source",lat_label,lon_label]
+    headers = ["id","email","date","check_in","check_out", *schema.export_headers]
     return stream_csv(rows, headers, "attendance.csv")
 
 @bp.get("/overtime.csv")
@@ -113,6 +92,7 @@ def export_leaves():
 def export_costs():
     ym = request.args.get("month")
     data = department_costs(ym)
-    rows = [(r["department"], r["cost"]) for r in data]
-    headers = ["department","cost"]
+    rows = [(r["department"], r["base_salary"], r["overtime_cost"], r["leave_cost"], r["cost"], r["currency"])
+            for r in data]
+    headers = ["department","base_salary","overtime_cost","leave_cost","cost","currency"]
     return stream_csv(rows, headers, f"department_costs_{(ym or date.today().strftime('%Y-%m'))}.csv")
@@ -1,36 +1,73 @@
-import io, qrcode
-from flask import Blueprint, send_file, request, current_app, url_for
+import json, time
+from flask import Blueprint, Response, request, current_app, url_for, render_template, stream_with_context
 from flask_login import login_required, current_user
 from ..services.security import sign_token
+from ..services.qr_render import current_bucket, qr_response, bucket_seconds, kiosk_payload
 
 bp = Blueprint("qr", __name__, url_prefix="/qr")
 
-@bp.get("/attendance")
-@login_required
-def gen_attendance_qr():
+def _action():
     # action securisée
     action = (request.args.get("action") or "checkin").lower()
-    if action not in {"checkin", "checkout"}:
-        action = "checkin"
-
-    # token court
-    payload = f"action:{action}|user:{current_user.id}"
-    token = sign_token(payload, ttl_seconds=120)
+    return action if action in {"checkin", "checkout"} else "checkin"
 
+def _punch_url(token: str) -> str:
     # URL absolue : privilégie PUBLIC_BASE_URL si défini, sinon fabrique depuis Flask
     base = current_app.config.get("PUBLIC_BASE_URL")
     if base:
-        punch_url = f"{base.rstrip('/')}/attendance/scan?token={token}"
-    else:
-        try:
-            # adapte l'endpoint si besoin (ex: "attendance.scan")
-            punch_url = url_for("attendance.scan", token=token, _external=True)
-        except Exception:
-            punch_url = request.url_root.rstrip("/") + f"/attendance/scan?token={token}"
-
-    # Génération du QR
-    img = qrcode.make(punch_url)
-    buf = io.BytesIO()
-    img.save(buf, format="PNG")
-    buf.seek(0)
-    return send_file(buf, mimetype="image/png")
+        return f"{base.rstrip('/')}/attendance/scan?token={token}"
+    try:
+        # adapte l'endpoint si besoin (ex: "attendance.scan")
+        return url_for("attendance.scan", token=token, _external=True)
+    except Exception:
+        return request.url_root.rstrip("/") + f"/attendance/scan?token={token}"
+
+@bp.get("/attendance")
+@login_required
+def gen_attendance_qr():
+    action = _action()
+    fmt = (request.args.get("format") or "png").lower()
+
+    # token court, signé au début de la tranche : identique pour toute la tranche
+    start, remaining = current_bucket()
+    payload = f"action:{action}|user:{current_user.id}"
+    ttl = current_app.config.get("QR_TOKEN_TTL", 120) + bucket_seconds()
+    token = sign_token(payload, ttl_seconds=ttl, ts=start)
+
+    # QR rendu une fois par tranche (LRU), ETag + Cache-Control jusqu'à la suivante
+    return qr_response(_punch_url(token), fmt, max_age=remaining)
+
+@bp.get("/kiosk")
+@login_required
+def kiosk():
+    return render_template("attendance/kiosk.html", action=_action())
+
+@bp.get("/attendance/stream")
+@login_required
+def attendance_stream():
+    """
+    Flux SSE des jetons de kiosque : un évènement `token` par tranche, poussé
+    au début de la tranche suivante (l'ancien jeton reste valide QR_TOKEN_TTL s).
+    Le flux se ferme après QR_STREAM_MAX_SECONDS ; EventSource se reconnecte seul.
+    """
+    action = _action()
+    max_seconds = int(current_app.config.get("QR_STREAM_MAX_SECONDS", 300))
+
+    def events():
+        deadline = time.monotonic() + max_seconds
+        yield "retry: 2000\n\n"
+        while True:
+            data = kiosk_payload(action, _punch_url)
+            yield f"event: token\nid: {data['bucket']}\ndata: {json.dumps(data)}\n\n"
+            wait = data["next_at"] - time.time()
+            while wait > 0:
+                if time.monotonic() >= deadline:
+                    return
+                step = min(wait, 15.0)
+                time.sleep(step)
+                wait -= step
+                if wait > 0:
+                    yield ": ping\n\n"  # keep-alive pour les proxys
+
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return Response(stream_with_context(events()), mimetype="text/event-stream", headers=headers)
@@ -1,7 +1,7 @@
 # app/routes/qr_routes.py
-from flask import Blueprint, request, send_file, abort, current_app
-import io, qrcode
+from flask import Blueprint, request, current_app
 from app.services.qr_sign import sign_url
+from app.services.qr_render import current_bucket, qr_response, bucket_seconds
 
 qr_bp = Blueprint("qr", __name__, url_prefix="/qr")
 
@@ -10,11 +10,8 @@ def qr_attendance():
     action = request.args.get("action", "checkin")
     base = current_app.config["PUBLIC_BASE_URL"].rstrip("/")
     path = f"/attendance/scan?action={action}"
-    signed = sign_url(path, ttl=60)  # lien valide 60s
+    start, remaining = current_bucket()
+    signed = sign_url(path, exp=start + bucket_seconds() + 60)  # lien valide 60s après la tranche
     url = f"{base}{signed}"
 
-    img = qrcode.make(url)
-    buf = io.BytesIO()
-    img.save(buf, format="PNG")
-    buf.seek(0)
-    return send_file(buf, mimetype="image/png")
+    return qr_response(url, request.args.get("format", "png"), max_age=remaining, private=False)
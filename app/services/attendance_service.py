@@ -1,10 +1,19 @@
-
-from datetime import datetime, date, time as dt_time
+from datetime import datetime, date, time as dt_time, timezone
+from sqlalchemy import case, cast, func, and_, Float, Numeric
 from ..extensions import db
 from ..models.attendance import Attendance
+from . import geofence, payroll_cube, rollup_service, score_snapshots
+from .sql_compat import dialect_name, upsert_insert
 
 DEFAULT_START = dt_time(8, 0)  # 08:00
 
+def work_date_of(at: datetime) -> date:
+    """
+    Journée de travail d'un horodatage UTC naïf : date locale du serveur,
+    la même pour un pointage en ligne et pour son rejeu hors-ligne.
+    """
+    return at.replace(tzinfo=timezone.utc).astimezone().date()
+
 def compute_late_minutes(check_in: datetime) -> float:
     if not check_in:
         return 0.0
@@ -17,33 +26,116 @@ def compute_total_hours(check_in: datetime, check_out: datetime) -> float:
         return round((check_out - check_in).total_seconds() / 3600.0, 2)
     return 0.0
 
-def punch_in(user_id: int, lat: float | None, lon: float | None, source="manual") -> Attendance:
-    now = datetime.utcnow()
-    today = date.today()
-    att = Attendance.query.filter_by(user_id=user_id, work_date=today).first()
-    if not att:
-        att = Attendance(user_id=user_id, work_date=today)
-    att.check_in = now
-    att.late_minutes = compute_late_minutes(now)
-    att.latitude = lat
-    att.longitude = lon
-    att.source = source
-    db.session.add(att)
-    db.session.commit()
-    return att
+# -------------------------------
+# Équivalents SQL (évalués dans l'UPSERT)
+# -------------------------------
+def _hours_sql(check_in, check_out):
+    """Même règle que compute_total_hours, calculée par la base."""
+    if dialect_name() == "sqlite":
+        diff = (func.julianday(check_out) - func.julianday(check_in)) * 24.0
+    else:
+        diff = func.extract("epoch", check_out - check_in) / 3600.0
+    return case(
+        (and_(check_in.isnot(None), check_out.isnot(None), check_out > check_in),
+         cast(func.round(cast(diff, Numeric), 2), Float)),
+        else_=0.0,
+    )
 
-def punch_out(user_id: int, lat: float | None, lon: float | None, source="manual") -> Attendance:
-    now = datetime.utcnow()
-    today = date.today()
-    att = Attendance.query.filter_by(user_id=user_id, work_date=today).first()
+def _latest(current, incoming):
+    return case((current.is_(None), incoming), (incoming > current, incoming), else_=current)
+
+# -------------------------------
+# Pointage : 1 seul INSERT ... ON CONFLICT DO UPDATE
+# -------------------------------
+def upsert_punch(user_id: int, action: str, at: datetime, work_date: date,
+                 lat: float | None, lon: float | None, source="manual", commit: bool = True):
+    """
+    Enregistre un check-in / check-out sur la ligne (user_id, work_date).
+    Fusion : check-in le plus tôt, check-out le plus tard (un double pointage est idempotent) ;
+    un check-out ne modifie jamais un check-in déjà enregistré.
+    total_hours / late_minutes sont recalculés dans l'instruction.
+    Retourne la ligne (id, work_date, check_in, check_out, total_hours, late_minutes).
+    """
+    if action not in ("checkin", "checkout"):
+        raise ValueError(f"action invalide: {action!r}")
+
+    T = Attendance.__table__
+    ins = upsert_insert(T)
+    if ins is None:
+        return _merge_punch_orm(user_id, action, at, work_date, lat, lon, source, commit)
+
+    checkout = at if action == "checkout" else None
+    site_id, geo_status = geofence.classify(lat, lon)
+    stmt = ins.values(
+        user_id=user_id, work_date=work_date,
+        check_in=at, check_out=checkout,
+        late_minutes=compute_late_minutes(at),
+        total_hours=compute_total_hours(at, checkout),
+        latitude=lat, longitude=lon, source=source,
+        site_id=site_id, geo_status=geo_status,
+        created_at=datetime.utcnow(),
+    )
+    ex = stmt.excluded
+    # Seul un check-in peut avancer l'arrivée : un check-out en retard de
+    # synchronisation (antérieur au check-in connu) ne touche ni check_in ni le retard
+    earlier_in = T.c.check_in.is_(None)
+    if action == "checkin":
+        earlier_in = earlier_in | (ex.check_in < T.c.check_in)
+    new_in = case((earlier_in, ex.check_in), else_=T.c.check_in)
+    new_out = _latest(T.c.check_out, ex.check_out) if action == "checkout" else T.c.check_out
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[T.c.user_id, T.c.work_date],
+        set_={
+            "check_in": new_in,
+            "check_out": new_out,
+            "late_minutes": case((earlier_in, ex.late_minutes), else_=T.c.late_minutes),
+            "total_hours": _hours_sql(new_in, new_out),
+            "latitude": ex.latitude,
+            "longitude": ex.longitude,
+            "source": ex.source,
+            "site_id": ex.site_id,
+            "geo_status": ex.geo_status,
+        },
+    ).returning(T.c.id, T.c.work_date, T.c.check_in, T.c.check_out, T.c.total_hours, T.c.late_minutes)
+
+    row = db.session.execute(stmt).one()
+    # Instruction Core (hors événements ORM) : péremption explicite du mois écrit
+    month = score_snapshots.month_of(work_date)
+    score_snapshots.mark_stale(month)
+    payroll_cube.mark_stale(month)
+    rollup_service.refresh_day(work_date, rollup_service.department_of(user_id),
+                               checkins=int(action == "checkin"))
+    if commit:
+        db.session.commit()
+    return row
+
+def _merge_punch_orm(user_id, action, at, work_date, lat, lon, source, commit):
+    """Chemin générique (dialectes sans ON CONFLICT) : mêmes règles de fusion."""
+    att = Attendance.query.filter_by(user_id=user_id, work_date=work_date).first()
     if not att:
-        att = Attendance(user_id=user_id, work_date=today, check_in=now)
-        att.late_minutes = compute_late_minutes(now)
-    att.check_out = now
+        att = Attendance(user_id=user_id, work_date=work_date)
+        db.session.add(att)
+    if att.check_in is None or (action == "checkin" and at < att.check_in):
+        att.check_in = at
+        att.late_minutes = compute_late_minutes(at)
+    if action == "checkout" and (att.check_out is None or at > att.check_out):
+        att.check_out = at
     att.total_hours = compute_total_hours(att.check_in, att.check_out)
     att.latitude = lat
     att.longitude = lon
     att.source = source
-    db.session.add(att)
-    db.session.commit()
+    att.site_id, att.geo_status = geofence.classify(lat, lon)
+    db.session.flush()
+    rollup_service.refresh_day(work_date, rollup_service.department_of(user_id),
+                               checkins=int(action == "checkin"))
+    if commit:
+        db.session.commit()
     return att
+
+def punch_in(user_id: int, lat: float | None, lon: float | None, source="manual", commit: bool = True):
+    now = datetime.utcnow()
+    return upsert_punch(user_id, "checkin", now, work_date_of(now), lat, lon, source, commit)
+
+def punch_out(user_id: int, lat: float | None, lon: float | None, source="manual", commit: bool = True):
+    now = datetime.utcnow()
+    return upsert_punch(user_id, "checkout", now, work_date_of(now), lat, lon, source, commit)
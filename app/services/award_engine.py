@@ -0,0 +1,105 @@
+# app/services/award_engine.py
+# Moteur de score vectorisé (NumPy) pour l'employé·e du mois.
+# Les indicateurs du mois forment une matrice salarié·es × indicateurs :
+# normalisation, score pondéré et classement sont des opérations sur tableaux,
+# et K jeux de pondérations s'évaluent en un seul produit matriciel
+# (prévisualisation des pondérations).
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+WEIGHT_KEYS = ("presence", "hours", "overtime", "leaves")
+
+
+@dataclass
+class MonthFeatures:
+    """Indicateurs bruts du mois, une position par salarié·e."""
+    workdays: int
+    user_ids: List[int] = field(default_factory=list)
+    names: List[str] = field(default_factory=list)
+    present_days: List[int] = field(default_factory=list)
+    total_hours: List[float] = field(default_factory=list)
+    overtime_hours: List[float] = field(default_factory=list)
+    leave_days: List[float] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.user_ids)
+
+    def presence_rates(self) -> List[float]:
+        return [p / self.workdays if self.workdays else 0.0 for p in self.present_days]
+
+    def matrix(self) -> np.ndarray:
+        """Indicateurs normalisés (N x 4), colonnes dans l'ordre de WEIGHT_KEYS."""
+        if not len(self):
+            return np.zeros((0, len(WEIGHT_KEYS)))
+        return np.column_stack([
+            np.asarray(self.presence_rates(), dtype=float),
+            np.asarray(self.total_hours, dtype=float) / max(self.total_hours + [1.0]),
+            np.asarray(self.overtime_hours, dtype=float) / max(self.overtime_hours + [1.0]),
+            np.asarray(self.leave_days, dtype=float) / max(1.0, self.workdays),
+        ])
+
+
+def weight_vector(weights: Dict[str, float]) -> List[float]:
+    return [float(weights.get(k, 0.0)) for k in WEIGHT_KEYS]
+
+
+def score_many(features: MonthFeatures, weight_sets: Sequence[Dict[str, float]]) -> np.ndarray:
+    """Scores (K x N) pour K jeux de pondérations : un produit matriciel."""
+    W = np.asarray([weight_vector(w) for w in weight_sets], dtype=float).reshape(-1, len(WEIGHT_KEYS))
+    return W @ features.matrix().T
+
+
+def score(features: MonthFeatures, weights: Dict[str, float]) -> np.ndarray:
+    return score_many(features, [weights])[0]
+
+
+def _order(features: MonthFeatures, scores: np.ndarray, idx: Optional[np.ndarray] = None) -> np.ndarray:
+    # lexsort : dernière clé = clé primaire
+    keys = (np.asarray(features.user_ids),
+            -np.asarray(features.total_hours, dtype=float),
+            -np.asarray(features.presence_rates(), dtype=float),
+            -np.asarray(scores, dtype=float))
+    if idx is None:
+        return np.lexsort(keys)
+    return idx[np.lexsort(tuple(k[idx] for k in keys))]
+
+
+def ranking(features: MonthFeatures, scores, top: Optional[int] = None) -> List[int]:
+    """
+    Indices classés : score desc, présence desc, heures desc, id asc.
+    """
+    order = _order(features, scores)
+    return (order[:top] if top is not None else order).tolist()
+
+
+def top_k(features: MonthFeatures, scores, k: int) -> List[int]:
+    """
+    Les k premiers indices dans l'ordre de `ranking`, sans trier toute la
+    population : sélection partielle (argpartition), puis tri des candidats.
+    """
+    n = len(features)
+    if k <= 0 or n == 0:
+        return []
+    if k >= n:
+        return ranking(features, scores)
+    s = np.asarray(scores, dtype=float)
+    kth = np.partition(-s, k - 1)[k - 1]
+    # Tous les ex aequo du k-ième score restent candidats : le bris
+    # d'égalité se fait ensuite sur ce sous-ensemble
+    cand = np.flatnonzero(-s <= kth)
+    return _order(features, s, cand)[:k].tolist()
+
+
+def rank_many(features: MonthFeatures, weight_sets: Sequence[Dict[str, float]],
+              top: Optional[int] = None) -> List[List[tuple]]:
+    """Pour chaque jeu de pondérations : [(user_id, nom, score), ...] classés."""
+    S = score_many(features, weight_sets)
+    out = []
+    for row in S:
+        order = ranking(features, row, top)
+        out.append([(features.user_ids[i], features.names[i], float(row[i])) for i in order])
+    return out
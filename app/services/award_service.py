@@ -1,11 +1,14 @@
 from __future__ import annotations
 
-from collections import defaultdict
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass
 from datetime import date, timedelta
-from typing import Dict, List, Tuple, Optional
+from typing import Any, Dict, List, Tuple, Optional
 
-from sqlalchemy import func, and_, distinct, select, text, inspect
+from flask import current_app
+
+from sqlalchemy import Date, and_, case, distinct, func, literal, select, union_all
 
 from ..extensions import db
 from ..models.user import User
@@ -15,6 +18,9 @@ from ..models.enums import LeaveStatus, RequestStatus
 from ..models.attendance import Attendance
 from ..models.settings import AppSetting
 from ..models.award import Award
+from . import award_engine, calendar_service, data_version, score_snapshots
+from .timeseries_service import bucket_expr, month_bounds
+from .award_engine import MonthFeatures
 
 
 # -------------------------------
@@ -45,29 +51,20 @@ class ScoreRow:
 # Utilitaires de période
 # -------------------------------
 def month_range(ym: str) -> Tuple[date, date]:
-    y, m = map(int, ym.split("-"))
-    start = date(y, m, 1)
-    if m == 12:
-        end = date(y + 1, 1, 1) - timedelta(days=1)
-    else:
-        end = date(y, m + 1, 1) - timedelta(days=1)
-    return start, end
+    """Bornes incluses [1er, dernier jour] (voir timeseries_service.month_bounds)."""
+    start, stop = month_bounds(ym)
+    return start, stop - timedelta(days=1)
 
 
 def business_days(start: date, end: date) -> List[date]:
-    days: List[date] = []
-    cur = start
-    while cur <= end:
-        if cur.weekday() < 5:  # 0=Mon .. 4=Fri
-            days.append(cur)
-        cur += timedelta(days=1)
-    return days
+    """Jours ouvrés (week-end et jours fériés exclus, voir calendar_service)."""
+    return calendar_service.workdays(start, end)
 
 
 # -------------------------------
 # Poids configurables
 # -------------------------------
-def get_weights() -> Dict[str, float]:
+def _load_weights() -> Dict[str, float]:
     cfg = AppSetting.get("award_weights", None)
     if not cfg:
         return DEFAULT_WEIGHTS.copy()
@@ -80,6 +77,11 @@ def get_weights() -> Dict[str, float]:
     return w
 
 
+def get_weights() -> Dict[str, float]:
+    # Relu seulement après un COMMIT sur app_settings
+    return data_version.cached("award_weights", ("app_settings",), _load_weights).copy()
+
+
 def set_weights(new_weights: Dict[str, float]) -> Dict[str, float]:
     w = get_weights()
     w.update({k: float(v) for k, v in new_weights.items() if k in w})
@@ -87,136 +89,269 @@ def set_weights(new_weights: Dict[str, float]) -> Dict[str, float]:
     return w
 
 
+# -------------------------------
+# Mémo des classements
+# -------------------------------
+# Tables dont dépend un classement : toute écriture committée change la clé
+SCORE_TABLES = ("attendances", "overtimes", "leaves", "users", "monthly_scores", "score_months")
+MEMO_KEY = "award_score_memo"
+
+
+class ScoreMemo:
+    """LRU borné : (mois, pondérations, versions des tables) -> classement."""
+
+    def __init__(self, max_entries: int = 128):
+        self.max_entries = max(1, max_entries)
+        self._data: "OrderedDict[tuple, List[ScoreRow]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def get(self, key: tuple) -> Optional[List[ScoreRow]]:
+        with self._lock:
+            hit = self._data.get(key)
+            if hit is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._data.move_to_end(key)
+            return hit
+
+    def peek(self, key: tuple) -> Optional[List[ScoreRow]]:
+        """Lecture sans compter de hit/miss ni toucher à l'ordre LRU."""
+        return self._data.get(key)
+
+    def put(self, key: tuple, rows: List[ScoreRow]) -> None:
+        with self._lock:
+            self._data[key] = rows
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def invalidate(self, ym: Optional[str] = None) -> None:
+        with self._lock:
+            for k in [k for k in self._data if ym is None or k[0] == ym]:
+                del self._data[k]
+
+    def info(self) -> Dict[str, Any]:
+        return {"hits": self.hits, "misses": self.misses,
+                "size": len(self._data), "max_entries": self.max_entries}
+
+
+def _memo() -> ScoreMemo:
+    memo = current_app.extensions.get(MEMO_KEY)
+    if memo is None:
+        memo = current_app.extensions[MEMO_KEY] = ScoreMemo(
+            int(current_app.config.get("AWARD_SCORE_CACHE_SIZE", 128)))
+    return memo
+
+
+def invalidate_scores(ym: Optional[str] = None) -> None:
+    """Écritures hors session (voir data_version.touch) : purge explicite du mémo."""
+    _memo().invalidate(ym)
+
+
+def score_cache_info() -> Dict[str, Any]:
+    return _memo().info()
+
+
 # -------------------------------
 # Calcul des scores mensuels
 # -------------------------------
-def compute_month_scores(ym: str) -> List[ScoreRow]:
-    start, end = month_range(ym)
-    workdays = business_days(start, end)
-    wd_count = len(workdays)
-    if wd_count == 0:
-        return []
+def _workdays_cte(workdays: List[date]):
+    """Jours ouvrés du mois en table dérivée (UNION ALL de littéraux : SQLite + PostgreSQL)."""
+    rows = [select(literal(d, Date).label("day")) for d in workdays]
+    return union_all(*rows).cte("workdays")
 
-    # Présence: nb de jours distincts avec check_in
-    present_rows = db.session.execute(
-        select(Attendance.user_id, func.count(distinct(Attendance.work_date)))
-        .where(
-            and_(
-                Attendance.work_date >= start,
-                Attendance.work_date <= end,
-                Attendance.check_in.isnot(None),
-            )
-        )
-        .group_by(Attendance.user_id)
-    ).all()
-    present_map = {uid: int(cnt or 0) for uid, cnt in present_rows}
 
-    # Heures totales pointées
-    hours_rows = db.session.execute(
-        select(Attendance.user_id, func.sum(Attendance.total_hours))
-        .where(and_(Attendance.work_date >= start, Attendance.work_date <= end))
-        .group_by(Attendance.user_id)
-    ).all()
-    hours_map = {uid: float(h or 0.0) for uid, h in hours_rows}
-
-    # Heures supplémentaires approuvées
-    ot_rows = db.session.execute(
-        select(Overtime.user_id, func.sum(Overtime.hours))
-        .where(
-            and_(
-                Overtime.work_date >= start,
-                Overtime.work_date <= end,
-                Overtime.status == RequestStatus.APPROVED,
-            )
+def month_stats_stmt(start: date, end: date, workdays: List[date]):
+    """
+    Une seule instruction (CTE) : par salarié·e actif·ve, jours présents,
+    heures pointées, heures sup approuvées et jours ouvrés de congé approuvé.
+    """
+    wd = _workdays_cte(workdays)
+
+    att = (
+        select(
+            Attendance.user_id.label("user_id"),
+            func.count(distinct(case((Attendance.check_in.isnot(None), Attendance.work_date)))).label("present_days"),
+            func.sum(Attendance.total_hours).label("total_hours"),
         )
+        .where(Attendance.work_date >= start, Attendance.work_date <= end)
+        .group_by(Attendance.user_id)
+        .cte("att")
+    )
+    ot = (
+        select(Overtime.user_id.label("user_id"), func.sum(Overtime.hours).label("overtime_hours"))
+        .where(Overtime.work_date >= start, Overtime.work_date <= end,
+               Overtime.status == RequestStatus.APPROVED)
         .group_by(Overtime.user_id)
-    ).all()
-    ot_map = {uid: float(h or 0.0) for uid, h in ot_rows}
-
-    # Congés approuvés: compter uniquement les jours ouvrés dans l'intervalle
-    leave_rows = db.session.execute(
-        select(Leave.user_id, Leave.start_date, Leave.end_date)
-        .where(
-            and_(
-                Leave.start_date <= end,
-                Leave.end_date >= start,
-                Leave.status == LeaveStatus.APPROVED,
-            )
+        .cte("ot")
+    )
+    # Chaque congé compte les jours ouvrés du mois qu'il recouvre
+    lv = (
+        select(Leave.user_id.label("user_id"), func.count().label("leave_days"))
+        .select_from(Leave)
+        .join(wd, and_(wd.c.day >= Leave.start_date, wd.c.day <= Leave.end_date))
+        .where(Leave.status == LeaveStatus.APPROVED,
+               Leave.start_date <= end, Leave.end_date >= start)
+        .group_by(Leave.user_id)
+        .cte("lv")
+    )
+    return (
+        select(
+            User.id, User.first_name, User.last_name,
+            func.coalesce(att.c.present_days, 0),
+            func.coalesce(att.c.total_hours, 0.0),
+            func.coalesce(ot.c.overtime_hours, 0.0),
+            func.coalesce(lv.c.leave_days, 0),
         )
-    ).all()
+        .outerjoin(att, att.c.user_id == User.id)
+        .outerjoin(ot, ot.c.user_id == User.id)
+        .outerjoin(lv, lv.c.user_id == User.id)
+        .where(User.is_active.is_(True))
+    )
 
-    leave_days_map: Dict[int, float] = defaultdict(float)
-    wd_set = set(workdays)
-    for uid, s, e in leave_rows:
-        d0 = max(s, start)
-        d1 = min(e, end)
-        cur = d0
-        while cur <= d1:
-            if cur in wd_set:
-                leave_days_map[uid] += 1.0
-            cur += timedelta(days=1)
-
-    # Population: uniquement actifs
-    users: List[User] = db.session.execute(
-        select(User).where(User.is_active.is_(True))
-    ).scalars().all()
-
-    # Normalisations pour heures/overtime
-    max_hours = max([hours_map.get(u.id, 0.0) for u in users] + [1.0])
-    max_ot = max([ot_map.get(u.id, 0.0) for u in users] + [1.0])
 
-    w = get_weights()
-    results: List[ScoreRow] = []
-    for u in users:
-        p = int(present_map.get(u.id, 0))
-        presence_rate = (p / wd_count) if wd_count else 0.0
-        th = float(hours_map.get(u.id, 0.0))
-        oth = float(ot_map.get(u.id, 0.0))
-        ld = float(leave_days_map.get(u.id, 0.0))
-
-        nh = th / max_hours if max_hours else 0.0
-        noth = oth / max_ot if max_ot else 0.0
-
-        score = (
-            presence_rate * w["presence"]
-            + nh * w["hours"]
-            + noth * w["overtime"]
-            + (ld / max(1.0, wd_count)) * w["leaves"]
+def live_features(ym: str) -> Optional[MonthFeatures]:
+    """Indicateurs du mois calculés depuis les pointages (None si aucun jour ouvré)."""
+    start, end = month_range(ym)
+    workdays = business_days(start, end)
+    if not workdays:
+        return None
+    f = MonthFeatures(workdays=len(workdays))
+    for uid, first, last, p, h, o, d in db.session.execute(month_stats_stmt(start, end, workdays)):
+        f.user_ids.append(uid)
+        f.names.append(f"{first} {last}")
+        f.present_days.append(int(p or 0))
+        f.total_hours.append(float(h or 0.0))
+        f.overtime_hours.append(float(o or 0.0))
+        f.leave_days.append(float(d or 0.0))
+    return f
+
+
+def load_features(ym: str) -> Optional[MonthFeatures]:
+    """Instantané du mois s'il est clôturé et à jour, sinon calcul en direct."""
+    f = score_snapshots.read(ym)
+    return f if f is not None else live_features(ym)
+
+
+def compute_month_scores(ym: str, weights: Optional[Dict[str, float]] = None) -> List[ScoreRow]:
+    """Classement du mois (mémoïsé tant que ni les données ni les pondérations ne changent)."""
+    w = weights or get_weights()
+    # Versions lues avant le calcul : jamais trop récentes
+    key = (ym, tuple(sorted(w.items())), data_version.versions(*SCORE_TABLES))
+    memo = _memo()
+    rows = memo.get(key)
+    if rows is None:
+        rows = _rank_month(ym, w)
+        memo.put(key, rows)
+    return list(rows)
+
+
+def top_scores(ym: str, k: int = 1, weights: Optional[Dict[str, float]] = None) -> List[ScoreRow]:
+    """
+    Les k premiers du mois sans matérialiser le classement complet
+    (réutilise le classement mémoïsé s'il existe déjà).
+    """
+    w = weights or get_weights()
+    wkey, versions = tuple(sorted(w.items())), data_version.versions(*SCORE_TABLES)
+    memo = _memo()
+    full = memo.peek((ym, wkey, versions))
+    if full is not None:
+        return full[:k]
+    key = (ym, wkey, versions, "top", k)
+    rows = memo.get(key)
+    if rows is None:
+        f = load_features(ym)
+        rows = []
+        if f is not None:
+            scores = award_engine.score(f, w)
+            rows = _score_rows(f, scores, award_engine.top_k(f, scores, k))
+        memo.put(key, rows)
+    return list(rows)
+
+
+def _rank_month(ym: str, w: Dict[str, float]) -> List[ScoreRow]:
+    f = load_features(ym)
+    if f is None:
+        return []
+    scores = award_engine.score(f, w)
+    # Classement : score desc, présence desc, heures desc, id asc
+    return _score_rows(f, scores, award_engine.ranking(f, scores))
+
+
+def _score_rows(f: MonthFeatures, scores, order: List[int]) -> List[ScoreRow]:
+    rates = f.presence_rates()
+    return [
+        ScoreRow(
+            user_id=f.user_ids[i],
+            full_name=f.names[i],
+            present_days=f.present_days[i],
+            workdays=f.workdays,
+            presence_rate=rates[i],
+            total_hours=f.total_hours[i],
+            overtime_hours=f.overtime_hours[i],
+            leave_days=f.leave_days[i],
+            score=float(scores[i]),
         )
+        for i in order
+    ]
 
-        results.append(
-            ScoreRow(
-                user_id=u.id,
-                full_name=u.full_name,
-                present_days=p,
-                workdays=wd_count,
-                presence_rate=presence_rate,
-                total_hours=th,
-                overtime_hours=oth,
-                leave_days=ld,
-                score=float(score),
-            )
-        )
 
-    # Tri avec bris d’égalité : score desc, présence desc, heures desc, id asc
-    results.sort(
-        key=lambda r: (r.score, r.presence_rate, r.total_hours, -r.user_id),
-        reverse=True,
-    )
-    return results
+def preview(ym: str, weight_sets: List[Dict[str, float]], top: int = 10) -> List[dict]:
+    """
+    Classements du mois pour plusieurs jeux de pondérations, évalués en une
+    passe (une requête SQL, un produit matriciel).
+    """
+    f = load_features(ym)
+    sets = [{k: float(w.get(k, 0.0)) for k in DEFAULT_WEIGHTS} for w in weight_sets]
+    if f is None or not sets:
+        return [{"weights": w, "ranking": []} for w in sets]
+    ranked = award_engine.rank_many(f, sets, top)
+    return [
+        {
+            "weights": w,
+            "ranking": [{"user_id": uid, "full_name": name, "score": round(sc, 4)}
+                        for uid, name, sc in rows],
+        }
+        for w, rows in zip(sets, ranked)
+    ]
 
 
 # -------------------------------
-# EOM: choisir et enregistrer le/la gagnant·e
+# Clôture mensuelle (instantanés monthly_scores)
 # -------------------------------
-def pick_winner(ym: str, commit: bool = True) -> Optional[Award]:
-    scores = compute_month_scores(ym)
-    if not scores:
-        return None
-    top = scores[0]
+def close_month(ym: str, commit: bool = True) -> int:
+    """
+    Fige les indicateurs d'un mois terminé ; retourne le nombre de lignes.
+    Le mois repasse en « stale » si une correction rétroactive le touche.
+    """
+    start, end = month_range(ym)
+    if end >= date.today():
+        raise ValueError(f"Le mois {ym} n'est pas terminé.")
+    f = live_features(ym)
+    if f is None:
+        return 0
+    n = score_snapshots.write(ym, f)
+    if commit:
+        db.session.commit()
+    return n
+
+
+def refresh_stale_months() -> List[str]:
+    """Re-clôture les mois périmés (un COMMIT par mois)."""
+    months = score_snapshots.stale_months()
+    for ym in months:
+        close_month(ym)
+    return months
+
 
+# -------------------------------
+# EOM: choisir et enregistrer le/la gagnant·e
+# -------------------------------
+def _award_details(top: ScoreRow) -> dict:
     # Détails stockés (JSON-friendly)
-    details = {
+    return {
         "present_days": top.present_days,
         "workdays": top.workdays,
         "presence_rate": round(top.presence_rate, 4),
@@ -225,6 +360,14 @@ def pick_winner(ym: str, commit: bool = True) -> Optional[Award]:
         "leave_days": round(top.leave_days, 2),
     }
 
+
+def pick_winner(ym: str, commit: bool = True) -> Optional[Award]:
+    scores = compute_month_scores(ym)
+    if not scores:
+        return None
+    top = scores[0]
+    details = _award_details(top)
+
     # Upsert par month
     existing: Optional[Award] = db.session.execute(
         select(Award).where(Award.month == ym)
@@ -245,6 +388,141 @@ def pick_winner(ym: str, commit: bool = True) -> Optional[Award]:
     return a
 
 
+# -------------------------------
+# Rattrapage multi-mois
+# -------------------------------
+def range_features(first_ym: str, last_ym: str) -> Dict[str, MonthFeatures]:
+    """
+    Indicateurs de chaque mois de [first_ym, last_ym] en une seule requête
+    groupée par (salarié·e, mois) ; les jours de congé sont comptés via le
+    calendrier (sans table de jours en SQL, quelle que soit la plage).
+    """
+    start, _ = month_range(first_ym)
+    _, end = month_range(last_ym)
+    months = score_snapshots.months_between(start, end)
+    cal = calendar_service.get_calendar()
+
+    users = db.session.execute(
+        select(User.id, User.first_name, User.last_name).where(User.is_active.is_(True)).order_by(User.id)
+    ).all()
+    pos = {uid: k for k, (uid, _, _) in enumerate(users)}
+    out: Dict[str, MonthFeatures] = {}
+    for ym in months:
+        m0, m1 = month_range(ym)
+        f = MonthFeatures(workdays=cal.count(m0, m1))
+        f.user_ids = [u[0] for u in users]
+        f.names = [f"{first} {last}" for _, first, last in users]
+        f.present_days = [0] * len(users)
+        f.total_hours = [0.0] * len(users)
+        f.overtime_hours = [0.0] * len(users)
+        f.leave_days = [0.0] * len(users)
+        out[ym] = f
+
+    att_month = bucket_expr(Attendance.work_date, "month")
+    ot_month = bucket_expr(Overtime.work_date, "month")
+    parts = union_all(
+        select(
+            Attendance.user_id.label("user_id"), att_month.label("month"),
+            case((Attendance.check_in.isnot(None), Attendance.work_date)).label("present_day"),
+            Attendance.total_hours.label("hours"), literal(0.0).label("ot"),
+        ).where(Attendance.work_date >= start, Attendance.work_date <= end),
+        select(
+            Overtime.user_id, ot_month, literal(None, Date), literal(0.0), Overtime.hours,
+        ).where(Overtime.work_date >= start, Overtime.work_date <= end,
+                Overtime.status == RequestStatus.APPROVED),
+    ).subquery()
+    stmt = (
+        select(parts.c.user_id, parts.c.month, func.count(distinct(parts.c.present_day)),
+               func.sum(parts.c.hours), func.sum(parts.c.ot))
+        .group_by(parts.c.user_id, parts.c.month)
+    )
+    for uid, bucket, p, h, o in db.session.execute(stmt):
+        k = pos.get(uid)
+        f = out.get(str(bucket)[:7]) if bucket is not None else None  # 'YYYY-MM-01' ou date
+        if k is None or f is None:
+            continue
+        f.present_days[k] = int(p or 0)
+        f.total_hours[k] = float(h or 0.0)
+        f.overtime_hours[k] = float(o or 0.0)
+
+    leaves = db.session.execute(
+        select(Leave.user_id, Leave.start_date, Leave.end_date)
+        .where(Leave.status == LeaveStatus.APPROVED, Leave.start_date <= end, Leave.end_date >= start)
+    )
+    for uid, d0, d1 in leaves:
+        k = pos.get(uid)
+        if k is None:
+            continue
+        for ym in score_snapshots.months_between(max(d0, start), min(d1, end)):
+            m0, m1 = month_range(ym)
+            out[ym].leave_days[k] += cal.count(max(d0, m0), min(d1, m1))
+    return out
+
+
+def backfill_winners(first_ym: str, last_ym: str, commit: bool = True) -> List[Tuple[str, int, float]]:
+    """
+    Calcule et enregistre le/la gagnant·e de chaque mois de la plage
+    (une agrégation, un chargement des awards existants, un COMMIT).
+    Retourne [(mois, user_id, score), ...]. Comme close_month, refuse une
+    plage qui inclut un mois non terminé.
+    """
+    _, end = month_range(last_ym)
+    if end >= date.today():
+        raise ValueError(f"Le mois {last_ym} n'est pas terminé.")
+    w = get_weights()
+    features = range_features(first_ym, last_ym)
+    existing = {
+        a.month: a for a in db.session.execute(
+            select(Award).where(Award.month.in_(list(features)))
+        ).scalars()
+    }
+    done: List[Tuple[str, int, float]] = []
+    for ym, f in features.items():
+        if not len(f) or not f.workdays:
+            continue
+        scores = award_engine.score(f, w)
+        top = _score_rows(f, scores, award_engine.ranking(f, scores, top=1))[0]
+        a = existing.get(ym)
+        if a is None:
+            a = Award(month=ym)
+            db.session.add(a)
+        a.user_id, a.score, a.details = top.user_id, top.score, _award_details(top)
+        done.append((ym, top.user_id, top.score))
+    if commit:
+        db.session.commit()
+    return done
+
+
+def award_history(page: int = 1, per_page: int = 12, first_ym: Optional[str] = None,
+                  last_ym: Optional[str] = None) -> Tuple[List[dict], int]:
+    """
+    Gagnant·es passé·es, du plus récent au plus ancien : la page
+    (awards JOIN users) et le total (COUNT séparé, juste même au-delà de
+    la dernière page). Retourne (items, total).
+    """
+    conds = []
+    if first_ym:
+        conds.append(Award.month >= first_ym)
+    if last_ym:
+        conds.append(Award.month <= last_ym)
+    rows = db.session.execute(
+        select(Award.month, Award.user_id, Award.score, Award.details, User.first_name, User.last_name)
+        .join(User, User.id == Award.user_id)
+        .where(*conds)
+        .order_by(Award.month.desc())
+        .limit(per_page).offset((page - 1) * per_page)
+    ).all()
+    total = db.session.execute(
+        select(func.count()).select_from(Award).join(User, User.id == Award.user_id).where(*conds)
+    ).scalar_one()
+    items = [
+        {"month": r.month, "user_id": r.user_id, "full_name": f"{r.first_name} {r.last_name}".strip(),
+         "score": float(r.score), "details": r.details or {}}
+        for r in rows
+    ]
+    return items, total
+
+
 # -------------------------------
 # Nom pour affichage (Dashboard)
 # -------------------------------
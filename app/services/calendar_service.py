@@ -0,0 +1,170 @@
+# app/services/calendar_service.py
+# Calendrier des jours ouvrés : week-end + jours fériés (règles par pays,
+# WORK_CALENDAR_COUNTRY) + jours chômés propres à l'entreprise
+# (WORK_CALENDAR_HOLIDAYS). Chaque année est précalculée une fois en sommes
+# préfixes : « jours ouvrés entre a et b » coûte deux lectures de tableau.
+from __future__ import annotations
+
+import threading
+from datetime import date, timedelta
+from itertools import accumulate
+from typing import Callable, Dict, FrozenSet, Iterable, List, Set
+
+from flask import Flask, current_app
+
+EXT_KEY = "work_calendar"
+
+
+def easter(year: int) -> date:
+    """Dimanche de Pâques (calendrier grégorien, algorithme anonyme)."""
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = b // 4, b % 4
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def _fixed(year: int, *md) -> Set[date]:
+    return {date(year, m, d) for m, d in md}
+
+
+def _fr(year: int) -> Set[date]:
+    e = easter(year)
+    return _fixed(year, (1, 1), (5, 1), (5, 8), (7, 14), (8, 15), (11, 1), (11, 11), (12, 25)) | {
+        e + timedelta(days=1),   # lundi de Pâques
+        e + timedelta(days=39),  # Ascension
+        e + timedelta(days=50),  # lundi de Pentecôte
+    }
+
+
+def _be(year: int) -> Set[date]:
+    e = easter(year)
+    return _fixed(year, (1, 1), (5, 1), (7, 21), (8, 15), (11, 1), (11, 11), (12, 25)) | {
+        e + timedelta(days=1), e + timedelta(days=39), e + timedelta(days=50),
+    }
+
+
+def _ma(year: int) -> Set[date]:
+    # Fêtes civiles uniquement (les fêtes religieuses suivent le calendrier
+    # lunaire : à déclarer dans WORK_CALENDAR_HOLIDAYS)
+    days = _fixed(year, (1, 1), (1, 11), (5, 1), (7, 30), (8, 14), (8, 20), (8, 21), (11, 6), (11, 18))
+    if year >= 2024:
+        days.add(date(year, 1, 14))  # Nouvel an amazigh
+    return days
+
+
+COUNTRY_RULES: Dict[str, Callable[[int], Set[date]]] = {
+    "FR": _fr,
+    "BE": _be,
+    "MA": _ma,
+    "NONE": lambda year: set(),
+}
+
+
+class WorkCalendar:
+    """
+    Jours ouvrés par année : prefix[i] = nombre de jours ouvrés parmi les
+    i premiers jours de l'année (calculé à la première demande, puis gardé).
+    """
+
+    def __init__(self, country: str = "FR", weekend: Iterable[int] = (5, 6),
+                 extra: Iterable[str] = ()):
+        self.rule = COUNTRY_RULES.get((country or "NONE").upper(), COUNTRY_RULES["NONE"])
+        self.weekend: FrozenSet[int] = frozenset(weekend)
+        # 'YYYY-MM-DD' (date ponctuelle) ou 'MM-DD' (chaque année)
+        self._extra_dates: Set[date] = set()
+        self._extra_yearly: Set[tuple] = set()
+        for raw in extra:
+            raw = raw.strip()
+            if not raw:
+                continue
+            if len(raw) == 5:
+                m, d = map(int, raw.split("-"))
+                self._extra_yearly.add((m, d))
+            else:
+                self._extra_dates.add(date.fromisoformat(raw))
+        self._years: Dict[int, List[int]] = {}
+        self._lock = threading.Lock()
+
+    def holidays(self, year: int) -> Set[date]:
+        days = self.rule(year) | {d for d in self._extra_dates if d.year == year}
+        for m, d in self._extra_yearly:
+            try:
+                days.add(date(year, m, d))
+            except ValueError:  # 02-29 hors année bissextile
+                pass
+        return days
+
+    def _prefix(self, year: int) -> List[int]:
+        prefix = self._years.get(year)
+        if prefix is None:
+            off = self.holidays(year)
+            first = date(year, 1, 1)
+            n = (date(year + 1, 1, 1) - first).days
+            flags = ((first + timedelta(days=i)) for i in range(n))
+            prefix = [0, *accumulate(int(d.weekday() not in self.weekend and d not in off) for d in flags)]
+            with self._lock:
+                self._years[year] = prefix
+        return prefix
+
+    def is_workday(self, d: date) -> bool:
+        p = self._prefix(d.year)
+        i = d.timetuple().tm_yday
+        return p[i] - p[i - 1] == 1
+
+    def count(self, start: date, end: date) -> int:
+        """Jours ouvrés entre start et end inclus (0 si end < start)."""
+        if end < start:
+            return 0
+        ps, pe = self._prefix(start.year), self._prefix(end.year)
+        i, j = start.timetuple().tm_yday, end.timetuple().tm_yday
+        if start.year == end.year:
+            return pe[j] - ps[i - 1]
+        total = ps[-1] - ps[i - 1] + pe[j]
+        for y in range(start.year + 1, end.year):
+            total += self._prefix(y)[-1]
+        return total
+
+    def workdays(self, start: date, end: date) -> List[date]:
+        """Liste des jours ouvrés entre start et end inclus."""
+        out: List[date] = []
+        cur = start
+        while cur <= end:
+            p = self._prefix(cur.year)
+            last = min(end, date(cur.year, 12, 31))
+            base = cur.timetuple().tm_yday
+            for k in range((last - cur).days + 1):
+                if p[base + k] != p[base + k - 1]:
+                    out.append(cur + timedelta(days=k))
+            cur = last + timedelta(days=1)
+        return out
+
+
+# -------------------------------
+# Intégration Flask
+# -------------------------------
+def init_app(app: Flask) -> None:
+    weekend = [int(x) for x in str(app.config.get("WORK_CALENDAR_WEEKEND", "5,6")).split(",") if x.strip()]
+    extra = str(app.config.get("WORK_CALENDAR_HOLIDAYS") or "").split(",")
+    app.extensions[EXT_KEY] = WorkCalendar(app.config.get("WORK_CALENDAR_COUNTRY", "FR"), weekend, extra)
+
+
+def get_calendar() -> WorkCalendar:
+    cal = current_app.extensions.get(EXT_KEY)
+    if cal is None:
+        init_app(current_app)
+        cal = current_app.extensions[EXT_KEY]
+    return cal
+
+
+def count_workdays(start: date, end: date) -> int:
+    return get_calendar().count(start, end)
+
+
+def workdays(start: date, end: date) -> List[date]:
+    return get_calendar().workdays(start, end)
@@ -1,45 +1,39 @@
 # app/services/cost_service.py
 from datetime import date
-from sqlalchemy import func, and_
+from typing import Dict
+
+from sqlalchemy import select
 from app.extensions import db
 from app.models.department import Department
-from app.models.user import User
-from app.models.attendance import Attendance
+from app.services import payroll_cube
+from app.services.timeseries_service import iter_buckets, month_bounds
+
 
 def department_costs(ym: str | None = None):
     """
-    Calcule coût par département = SUM(attendance.total_hours * user.hourly_rate)
-    pour le mois 'YYYY-MM'. Retourne aussi les départements sans données avec coût = 0.
+    Coût par département pour le mois 'YYYY-MM', lu dans le cube payroll_costs
+    (salaire des heures pointées + heures sup majorées + congés payés).
+    Retourne aussi les départements sans données avec coût = 0.
     """
     if not ym:
         ym = date.today().strftime("%Y-%m")
+    return payroll_cube.read(ym)
 
-    dialect = db.engine.dialect.name  # 'sqlite', 'postgresql', ...
-    if dialect == "sqlite":
-        month_expr = func.strftime("%Y-%m", Attendance.work_date)
-    else:
-        month_expr = func.to_char(Attendance.work_date, "YYYY-MM")
-
-    # point de départ = Department (pour les inclure tous)
-    q = (
-        db.session.query(
-            Department.name.label("department"),
-            func.coalesce(
-                func.sum(
-                    func.coalesce(Attendance.total_hours, 0.0)
-                    * func.coalesce(User.hourly_rate, 0.0)
-                ),
-                0.0,
-            ).label("cost"),
-        )
-        .outerjoin(User, User.department_id == Department.id)
-        # IMPORTANT: filtre de mois DANS la condition de jointure, pas dans WHERE
-        .outerjoin(
-            Attendance,
-            and_(Attendance.user_id == User.id, month_expr == ym),
-        )
-        .group_by(Department.name)
-        .order_by(Department.name.asc())
-    )
 
-    return [{"department": d, "cost": float(c or 0.0)} for d, c in q.all()]
+def department_cost_series(first_ym: str, last_ym: str) -> Dict[str, list]:
+    """
+    Coût total (cube payroll_costs, comme department_costs) département × mois
+    sur [first_ym, last_ym], par department_id.
+    Retourne {"months": ["YYYY-MM", ...], "series": [{"department", "costs": [...]}, ...]},
+    mois sans données à 0, départements sans données inclus.
+    """
+    start, _ = month_bounds(first_ym)
+    _, stop = month_bounds(last_ym)
+    months = [d.strftime("%Y-%m") for d in iter_buckets(start, stop, "month")][:-1]
+    deps = db.session.execute(select(Department.id, Department.name).order_by(Department.name, Department.id)).all()
+    totals = payroll_cube.month_totals(months, [dep for dep, _ in deps])
+    return {
+        "months": months,
+        "series": [{"department": name, "costs": [totals.get((ym, dep), 0.0) for ym in months]}
+                   for dep, name in deps],
+    }
@@ -0,0 +1,161 @@
+# app/services/costs_service.py
+# Budget vs réel par département (page /costs).
+#  - schéma sondé une fois au démarrage (inspecteur SQLAlchemy, tout dialecte) :
+#    table de bulletins `payslips` éventuelle et sa disposition ;
+#  - réel = bulletins si la table existe (une requête groupée), sinon le cube
+#    payroll_costs lu par payroll_cube.read (sans écriture) ;
+#  - résumé issu du cube mis en cache jusqu'au prochain COMMIT sur ses tables ;
+#    les bulletins, alimentés hors application, ne sont jamais mis en cache.
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+from flask import Flask, current_app
+from sqlalchemy import String, column, func, inspect as sa_inspect, select, table
+
+from ..extensions import db
+from ..models.department import Department
+from . import data_version, payroll_cube
+from .timeseries_service import month_bounds
+
+EXT_KEY = "costs_schema"
+# Dispositions connues de `payslips` : (colonne période, colonne montant)
+PAYSLIP_LAYOUTS = (("period", "net_amount"), ("period_month", "total_net"))
+# Tables dont dépend le résumé (clé de cache et ETag de /costs/api/summary)
+SUMMARY_TABLES = tuple(dict.fromkeys(("departments", "payroll_costs", "payslips", *payroll_cube.SOURCE_TABLES)))
+
+
+@dataclass(frozen=True)
+class CostsSchema:
+    payslips: Optional[Tuple[str, str]] = None
+    payslips_text_period: bool = False  # période stockée en texte 'YYYY-MM-DD'
+
+    @property
+    def source(self) -> str:
+        return "payslips" if self.payslips else "payroll_costs"
+
+
+# -------------------------------
+# Sondage du schéma
+# -------------------------------
+def probe(engine) -> CostsSchema:
+    """Disposition de la table `payslips` si elle existe."""
+    insp = sa_inspect(engine)
+    layout, text_period = None, False
+    if insp.has_table("payslips"):
+        cols = {c["name"]: c["type"] for c in insp.get_columns("payslips")}
+        if "department_id" in cols:
+            layout = next((lay for lay in PAYSLIP_LAYOUTS if set(lay) <= set(cols)), None)
+        if layout:
+            text_period = isinstance(cols[layout[0]], String)
+    return CostsSchema(layout, text_period)
+
+
+def init_app(app: Flask) -> None:
+    # Base injoignable au démarrage : sondage repoussé au premier résumé
+    try:
+        with app.app_context():
+            app.extensions[EXT_KEY] = probe(db.engine)
+    except Exception as e:
+        app.logger.debug("Schéma des coûts non sondé au démarrage: %s", e)
+
+
+def get_schema() -> CostsSchema:
+    schema = current_app.extensions.get(EXT_KEY)
+    if schema is None:
+        schema = current_app.extensions[EXT_KEY] = probe(db.engine)
+    return schema
+
+
+# -------------------------------
+# Réel du mois (department_id -> total)
+# -------------------------------
+def _period_bounds(schema: CostsSchema, year: int, month: int) -> Tuple[Any, Any]:
+    start, stop = month_bounds(f"{year:04d}-{month:02d}")
+    return (start.isoformat(), stop.isoformat()) if schema.payslips_text_period else (start, stop)
+
+
+def _actuals(schema: CostsSchema, year: int, month: int) -> Dict[int, float]:
+    if schema.payslips:
+        period, amount = schema.payslips
+        p = table("payslips", column("department_id"), column(period), column(amount))
+        lo, hi = _period_bounds(schema, year, month)
+        return dict(db.session.execute(
+            select(p.c.department_id, func.sum(p.c[amount]))
+            .where(p.c[period] >= lo, p.c[period] < hi)
+            .group_by(p.c.department_id)
+        ).all())
+    return {r["department_id"]: r["cost"] for r in payroll_cube.read(f"{year:04d}-{month:02d}")}
+
+
+def _summarize(schema: CostsSchema, year: int, month: int) -> Dict[str, Any]:
+    default_currency = current_app.config.get("PAYROLL_CURRENCY", "XOF")
+    actuals = _actuals(schema, year, month)
+    q = (
+        select(Department.id, Department.code, Department.name,
+               Department.budget_monthly, Department.overhead_rate, Department.currency)
+        .where(Department.is_active.is_(True))
+        .order_by(Department.name.asc())
+    )
+
+    rows = []
+    tot_budget = tot_actual = 0.0
+    for dep_id, code, name, budget, overhead_rate, currency in db.session.execute(q):
+        budget, actual, overhead_rate = float(budget or 0), float(actuals.get(dep_id) or 0), float(overhead_rate or 0)
+        actual_with_overhead = round(actual * (1 + overhead_rate / 100.0), 2)
+        rows.append({
+            "department_id": dep_id,
+            "code": code,
+            "name": name,
+            "currency": currency or default_currency,
+            "budget_monthly": round(budget, 2),
+            "actual": round(actual, 2),
+            "overhead_rate": overhead_rate,
+            "actual_with_overhead": actual_with_overhead,
+            "variance": round(budget - actual_with_overhead, 2),
+        })
+        tot_budget += budget
+        tot_actual += actual_with_overhead
+
+    return {
+        "period": f"{year:04d}-{month:02d}",
+        "source": schema.source,
+        "currency": default_currency,
+        "total_budget": round(tot_budget, 2),
+        "total_actual": round(tot_actual, 2),
+        "rows": rows,
+    }
+
+
+def payslips_marker(year: int, month: int) -> Optional[Tuple[Any, ...]]:
+    """
+    (nombre, somme) des bulletins du mois, ou None sans table `payslips` :
+    ses écritures ne passent pas par la session, data_version ne les voit pas.
+    """
+    schema = get_schema()
+    if not schema.payslips:
+        return None
+    period, amount = schema.payslips
+    p = table("payslips", column(period), column(amount))
+    lo, hi = _period_bounds(schema, year, month)
+    return tuple(db.session.execute(
+        select(func.count(), func.sum(p.c[amount])).where(p.c[period] >= lo, p.c[period] < hi)
+    ).one())
+
+
+def summarize_month(year: int, month: int) -> Dict[str, Any]:
+    """
+    Budget, réel (+ frais généraux en %) et écart par département actif
+    pour le mois, avec les totaux. Depuis le cube : recalculé seulement
+    après un COMMIT touchant l'une des tables sources ; depuis les
+    bulletins : recalculé à chaque appel.
+    """
+    schema = get_schema()
+    if schema.payslips:
+        return _summarize(schema, year, month)
+    return data_version.cached(
+        f"costs_summary:{year:04d}-{month:02d}",
+        SUMMARY_TABLES,
+        lambda: _summarize(schema, year, month),
+    )
@@ -0,0 +1,83 @@
+# app/services/dashboard_bundle.py
+# Tous les widgets du dashboard en une réponse (/api/dashboard/bundle) :
+#  1. rollup journalier (présence + heures, fenêtre + veille)  -> KPIs + courbe
+#  2. compteurs des demandes en attente (congés, heures sup)
+#  3. série des heures sup approuvées
+#  4. coûts par département du mois
+from __future__ import annotations
+
+from datetime import date, timedelta
+from typing import Any, Dict, Tuple
+
+from sqlalchemy import func, select
+
+from ..extensions import db
+from ..models.daily_attendance_stat import DailyAttendanceStat
+from ..models.enums import LeaveStatus, RequestStatus
+from ..models.leave import Leave
+from ..models.overtime import Overtime
+from . import payroll_cube
+from .cost_service import department_costs
+from .timeseries_service import chart_payload, iter_buckets, series, window
+
+# Tables lues par le bundle : clé de version (ETag) de la réponse. Les coûts
+# viennent du cube et, pour les lignes périmées, de ses tables sources.
+BUNDLE_TABLES = tuple(dict.fromkeys(
+    ("daily_attendance_stats", "attendances", "overtimes", "leaves", "users", "departments",
+     "payroll_costs", *payroll_cube.SOURCE_TABLES)))
+
+
+def _daily_rollup(start: date, end: date) -> Dict[date, Tuple[int, float]]:
+    D = DailyAttendanceStat
+    rows = db.session.execute(
+        select(D.work_date, func.sum(D.present_count), func.sum(D.total_hours))
+        .where(D.work_date >= start, D.work_date <= end)
+        .group_by(D.work_date)
+    ).all()
+    return {d: (int(p or 0), float(h or 0.0)) for d, p, h in rows}
+
+
+def request_counters(today: date) -> Tuple[int, int, float]:
+    """(congés en attente, heures sup en attente, heures sup approuvées du jour) en une requête."""
+    leaves = select(func.count(Leave.id)).where(Leave.status == LeaveStatus.PENDING).scalar_subquery()
+    overtime = select(func.count(Overtime.id)).where(Overtime.status == RequestStatus.PENDING).scalar_subquery()
+    ot_today = (select(func.coalesce(func.sum(Overtime.hours), 0.0))
+                .where(Overtime.work_date == today, Overtime.status == RequestStatus.APPROVED)
+                .scalar_subquery())
+    lv, ot, hours = db.session.execute(select(leaves, overtime, ot_today)).one()
+    return int(lv or 0), int(ot or 0), float(hours or 0.0)
+
+
+def kpis(today: date, daily: Dict[date, Tuple[int, float]] | None = None) -> Dict[str, Any]:
+    yesterday = today - timedelta(days=1)
+    if daily is None:
+        daily = _daily_rollup(yesterday, today)
+    present, hours = daily.get(today, (0, 0.0))
+    present_y, hours_y = daily.get(yesterday, (0, 0.0))
+    leave_pending, overtime_pending, overtime_today = request_counters(today)
+    return {
+        "date": str(today),
+        "present_today": present,
+        "hours_today": round(hours, 2),
+        "present_vs_yesterday": present - present_y,
+        "hours_vs_yesterday": round(hours - hours_y, 2),
+        "leave_pending": leave_pending,
+        "overtime_pending": overtime_pending,
+        "overtime_hours_today": round(overtime_today, 2),
+    }
+
+
+def build_bundle(today: date, days: int = 14) -> Dict[str, Any]:
+    start, end = window(days, today)
+    daily = _daily_rollup(min(start, today - timedelta(days=1)), end)
+    presence = [(d, daily.get(d, (0, 0.0))[0]) for d in iter_buckets(start, end, "day")]
+    overtime = series(
+        Overtime.work_date, func.sum(Overtime.hours), start, end,
+        filters=[Overtime.status == RequestStatus.APPROVED],
+    )
+    return {
+        "stats": kpis(today, daily),
+        "presence": chart_payload(presence),
+        "overtime": chart_payload(overtime),
+        "department_costs": department_costs(today.strftime("%Y-%m")),
+    }
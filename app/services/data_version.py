@@ -0,0 +1,334 @@
+# app/services/data_version.py
+# Numéros de version par table, incrémentés à chaque COMMIT qui écrit dans la
+# table (ORM ou instructions INSERT/UPDATE/DELETE passées par la session).
+# Sert de clé d'invalidation aux caches de lecture : une valeur calculée reste
+# valable tant que les versions des tables dont elle dépend n'ont pas bougé.
+# Les versions doivent être partagées par tous les workers / instances, sinon un
+# worker qui n'a pas vu l'écriture sert des 304 et des caches périmés :
+#  - "db" (défaut) : table data_versions, incrémentée dans la transaction même
+#    (before_commit, connexion de la session) : pas de second COMMIT, et
+#    l'invalidation réussit ou échoue avec les données ;
+#  - "redis" : DATA_VERSION_REDIS_URL ;
+#  - "memory" : compteurs du processus, réservé à un seul worker ou aux tests.
+from __future__ import annotations
+
+import hashlib
+import itertools
+import threading
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from flask import Flask, current_app
+from sqlalchemy import event, inspect as sa_inspect, select, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from ..extensions import db
+from ..models.data_version import DataVersion
+from .sql_compat import upsert_insert
+
+EXT_KEY = "data_version"
+_PENDING = "data_version_pending"
+
+
+class MemoryVersions:
+    """
+    Compteurs du processus (un seul worker, ou tests). Repartent de zéro au
+    redémarrage : `epoch` distingue les ETags d'un démarrage à l'autre.
+    """
+
+    def __init__(self):
+        self._v: Dict[str, int] = defaultdict(int)
+        self._ts: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self.epoch = uuid.uuid4().hex[:8]
+        self.started = time.time()
+
+    def get_many(self, tables: Iterable[str]) -> Tuple[int, ...]:
+        return tuple(self._v[t] for t in tables)
+
+    def bump(self, tables: Iterable[str]) -> None:
+        now = time.time()
+        with self._lock:
+            for t in tables:
+                self._v[t] += 1
+                self._ts[t] = now
+            self._changed.notify_all()
+
+    def wait(self, tables: Tuple[str, ...], seen: Tuple[int, ...], timeout: float) -> Tuple[int, ...]:
+        with self._changed:
+            self._changed.wait_for(lambda: self.get_many(tables) != seen, timeout)
+            return self.get_many(tables)
+
+    def last_modified(self, tables: Iterable[str]) -> Optional[float]:
+        # Jamais modifiée depuis le démarrage : le démarrage borne la date
+        return max((self._ts.get(t, self.started) for t in tables), default=None)
+
+
+class RedisVersions:
+    """Mêmes compteurs dans deux hash Redis (versions, horodatages)."""
+
+    epoch = "redis"
+
+    def __init__(self, url: str, prefix: str = "rh:dv:"):
+        import redis  # dépendance optionnelle
+
+        self._r = redis.Redis.from_url(url, decode_responses=True)
+        self._v, self._ts = prefix + "v", prefix + "ts"
+
+    def get_many(self, tables: Iterable[str]) -> Tuple[int, ...]:
+        tables = list(tables)
+        return tuple(int(v or 0) for v in self._r.hmget(self._v, tables)) if tables else ()
+
+    def bump(self, tables: Iterable[str]) -> None:
+        now = time.time()
+        pipe = self._r.pipeline()
+        for t in tables:
+            pipe.hincrby(self._v, t, 1)
+            pipe.hset(self._ts, t, now)
+        pipe.execute()
+
+    def wait(self, tables: Tuple[str, ...], seen: Tuple[int, ...], timeout: float,
+             poll: float = 1.0) -> Tuple[int, ...]:
+        deadline = time.monotonic() + timeout
+        while True:
+            current = self.get_many(tables)
+            if current != seen or time.monotonic() >= deadline:
+                return current
+            time.sleep(min(poll, max(0.0, deadline - time.monotonic())))
+
+    def last_modified(self, tables: Iterable[str]) -> Optional[float]:
+        tables = list(tables)
+        found = [float(v) for v in self._r.hmget(self._ts, tables) if v] if tables else []
+        return max(found) if found else None
+
+
+class DatabaseVersions:
+    """
+    Compteurs dans la table data_versions : la base est déjà partagée par
+    tous les workers (et par les instances serverless), sans service en plus.
+    Une lecture = une requête sur clé primaire. Les incréments passent par la
+    transaction qui écrit les données (voir _before_commit).
+    """
+
+    epoch = "db"
+    transactional = True
+
+    def __init__(self, app: Flask):
+        self.app = app
+        self._unavailable = itertools.count(-1, -1)  # jamais deux fois la même valeur
+        self._warned = False
+
+    def _fail(self, e: Exception) -> None:
+        if not self._warned:
+            self.app.logger.warning("Versions de données : table data_versions inaccessible (%s).", e)
+            self._warned = True
+
+    def _read(self, tables: Iterable[str], col) -> Dict[str, Any]:
+        with db.engine.connect() as conn:
+            return dict(conn.execute(
+                select(DataVersion.name, col).where(DataVersion.name.in_(list(tables)))
+            ).all())
+
+    def get_many(self, tables: Iterable[str]) -> Tuple[int, ...]:
+        tables = list(tables)
+        if not tables:
+            return ()
+        try:
+            found = self._read(tables, DataVersion.version)
+        except SQLAlchemyError as e:
+            # Base non migrée : aucune valeur ne doit rester en cache
+            self._fail(e)
+            return tuple(next(self._unavailable) for _ in tables)
+        return tuple(int(found.get(t) or 0) for t in tables)
+
+    def bump(self, tables: Iterable[str], conn=None) -> None:
+        """
+        Incrémente sur `conn` (transaction en cours de l'appelant), sinon dans
+        une transaction à part (touch). Une erreur remonte : une invalidation
+        perdue servirait des caches et des 304 périmés.
+        """
+        now = time.time()
+        rows = [{"name": t, "version": 1, "updated_at": now} for t in sorted(set(tables))]
+        if not rows:
+            return
+        if conn is None:
+            with db.engine.begin() as conn:
+                self._bump(conn, rows, now)
+        else:
+            self._bump(conn, rows, now)
+
+    @staticmethod
+    def _bump(conn, rows: List[dict], now: float) -> None:
+        T = DataVersion.__table__
+        ins = upsert_insert(T)
+        if ins is not None:
+            conn.execute(ins.on_conflict_do_update(
+                index_elements=[T.c.name],
+                set_={"version": T.c.version + 1, "updated_at": ins.excluded.updated_at},
+            ), rows)
+            return
+        for r in rows:
+            res = conn.execute(update(T).where(T.c.name == r["name"])
+                               .values(version=T.c.version + 1, updated_at=now))
+            if not res.rowcount:
+                try:
+                    with conn.begin_nested():
+                        conn.execute(T.insert(), r)
+                except IntegrityError:  # insertion concurrente
+                    conn.execute(update(T).where(T.c.name == r["name"])
+                                 .values(version=T.c.version + 1, updated_at=now))
+
+    def wait(self, tables: Tuple[str, ...], seen: Tuple[int, ...], timeout: float,
+             poll: float = 1.0) -> Tuple[int, ...]:
+        deadline = time.monotonic() + timeout
+        while True:
+            current = self.get_many(tables)
+            if current != seen or time.monotonic() >= deadline:
+                return current
+            time.sleep(min(poll, max(0.0, deadline - time.monotonic())))
+
+    def last_modified(self, tables: Iterable[str]) -> Optional[float]:
+        tables = list(tables)
+        try:
+            found = self._read(tables, DataVersion.updated_at) if tables else {}
+        except SQLAlchemyError as e:
+            self._fail(e)
+            return None
+        return max(found.values()) if found else None
+
+
+_store = MemoryVersions()
+
+
+# -------------------------------
+# Suivi des écritures (événements de session)
+# -------------------------------
+def _pending(session: Session) -> Set[str]:
+    return session.info.setdefault(_PENDING, set())
+
+
+def _table_of(obj) -> str | None:
+    table = getattr(sa_inspect(obj).mapper, "local_table", None)
+    return getattr(table, "name", None)
+
+
+def _collect_flush(session: Session, flush_context) -> None:
+    pending = _pending(session)
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        name = _table_of(obj)
+        if name:
+            pending.add(name)
+
+
+def _collect_execute(state) -> None:
+    if state.is_insert or state.is_update or state.is_delete:
+        name = getattr(getattr(state.statement, "table", None), "name", None)
+        if name:
+            _pending(state.session).add(name)
+
+
+def _before_commit(session: Session) -> None:
+    # Backend "db" : incréments dans la transaction qui se termine. Flush
+    # d'abord, pour voir toutes les écritures (et les péremptions qu'elles
+    # déclenchent) ; les listeners before_commit qui écrivent passent avant
+    # celui-ci (insert=True, voir score_snapshots / payroll_cube).
+    if not getattr(_store, "transactional", False):
+        return
+    session.flush()
+    pending = session.info.pop(_PENDING, None)
+    if pending:
+        _store.bump(pending, conn=session.connection())
+
+
+def _after_commit(session: Session) -> None:
+    # Mémoire / Redis : hors base, incrémentés une fois le COMMIT acquis
+    pending = session.info.pop(_PENDING, None)
+    if pending:
+        _store.bump(pending)
+
+
+def _after_rollback(session: Session) -> None:
+    session.info.pop(_PENDING, None)
+
+
+event.listen(Session, "after_flush", _collect_flush)
+event.listen(Session, "do_orm_execute", _collect_execute)
+event.listen(Session, "before_commit", _before_commit)
+event.listen(Session, "after_commit", _after_commit)
+event.listen(Session, "after_rollback", _after_rollback)
+
+
+# -------------------------------
+# API
+# -------------------------------
+def versions(*tables: str) -> Tuple[int, ...]:
+    return _store.get_many(tables)
+
+
+def touch(*tables: str) -> None:
+    """Écritures hors session (engine / connexion brute) : invalidation explicite."""
+    _store.bump(tables)
+
+
+def touch_on_commit(session: Session, *tables: str) -> None:
+    """
+    Écritures par session.connection() (hors événements ORM) : versions
+    incrémentées au COMMIT. Depuis before_commit, enregistrer le listener
+    avec insert=True (avant celui de ce module).
+    """
+    _pending(session).update(tables)
+
+
+def wait_for_change(tables: Tuple[str, ...], seen: Tuple[int, ...], timeout: float) -> Tuple[int, ...]:
+    """Bloque jusqu'à un COMMIT sur l'une des `tables` (ou `timeout`) ; renvoie les versions."""
+    return _store.wait(tables, seen, timeout)
+
+
+def last_modified(*tables: str) -> Optional[datetime]:
+    """Date (UTC, à la seconde) du dernier COMMIT sur l'une des `tables`."""
+    ts = _store.last_modified(tables)
+    return datetime.fromtimestamp(int(ts), tz=timezone.utc) if ts is not None else None
+
+
+def etag(tables: Tuple[str, ...], *extra: Any) -> str:
+    """Validateur HTTP dérivé des versions des `tables` (+ paramètres de la vue)."""
+    raw = "|".join(map(str, (_store.epoch, *tables, *versions(*tables), *extra)))
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def cached(key: str, tables: Tuple[str, ...], build: Callable[[], Any]) -> Any:
+    """
+    Valeur de `build()` mise en cache (par application) jusqu'au prochain
+    COMMIT touchant l'une des `tables`.
+    """
+    cache = current_app.extensions.setdefault(EXT_KEY, {})
+    current = versions(*tables)
+    hit = cache.get(key)
+    if hit is not None and hit[0] == current:
+        return hit[1]
+    value = build()
+    cache[key] = (current, value)  # versions lues avant le calcul : jamais trop récentes
+    return value
+
+
+def init_app(app: Flask) -> None:
+    global _store
+    app.extensions.setdefault(EXT_KEY, {})
+    backend = (app.config.get("DATA_VERSION_BACKEND") or "db").lower()
+    if backend == "memory":
+        _store = MemoryVersions()
+        if not (app.testing or app.debug):
+            app.logger.warning("Versions de données en mémoire : à réserver à un seul worker.")
+        return
+    if backend == "redis":
+        try:
+            _store = RedisVersions(app.config["DATA_VERSION_REDIS_URL"])
+            return
+        except Exception as e:
+            app.logger.warning("Versions de données : Redis indisponible (%s), repli sur la base.", e)
+    _store = DatabaseVersions(app)
@@ -0,0 +1,261 @@
+# app/services/geofence.py
+# Géorepérage des pointages.
+# Les sites actifs (cercles / polygones) sont chargés dans une grille en
+# mémoire (cellules de GEOFENCE_CELL_DEG degrés) : un pointage ne teste que
+# les quelques sites de sa cellule, quelle que soit la taille du parc.
+# Modes (GEOFENCE_MODE) : off | flag (statut enregistré) | enforce (refus hors site).
+from __future__ import annotations
+
+import heapq
+import math
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from flask import current_app
+from sqlalchemy import select, update
+
+from ..extensions import db
+from ..models.attendance import Attendance
+from ..models.geo_site import GeoSite
+
+EXT_KEY = "geofence_index"
+EARTH_RADIUS_M = 6_371_008.8
+M_PER_DEG_LAT = 111_320.0
+MAX_CELLS_PER_SITE = 4096  # au-delà, le site est testé pour chaque point
+
+INSIDE, OUTSIDE = "inside", "outside"
+
+
+class GeofenceViolation(ValueError):
+    """Pointage hors de tout site autorisé (GEOFENCE_MODE=enforce)."""
+
+
+def haversine_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+
+def _in_polygon(lat: float, lon: float, pts: Sequence[Tuple[float, float]]) -> bool:
+    """Lancer de rayon (plan lat/lon, suffisant à l'échelle d'un site)."""
+    inside = False
+    j = len(pts) - 1
+    for i in range(len(pts)):
+        yi, xi = pts[i]
+        yj, xj = pts[j]
+        if (yi > lat) != (yj > lat) and lon < (xj - xi) * (lat - yi) / (yj - yi) + xi:
+            inside = not inside
+        j = i
+    return inside
+
+
+@dataclass(frozen=True)
+class _Site:
+    id: int
+    kind: str
+    bbox: Tuple[float, float, float, float]  # min_lat, min_lon, max_lat, max_lon
+    lat: float = 0.0
+    lon: float = 0.0
+    radius_m: float = 0.0
+    points: Tuple[Tuple[float, float], ...] = ()
+
+    def contains(self, lat: float, lon: float) -> bool:
+        a, b, c, d = self.bbox
+        if not (a <= lat <= c and b <= lon <= d):
+            return False
+        if self.kind == "circle":
+            return haversine_m(lat, lon, self.lat, self.lon) <= self.radius_m
+        return _in_polygon(lat, lon, self.points)
+
+
+def _to_site(s: GeoSite) -> Optional[_Site]:
+    if s.kind == "circle":
+        if s.center_lat is None or s.center_lon is None or not s.radius_m:
+            return None
+        dlat = s.radius_m / M_PER_DEG_LAT
+        dlon = s.radius_m / (M_PER_DEG_LAT * max(math.cos(math.radians(s.center_lat)), 1e-6))
+        bbox = (s.center_lat - dlat, s.center_lon - dlon, s.center_lat + dlat, s.center_lon + dlon)
+        return _Site(s.id, "circle", bbox, s.center_lat, s.center_lon, float(s.radius_m))
+    pts = tuple(s.points)
+    if len(pts) < 3:
+        return None
+    lats, lons = [p[0] for p in pts], [p[1] for p in pts]
+    return _Site(s.id, "polygon", (min(lats), min(lons), max(lats), max(lons)), points=pts)
+
+
+def _site_id(s: _Site) -> int:
+    return s.id
+
+
+class SiteIndex:
+    """
+    Grille uniforme : cellule -> sites dont la boîte englobante la recouvre.
+    Sites qui se chevauchent : le plus petit id l'emporte (locate et locate_many).
+    """
+
+    def __init__(self, sites: Iterable[_Site], cell_deg: float = 0.01):
+        self.cell = cell_deg
+        # Triés par id : chaque cellule (et `large`) l'est aussi
+        self.sites: List[_Site] = sorted(sites, key=_site_id)
+        self.grid: Dict[Tuple[int, int], List[_Site]] = defaultdict(list)
+        self.large: List[_Site] = []
+        for s in self.sites:
+            a, b, c, d = s.bbox
+            i0, j0 = self._key(a, b)
+            i1, j1 = self._key(c, d)
+            if (i1 - i0 + 1) * (j1 - j0 + 1) > MAX_CELLS_PER_SITE:
+                self.large.append(s)
+                continue
+            for i in range(i0, i1 + 1):
+                for j in range(j0, j1 + 1):
+                    self.grid[(i, j)].append(s)
+
+    def _key(self, lat: float, lon: float) -> Tuple[int, int]:
+        return math.floor(lat / self.cell), math.floor(lon / self.cell)
+
+    def _candidates(self, key: Tuple[int, int]) -> List[_Site]:
+        found = self.grid.get(key, ())
+        return list(heapq.merge(found, self.large, key=_site_id)) if self.large else list(found)
+
+    def candidates(self, lat: float, lon: float) -> List[_Site]:
+        """Sites à tester pour le point, par id croissant."""
+        return self._candidates(self._key(lat, lon))
+
+    def locate(self, lat: float, lon: float) -> Optional[int]:
+        """Id du site contenant le point (le plus petit en cas de chevauchement), sinon None."""
+        for s in self.candidates(lat, lon):
+            if s.contains(lat, lon):
+                return s.id
+        return None
+
+    def locate_many(self, points: Sequence[Tuple[float, float]]) -> List[Optional[int]]:
+        """
+        Version lot : points regroupés par cellule, distances aux cercles
+        calculées en une opération numpy par cellule ; même résultat que locate.
+        """
+        out: List[Optional[int]] = [None] * len(points)
+        by_cell: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+        for k, (lat, lon) in enumerate(points):
+            by_cell[self._key(lat, lon)].append(k)
+        for key, idx in by_cell.items():
+            cands = self._candidates(key)
+            if not cands:
+                continue
+            # Distances aux cercles en une opération ; l'ordre de test reste celui de locate
+            col = {pos: n for n, pos in enumerate(p for p, s in enumerate(cands) if s.kind == "circle")}
+            inside = None
+            if col:
+                circles = [cands[pos] for pos in col]
+                pts = np.radians(np.asarray([points[k] for k in idx], dtype=float))
+                c = np.radians(np.asarray([(s.lat, s.lon) for s in circles], dtype=float))
+                dp = pts[:, None, 0] - c[None, :, 0]
+                dl = pts[:, None, 1] - c[None, :, 1]
+                a = np.sin(dp / 2) ** 2 + np.cos(pts[:, None, 0]) * np.cos(c[None, :, 0]) * np.sin(dl / 2) ** 2
+                dist = 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(a))
+                inside = dist <= np.asarray([s.radius_m for s in circles])[None, :]
+            for n, k in enumerate(idx):
+                lat, lon = points[k]
+                for pos, s in enumerate(cands):
+                    if (bool(inside[n, col[pos]]) if pos in col else s.contains(lat, lon)):
+                        out[k] = s.id
+                        break
+        return out
+
+    def __len__(self) -> int:
+        return len(self.sites)
+
+
+# -------------------------------
+# Index partagé (reconstruit à l'expiration ou sur invalidation)
+# -------------------------------
+def build_index() -> SiteIndex:
+    rows = db.session.execute(select(GeoSite).where(GeoSite.is_active.is_(True))).scalars()
+    sites = [s for s in (_to_site(r) for r in rows) if s is not None]
+    return SiteIndex(sites, float(current_app.config.get("GEOFENCE_CELL_DEG", 0.01)))
+
+
+def get_index() -> SiteIndex:
+    cached = current_app.extensions.get(EXT_KEY)
+    ttl = float(current_app.config.get("GEOFENCE_INDEX_TTL", 60))
+    if cached is None or time.monotonic() - cached[1] > ttl:
+        cached = (build_index(), time.monotonic())
+        current_app.extensions[EXT_KEY] = cached
+    return cached[0]
+
+
+def invalidate() -> None:
+    current_app.extensions.pop(EXT_KEY, None)
+
+
+def mode() -> str:
+    return (current_app.config.get("GEOFENCE_MODE") or "off").lower()
+
+
+def status_for(site_id: Optional[int], index: SiteIndex) -> Optional[str]:
+    if site_id is not None:
+        return INSIDE
+    return OUTSIDE if len(index) else None
+
+
+def classify(lat, lon) -> Tuple[Optional[int], Optional[str]]:
+    """(site_id, statut) d'une position ; (None, None) si inconnue ou géorepérage désactivé."""
+    if lat is None or lon is None or mode() == "off":
+        return None, None
+    index = get_index()
+    site_id = index.locate(float(lat), float(lon))
+    return site_id, status_for(site_id, index)
+
+
+def check_punch(lat, lon) -> Tuple[Optional[int], Optional[str]]:
+    """
+    Comme classify, mais en mode enforce lève GeofenceViolation hors site,
+    ou sans position dès qu'un site est défini (omettre lat/lon ne contourne rien).
+    """
+    if mode() == "enforce" and (lat is None or lon is None) and len(get_index()):
+        raise GeofenceViolation("Position requise pour pointer.")
+    site_id, status = classify(lat, lon)
+    if status == OUTSIDE and mode() == "enforce":
+        raise GeofenceViolation("Pointage hors des sites autorisés.")
+    return site_id, status
+
+
+# -------------------------------
+# Revalidation de l'historique
+# -------------------------------
+def revalidate(start: date | None = None, end: date | None = None, batch_size: int = 2000) -> int:
+    """
+    Reclasse les pointages géolocalisés (par lots, pagination sur l'id).
+    Retourne le nombre de lignes dont le site ou le statut a changé.
+    """
+    index = build_index()
+    A = Attendance
+    changed, last_id = 0, 0
+    while True:
+        q = (select(A.id, A.latitude, A.longitude, A.site_id, A.geo_status)
+             .where(A.id > last_id, A.latitude.isnot(None), A.longitude.isnot(None))
+             .order_by(A.id).limit(batch_size))
+        if start:
+            q = q.where(A.work_date >= start)
+        if end:
+            q = q.where(A.work_date <= end)
+        rows = db.session.execute(q).all()
+        if not rows:
+            break
+        found = index.locate_many([(r.latitude, r.longitude) for r in rows])
+        params = []
+        for r, site_id in zip(rows, found):
+            status = status_for(site_id, index)
+            if (r.site_id, r.geo_status) != (site_id, status):
+                params.append({"id": r.id, "site_id": site_id, "geo_status": status})
+        if params:
+            db.session.execute(update(A), params)
+            db.session.commit()
+            changed += len(params)
+        last_id = rows[-1].id
+    return changed
+
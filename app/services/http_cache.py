@@ -0,0 +1,64 @@
+# app/services/http_cache.py
+# Requêtes conditionnelles pour les API de lecture.
+# ETag / Last-Modified viennent des versions des tables lues (data_version) :
+# un client à jour reçoit un 304 sans que la vue (et ses agrégats) ne s'exécute.
+from __future__ import annotations
+
+import time
+from datetime import date, datetime
+from functools import wraps
+from typing import Any, Callable, Optional
+
+from flask import Response, make_response, request
+
+from . import data_version
+
+
+def _settled(modified: Optional[datetime]) -> Optional[datetime]:
+    """
+    Last-Modified est à la seconde : utilisable seulement une fois cette
+    seconde écoulée, sinon un COMMIT dans la même seconde passerait pour
+    « non modifié ». D'ici là, seul l'ETag valide la réponse.
+    """
+    if modified is None or time.time() < modified.timestamp() + 1:
+        return None
+    return modified
+
+
+def _not_modified(tag: str, modified: Optional[datetime]) -> bool:
+    # If-None-Match prime sur If-Modified-Since (RFC 9110)
+    if request.if_none_match:
+        return request.if_none_match.contains(tag)
+    since = request.if_modified_since
+    return bool(since and modified and modified <= since)
+
+
+def conditional(*tables: str, marker: Optional[Callable[[], Any]] = None):
+    """
+    @conditional("attendances", "users") sous les décorateurs d'authentification.
+    L'ETag couvre aussi l'URL complète (paramètres) et le jour courant
+    (valeurs par défaut du type "mois en cours").
+    `marker()` : état d'une source que data_version ne suit pas (table
+    alimentée hors application) ; s'il n'est pas None, il entre dans l'ETag
+    et Last-Modified est omis (aucune date fiable pour ces écritures).
+    """
+    def deco(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            extra = marker() if marker is not None else None
+            tag = data_version.etag(tables, request.full_path, date.today(), *(() if extra is None else (extra,)))
+            modified = _settled(data_version.last_modified(*tables)) if extra is None else None
+            if _not_modified(tag, modified):
+                resp = Response(status=304)
+            else:
+                resp = make_response(view(*args, **kwargs))
+                if resp.status_code != 200:
+                    return resp
+            resp.set_etag(tag)
+            if modified is not None:
+                resp.last_modified = modified
+            resp.cache_control.private = True
+            resp.cache_control.no_cache = True
+            return resp
+        return wrapper
+    return deco
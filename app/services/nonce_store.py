@@ -0,0 +1,136 @@
+# app/services/nonce_store.py
+# Cache borné à expiration (TTL) pour les jetons QR :
+#  - vérifications déjà faites (évite de re-HMAC un QR de kiosque très scanné)
+#  - nonces consommés (un même QR ne peut pas être rejoué dans son TTL)
+# Backend mémoire par défaut (par processus) ; Redis si QR_NONCE_BACKEND=redis
+# pour partager l'état entre workers.
+from __future__ import annotations
+
+import heapq
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from flask import Flask, current_app
+
+EXT_KEY = "qr_nonce_store"
+
+
+class NonceStoreFull(RuntimeError):
+    """Table des nonces pleine de nonces encore valides : capacité, pas rejeu."""
+
+
+class MemoryStore:
+    """
+    Vérifications : LRU borné, chaque entrée porte son échéance (time.time()).
+    Nonces consommés : table à part, purgée uniquement à expiration. Pleine,
+    elle refuse les nouveaux nonces (NonceStoreFull) plutôt que d'oublier un
+    QR déjà utilisé.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max(1, max_entries)
+        self._data: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._nonces: Dict[str, Tuple[float, str]] = {}
+        self._expiry: List[Tuple[float, str]] = []  # tas (échéance, clé) des nonces
+        self._lock = threading.Lock()
+
+    def _evict(self, now: float) -> None:
+        # Les plus anciennes en tête : on purge les expirées puis on borne la taille
+        while self._data:
+            key, (expires, _) = next(iter(self._data.items()))
+            if expires > now and len(self._data) <= self.max_entries:
+                break
+            self._data.popitem(last=False)
+
+    def _purge_nonces(self, now: float) -> None:
+        while self._expiry and self._expiry[0][0] <= now:
+            expires, key = heapq.heappop(self._expiry)
+            hit = self._nonces.get(key)
+            if hit is not None and hit[0] == expires:
+                del self._nonces[key]
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            hit = self._nonces.get(key)
+            if hit is not None:
+                return hit[1] if hit[0] > now else None
+            hit = self._data.get(key)
+            if hit is None:
+                return None
+            if hit[0] <= now:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return hit[1]
+
+    def set(self, key: str, value: str, ttl: int) -> None:
+        now = time.time()
+        with self._lock:
+            self._data[key] = (now + max(1, ttl), value)
+            self._data.move_to_end(key)
+            self._evict(now)
+
+    def add(self, key: str, value: str, ttl: int) -> bool:
+        """
+        Pose le nonce si absent (ou expiré). False s'il existait déjà ;
+        NonceStoreFull si la table est pleine de nonces encore valides.
+        """
+        now = time.time()
+        with self._lock:
+            self._purge_nonces(now)
+            if key in self._nonces:
+                return False
+            if len(self._nonces) >= self.max_entries:
+                raise NonceStoreFull(f"{len(self._nonces)} nonces QR encore valides")
+            expires = now + max(1, ttl)
+            self._nonces[key] = (expires, value)
+            heapq.heappush(self._expiry, (expires, key))
+            return True
+
+    def __len__(self) -> int:
+        return len(self._data) + len(self._nonces)
+
+
+class RedisStore:
+    """Même interface, partagée entre workers (SET NX EX pour les nonces)."""
+
+    def __init__(self, url: str, prefix: str = "rh:qr:"):
+        import redis  # dépendance optionnelle
+
+        self._r = redis.Redis.from_url(url, decode_responses=True)
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[str]:
+        return self._r.get(self.prefix + key)
+
+    def set(self, key: str, value: str, ttl: int) -> None:
+        self._r.set(self.prefix + key, value, ex=max(1, ttl))
+
+    def add(self, key: str, value: str, ttl: int) -> bool:
+        return bool(self._r.set(self.prefix + key, value, ex=max(1, ttl), nx=True))
+
+
+# -------------------------------
+# Intégration Flask
+# -------------------------------
+def init_app(app: Flask) -> None:
+    store = None
+    if (app.config.get("QR_NONCE_BACKEND") or "memory").lower() == "redis":
+        try:
+            store = RedisStore(app.config["QR_NONCE_REDIS_URL"])
+        except Exception as e:
+            app.logger.warning("Nonces QR : Redis indisponible (%s), repli en mémoire.", e)
+    if store is None:
+        store = MemoryStore(int(app.config.get("QR_NONCE_MAX_ENTRIES", 10000)))
+    app.extensions[EXT_KEY] = store
+
+
+def get_store():
+    store = current_app.extensions.get(EXT_KEY)
+    if store is None:
+        init_app(current_app)
+        store = current_app.extensions[EXT_KEY]
+    return store
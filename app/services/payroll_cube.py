@@ -0,0 +1,366 @@
+# app/services/payroll_cube.py
+# Cube des coûts salariaux (payroll_costs) : une ligne par département et
+# par mois, matérialisée depuis les pointages / heures sup / congés.
+#  - écriture committée sur une table source : les lignes ouvertes des mois
+#    écrits passent en « stale » dans la même transaction (comme
+#    score_snapshots ; changement de taux ou de département : tous les mois) ;
+#  - `flask payroll refresh-stale` (tâche planifiée) les rematérialise ;
+#  - `flask payroll freeze` fige un mois (frozen_at), jamais réécrit ensuite.
+# Les lectures (department_costs, rapport PDF, export CSV, /costs) passent par
+# read() : aucune écriture, calcul en direct pour les lignes absentes ou périmées.
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Dict, List, Set, Tuple
+
+from flask import current_app
+from sqlalchemy import and_, event, func, inspect as sa_inspect, or_, select, update
+from sqlalchemy.orm import Session
+
+from ..extensions import db
+from ..models.attendance import Attendance
+from ..models.department import Department
+from ..models.enums import LeaveStatus, RequestStatus
+from ..models.leave import Leave
+from ..models.overtime import Overtime
+from ..models.payroll_cost import PayrollCost
+from ..models.user import User
+from ..models.user_hourly_rate import UserHourlyRate
+from . import calendar_service, data_version, rate_history, score_snapshots
+from .rate_history import rate_expr, rate_on
+from .sql_compat import upsert_insert
+from .timeseries_service import month_bounds
+
+_PENDING = "payroll_cube_pending"
+SOURCE_TABLES = ("attendances", "overtimes", "leaves", "users", "departments", "user_hourly_rates")
+ALL_MONTHS = "*"
+# Colonnes dont dépendent les coûts. Tables datées : seuls les mois écrits
+# deviennent périmés ; rattachement et taux : tous les mois ouverts
+# (ensemble vide = toute écriture compte).
+_DATED = {
+    "attendances": {"user_id", "work_date", "total_hours"},
+    "overtimes": {"user_id", "work_date", "hours", "status"},
+    "leaves": {"user_id", "start_date", "end_date", "status"},
+}
+_GLOBAL = {"users": {"department_id", "hourly_rate"}, "departments": set(), "user_hourly_rates": set()}
+
+
+def _money(v) -> Decimal:
+    return Decimal(str(round(float(v or 0.0), 2)))
+
+
+# -------------------------------
+# Calcul (3 requêtes groupées, quel que soit l'effectif)
+# -------------------------------
+def compute(ym: str) -> Dict[int, Dict[str, Decimal]]:
+    """{department_id: {base_salary, overtime_cost, leave_cost}} pour le mois."""
+    start, stop = month_bounds(ym)
+    cfg = current_app.config
+    ot_factor = float(cfg.get("OVERTIME_MULTIPLIER", 1.25))
+    leave_day_h = float(cfg.get("PAYROLL_LEAVE_DAY_HOURS", 8.0))
+
+    # Taux valable le jour travaillé (jointure par intervalle sur user_hourly_rates)
+    base = dict(db.session.execute(
+        select(User.department_id, func.sum(func.coalesce(Attendance.total_hours, 0.0) * rate_expr()))
+        .select_from(Attendance).join(User, User.id == Attendance.user_id)
+        .outerjoin(UserHourlyRate, rate_on(Attendance.user_id, Attendance.work_date))
+        .where(Attendance.work_date >= start, Attendance.work_date < stop, User.department_id.isnot(None))
+        .group_by(User.department_id)
+    ).all())
+    overtime = dict(db.session.execute(
+        select(User.department_id, func.sum(Overtime.hours * rate_expr()))
+        .select_from(Overtime).join(User, User.id == Overtime.user_id)
+        .outerjoin(UserHourlyRate, rate_on(Overtime.user_id, Overtime.work_date))
+        .where(Overtime.work_date >= start, Overtime.work_date < stop,
+               Overtime.status == RequestStatus.APPROVED, User.department_id.isnot(None))
+        .group_by(User.department_id)
+    ).all())
+    # Congés payés : jours ouvrés du mois couverts × heures/jour × taux de
+    # chaque jour (découpage sur les intervalles de taux)
+    cal = calendar_service.get_calendar()
+    leave: Dict[int, float] = defaultdict(float)
+    last = stop - timedelta(days=1)
+    leaves = db.session.execute(
+        select(Leave.user_id, User.department_id, User.hourly_rate, Leave.start_date, Leave.end_date)
+        .select_from(Leave).join(User, User.id == Leave.user_id)
+        .where(Leave.status == LeaveStatus.APPROVED, Leave.start_date < stop, Leave.end_date >= start,
+               User.department_id.isnot(None))
+    ).all()
+    rates = rate_history.intervals({uid for uid, *_ in leaves})
+    for uid, dep, current, d0, d1 in leaves:
+        d0, d1 = max(d0, start), min(d1, last)
+        for r0, r1, rate in rates.get(uid) or [(d0, None, current or 0.0)]:
+            a, b = max(d0, r0), d1 if r1 is None else min(d1, r1 - timedelta(days=1))
+            leave[dep] += cal.count(a, b) * leave_day_h * float(rate or 0.0)
+
+    deps = db.session.execute(select(Department.id)).scalars()
+    return {
+        dep: {
+            "base_salary": _money(base.get(dep)),
+            "overtime_cost": _money((overtime.get(dep) or 0.0) * ot_factor),
+            "leave_cost": _money(leave.get(dep)),
+        }
+        for dep in deps
+    }
+
+
+def materialize(ym: str, freeze: bool = False, commit: bool = True) -> int:
+    """
+    Écrit le mois dans payroll_costs (lignes figées laissées intactes).
+    Retourne le nombre de départements écrits.
+    """
+    y, m = map(int, ym.split("-"))
+    values = compute(ym)
+    now = datetime.utcnow()
+    rows = [
+        {"department_id": dep, "year": y, "month": m, **costs,
+         "currency": current_app.config.get("PAYROLL_CURRENCY", "XOF"),
+         "created_at": now, "frozen_at": now if freeze else None, "stale_since": None}
+        for dep, costs in values.items()
+    ]
+    if rows:
+        ins = upsert_insert(PayrollCost)
+        if ins is not None:
+            ex = ins.excluded
+            db.session.execute(
+                ins.on_conflict_do_update(
+                    index_elements=["department_id", "year", "month"],
+                    set_={"base_salary": ex.base_salary, "overtime_cost": ex.overtime_cost,
+                          "leave_cost": ex.leave_cost, "currency": ex.currency,
+                          "frozen_at": ex.frozen_at, "stale_since": ex.stale_since},
+                    where=PayrollCost.__table__.c.frozen_at.is_(None),
+                ),
+                rows,
+            )
+        else:
+            _merge_orm(y, m, rows)
+    if commit:
+        db.session.commit()
+    return len(rows)
+
+
+def _merge_orm(y: int, m: int, rows: List[dict]) -> None:
+    """Chemin générique (dialectes sans ON CONFLICT)."""
+    existing = {
+        pc.department_id: pc for pc in db.session.execute(
+            select(PayrollCost).where(PayrollCost.year == y, PayrollCost.month == m)
+        ).scalars()
+    }
+    for r in rows:
+        pc = existing.get(r["department_id"])
+        if pc is None:
+            db.session.add(PayrollCost(**r))
+        elif pc.frozen_at is None:
+            for k in ("base_salary", "overtime_cost", "leave_cost", "currency", "frozen_at", "stale_since"):
+                setattr(pc, k, r[k])
+    db.session.flush()
+
+
+def freeze(ym: str, commit: bool = True) -> int:
+    """Matérialise une dernière fois puis fige le mois."""
+    return materialize(ym, freeze=True, commit=commit)
+
+
+def unfreeze(ym: str, commit: bool = True) -> None:
+    """Rouvre le mois ; lu en direct jusqu'à sa rematérialisation."""
+    y, m = map(int, ym.split("-"))
+    db.session.execute(
+        update(PayrollCost).where(PayrollCost.year == y, PayrollCost.month == m)
+        .values(frozen_at=None, stale_since=datetime.utcnow())
+    )
+    if commit:
+        db.session.commit()
+
+
+def stale_months() -> List[str]:
+    rows = db.session.execute(
+        select(PayrollCost.year, PayrollCost.month).distinct()
+        .where(PayrollCost.stale_since.isnot(None), PayrollCost.frozen_at.is_(None))
+        .order_by(PayrollCost.year, PayrollCost.month)
+    ).all()
+    return [f"{y:04d}-{m:02d}" for y, m in rows]
+
+
+def refresh_stale() -> List[str]:
+    """Rematérialise les mois périmés (un COMMIT par mois)."""
+    months = stale_months()
+    for ym in months:
+        materialize(ym)
+    return months
+
+
+# -------------------------------
+# Péremption sur le chemin d'écriture (événements de session)
+# -------------------------------
+def mark_stale(*months: str, session: Session | None = None) -> None:
+    """
+    Écritures hors événements ORM (SQL brut, autre connexion, instruction Core
+    sans paramètres) : péremption explicite des mois donnés, de tous les mois
+    ouverts sans argument.
+    """
+    _stale(session or db.session, set(months) or {ALL_MONTHS})
+
+
+def _stale(session: Session, months: Set[str]) -> None:
+    # Mois ouverts seulement ; une ligne déjà périmée n'est pas réécrite
+    q = (update(PayrollCost.__table__)
+         .where(PayrollCost.frozen_at.is_(None), PayrollCost.stale_since.is_(None)))
+    if ALL_MONTHS not in months:
+        ym = [tuple(map(int, m.split("-"))) for m in sorted(months)]
+        q = q.where(or_(*(and_(PayrollCost.year == y, PayrollCost.month == m) for y, m in ym)))
+    res = session.connection().execute(q.values(stale_since=datetime.utcnow()))
+    if res.rowcount:
+        data_version.touch_on_commit(session, PayrollCost.__tablename__)
+
+
+def _pending(session: Session) -> Set[str]:
+    return session.info.setdefault(_PENDING, set())
+
+
+def _months_of_object(obj, changed_only: bool) -> Set[str]:
+    state = sa_inspect(obj)
+    name = getattr(state.mapper.local_table, "name", None)
+    if name in _DATED:
+        return score_snapshots.months_of_object(obj, changed_only, _DATED)
+    cols = _GLOBAL.get(name)
+    if cols is None:
+        return set()
+    if not (cols and changed_only) or any(state.attrs[c].history.has_changes() for c in cols):
+        return {ALL_MONTHS}
+    return set()
+
+
+def _after_flush(session: Session, flush_context) -> None:
+    months = session.info.pop(_PENDING, set())
+    for obj in session.new:
+        # Salarié·e créé·e : aucun coût tant qu'aucun pointage n'existe
+        if not isinstance(obj, User):
+            months |= _months_of_object(obj, changed_only=False)
+    for obj in session.deleted:
+        months |= _months_of_object(obj, changed_only=False)
+    for obj in session.dirty:
+        months |= _months_of_object(obj, changed_only=True)
+    if months:
+        _stale(session, months)
+
+
+def _collect_execute(state) -> None:
+    if not (state.is_insert or state.is_update or state.is_delete):
+        return
+    name = getattr(getattr(state.statement, "table", None), "name", None)
+    if name not in _DATED and name not in _GLOBAL:
+        return
+    params = state.parameters
+    values = params if isinstance(params, list) else [params or {}]
+    cols = _DATED.get(name) or _GLOBAL.get(name)
+    if state.is_update and cols and not any(cols & set(v) for v in values):
+        return
+    if name in _DATED:
+        months = score_snapshots.months_of_values(values)
+        if months:
+            _pending(state.session).update(months)
+        elif not state.is_insert:
+            # UPDATE / DELETE sans date connue : prudence, tous les mois ouverts
+            # (un INSERT Core sans paramètres appelle mark_stale, cf. upsert_punch)
+            _pending(state.session).add(ALL_MONTHS)
+        return
+    if name != "users" or not state.is_insert:
+        _pending(state.session).add(ALL_MONTHS)
+
+
+def _before_commit(session: Session) -> None:
+    months = session.info.pop(_PENDING, None)
+    if months:
+        _stale(session, months)
+
+
+def _after_rollback(session: Session) -> None:
+    session.info.pop(_PENDING, None)
+
+
+event.listen(Session, "after_flush", _after_flush)
+event.listen(Session, "do_orm_execute", _collect_execute)
+# insert=True : avant data_version._before_commit (incréments dans la même transaction)
+event.listen(Session, "before_commit", _before_commit, insert=True)
+event.listen(Session, "after_rollback", _after_rollback)
+
+
+# -------------------------------
+# Lecture (sans écriture)
+# -------------------------------
+def _fresh(pc: PayrollCost | None) -> bool:
+    return pc is not None and (pc.frozen_at is not None or pc.stale_since is None)
+
+
+def _parts(pc: PayrollCost | None, live: Dict[int, Dict[str, Decimal]], dep_id: int) -> Tuple[float, ...]:
+    """(salaire de base, heures sup, congés, avantages) : ligne du cube si à jour, sinon calcul direct."""
+    if _fresh(pc):
+        base, ot, lv = float(pc.base_salary), float(pc.overtime_cost), float(pc.leave_cost)
+    else:
+        c = live.get(dep_id, {})
+        base, ot, lv = (float(c.get(k, 0)) for k in ("base_salary", "overtime_cost", "leave_cost"))
+    return base, ot, lv, float(pc.benefits_cost or 0.0) if pc is not None else 0.0
+
+
+def read(ym: str) -> List[dict]:
+    """
+    Coûts du mois par département (tous les départements, par nom) : lignes
+    du cube à jour, calcul direct (compute) pour les lignes absentes ou
+    périmées. N'écrit jamais.
+    """
+    y, m = map(int, ym.split("-"))
+    rows = db.session.execute(
+        select(Department.id, Department.name, PayrollCost)
+        .outerjoin(PayrollCost, and_(PayrollCost.department_id == Department.id,
+                                     PayrollCost.year == y, PayrollCost.month == m))
+        .order_by(Department.name.asc())
+    ).all()
+    live = compute(ym) if not all(_fresh(pc) for _, _, pc in rows) else {}
+    currency = current_app.config.get("PAYROLL_CURRENCY", "XOF")
+    out = []
+    for dep_id, name, pc in rows:
+        base, ot, lv, benefits = _parts(pc, live, dep_id)
+        out.append({
+            "department_id": dep_id,
+            "department": name,
+            "cost": round(base + ot + lv + benefits, 2),
+            "base_salary": base,
+            "overtime_cost": ot,
+            "leave_cost": lv,
+            "currency": pc.currency if pc is not None else currency,
+            "frozen": bool(pc is not None and pc.frozen_at is not None),
+        })
+    return out
+
+
+def month_totals(months: List[str], dep_ids: List[int]) -> Dict[Tuple[str, int], float]:
+    """
+    Coût total {(mois, department_id): coût} sur plusieurs mois : une requête
+    sur le cube, calcul direct des seuls mois dont une ligne est absente ou
+    périmée. N'écrit jamais.
+    """
+    keys = sorted(tuple(map(int, ym.split("-"))) for ym in months)
+    if not keys or not dep_ids:
+        return {}
+    (y0, m0), (y1, m1) = keys[0], keys[-1]
+    # Bornes explicites sur (year, month) : l'index ix_payroll_costs_year_month
+    # reste utilisable (une expression year * 100 + month ne l'est pas)
+    cube = {
+        (f"{pc.year:04d}-{pc.month:02d}", pc.department_id): pc
+        for pc in db.session.execute(
+            select(PayrollCost).where(
+                PayrollCost.year.between(y0, y1),
+                or_(PayrollCost.year > y0, PayrollCost.month >= m0),
+                or_(PayrollCost.year < y1, PayrollCost.month <= m1),
+            )
+        ).scalars()
+    }
+    out: Dict[Tuple[str, int], float] = {}
+    for ym in months:
+        pcs = {dep: cube.get((ym, dep)) for dep in dep_ids}
+        live = compute(ym) if not all(_fresh(pc) for pc in pcs.values()) else {}
+        for dep, pc in pcs.items():
+            out[(ym, dep)] = round(sum(_parts(pc, live, dep)), 2)
+    return out
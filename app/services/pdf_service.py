@@ -11,13 +11,14 @@ from reportlab.pdfbase.ttfonts import TTFont
 
 from ..extensions import db
 from ..models.user import User
-from ..models.attendance import Attendance
 from ..models.overtime import Overtime
 from ..models.leave import Leave
 from ..models.enums import RequestStatus, LeaveStatus
 from ..services.cost_service import department_costs
 from ..services.award_service import compute_month_scores
 from ..services.award_service import month_range
+from ..services.rollup_service import range_totals
+from ..services.calendar_service import get_calendar
 
 def _register_font():
     try:
@@ -98,21 +99,11 @@ def build_month_report(ym: str) -> bytes:
 
     # KPIs rapides
     users_cnt = db.session.query(User).filter(User.is_active==True).count()
-    presences = db.session.query(Attendance).filter(Attendance.work_date>=start, Attendance.work_date<=end, Attendance.check_in.isnot(None)).count()
-    total_hours = db.session.query(db.func.sum(Attendance.total_hours)).filter(Attendance.work_date>=start, Attendance.work_date<=end).scalar() or 0
+    presences, total_hours = range_totals(start, end)  # rollup journalier
     ot_hours = db.session.query(db.func.sum(Overtime.hours)).filter(Overtime.work_date>=start, Overtime.work_date<=end, Overtime.status==RequestStatus.APPROVED).scalar() or 0
-    leave_days = 0
-    leaves = db.session.query(Leave).filter(Leave.start_date<=end, Leave.end_date>=start, Leave.status==LeaveStatus.APPROVED).all()
-    from datetime import timedelta
-    import math
-    for l in leaves:
-        d0 = max(l.start_date, start)
-        d1 = min(l.end_date, end)
-        cur = d0
-        while cur <= d1:
-            if cur.weekday() < 5:
-                leave_days += 1
-            cur += timedelta(days=1)
+    cal = get_calendar()
+    leaves = db.session.query(Leave.start_date, Leave.end_date).filter(Leave.start_date<=end, Leave.end_date>=start, Leave.status==LeaveStatus.APPROVED).all()
+    leave_days = sum(cal.count(max(d0, start), min(d1, end)) for d0, d1 in leaves)
 
     _para(c, f"Employés actifs: {users_cnt}", 20, 264, font_name, 11)
     _para(c, f"Pointages (check-in): {presences}", 20, 256, font_name, 11)
@@ -0,0 +1,208 @@
+# app/services/punch_buffer.py
+# Group commit des pointages (optionnel, PUNCH_BUFFER_ENABLED=1).
+# Les requêtes déposent leur pointage dans un tampon en mémoire ; un thread
+# unique l'écrit par lots (une transaction, un fsync) toutes les
+# PUNCH_BUFFER_WINDOW_MS ms ou dès PUNCH_BUFFER_MAX_BATCH pointages.
+# Chaque requête attend le COMMIT de son lot avant de répondre.
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional
+
+from flask import Flask, current_app
+
+from ..extensions import db
+from .attendance_service import upsert_punch, work_date_of
+from .geofence import check_punch
+
+EXT_KEY = "punch_buffer"
+
+
+class PunchTimeout(RuntimeError):
+    """Le lot n'a pas été validé dans le délai imparti (PUNCH_BUFFER_TIMEOUT_S)."""
+
+
+class _Pending:
+    __slots__ = ("args", "enqueued", "done", "result", "error")
+
+    def __init__(self, args: tuple):
+        self.args = args
+        self.enqueued = time.monotonic()
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class PunchBuffer:
+    def __init__(self, app: Flask, window_ms: int = 5, max_batch: int = 200,
+                 timeout_s: float = 5.0, metrics: bool = True):
+        self.app = app
+        self.window = max(0, window_ms) / 1000.0
+        self.max_batch = max(1, max_batch)
+        self.timeout_s = timeout_s
+        self.metrics_enabled = metrics
+
+        self._queue: Deque[_Pending] = deque()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+        # Métriques
+        self._batches = 0
+        self._punches = 0
+        self._fallbacks = 0
+        self._max_batch_seen = 0
+        self._latencies_ms: Deque[float] = deque(maxlen=2048)
+
+    # -------------------------------
+    # Côté requête
+    # -------------------------------
+    def submit(self, user_id: int, action: str, lat, lon, source: str = "manual"):
+        # Horodatage pris à la réception, pas au moment du flush
+        now = datetime.utcnow()
+        item = _Pending((user_id, action, now, work_date_of(now), lat, lon, source))
+        with self._cond:
+            self._ensure_thread()
+            self._queue.append(item)
+            if len(self._queue) >= self.max_batch or len(self._queue) == 1:
+                self._cond.notify()
+        if not item.done.wait(self.timeout_s):
+            raise PunchTimeout("Pointage non confirmé dans le délai imparti.")
+        if item.error is not None:
+            raise item.error
+        return item.result
+
+    # -------------------------------
+    # Côté writer
+    # -------------------------------
+    def _ensure_thread(self) -> None:
+        # Démarrage paresseux : compatible fork (gunicorn --preload)
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="punch-buffer", daemon=True)
+            self._thread.start()
+
+    def _next_batch(self) -> List[_Pending]:
+        with self._cond:
+            while not self._queue:
+                self._cond.wait()
+            deadline = self._queue[0].enqueued + self.window
+            while len(self._queue) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            n = min(len(self._queue), self.max_batch)
+            return [self._queue.popleft() for _ in range(n)]
+
+    def _run(self) -> None:
+        while True:
+            batch: List[_Pending] = []
+            try:
+                batch = self._next_batch()
+                with self.app.app_context():
+                    try:
+                        self._flush(batch)
+                    finally:
+                        db.session.remove()
+            except Exception as e:
+                # Le writer survit : les pointages non confirmés du lot échouent
+                # tout de suite au lieu d'attendre PunchTimeout
+                self.app.logger.exception("punch-buffer: writer en échec (lot de %d)", len(batch))
+                self._fail(batch, e)
+
+    def _fail(self, batch: List[_Pending], error: BaseException) -> None:
+        for it in batch:
+            if not it.done.is_set():
+                it.error = error
+                it.done.set()
+
+    def _flush(self, batch: List[_Pending]) -> None:
+        try:
+            results = [upsert_punch(*it.args, commit=False) for it in batch]
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            current_app.logger.exception("punch-buffer: lot de %d en échec, reprise unitaire", len(batch))
+            self._fallbacks += 1
+            for it in batch:
+                try:
+                    it.result = upsert_punch(*it.args, commit=True)
+                except Exception as e:  # le pointage fautif n'entraîne pas les autres
+                    db.session.rollback()
+                    it.error = e
+                self._ack(it)
+        else:
+            for it, res in zip(batch, results):
+                it.result = res
+                self._ack(it)
+        self._batches += 1
+        self._punches += len(batch)
+        self._max_batch_seen = max(self._max_batch_seen, len(batch))
+
+    def _ack(self, it: _Pending) -> None:
+        if self.metrics_enabled:
+            self._latencies_ms.append((time.monotonic() - it.enqueued) * 1000.0)
+        it.done.set()
+
+    # -------------------------------
+    # Métriques
+    # -------------------------------
+    def stats(self) -> Dict[str, Any]:
+        lat = sorted(self._latencies_ms)
+
+        def pct(p: float) -> Optional[float]:
+            if not lat:
+                return None
+            return round(lat[min(len(lat) - 1, int(p * len(lat)))], 2)
+
+        return {
+            "enabled": True,
+            "window_ms": round(self.window * 1000.0, 2),
+            "max_batch": self.max_batch,
+            "queued": len(self._queue),
+            "batches": self._batches,
+            "punches": self._punches,
+            "avg_batch": round(self._punches / self._batches, 2) if self._batches else 0.0,
+            "max_batch_seen": self._max_batch_seen,
+            "fallbacks": self._fallbacks,
+            "latency_ms": {"p50": pct(0.50), "p95": pct(0.95), "p99": pct(0.99)} if self.metrics_enabled else None,
+        }
+
+
+# -------------------------------
+# Intégration Flask
+# -------------------------------
+def init_app(app: Flask) -> None:
+    if not app.config.get("PUNCH_BUFFER_ENABLED"):
+        return
+    app.extensions[EXT_KEY] = PunchBuffer(
+        app,
+        window_ms=int(app.config.get("PUNCH_BUFFER_WINDOW_MS", 5)),
+        max_batch=int(app.config.get("PUNCH_BUFFER_MAX_BATCH", 200)),
+        timeout_s=float(app.config.get("PUNCH_BUFFER_TIMEOUT_S", 5.0)),
+        metrics=bool(app.config.get("PUNCH_BUFFER_METRICS", True)),
+    )
+
+
+def get_buffer() -> Optional[PunchBuffer]:
+    return current_app.extensions.get(EXT_KEY)
+
+
+def record_punch(user_id: int, action: str, lat, lon, source: str = "manual"):
+    """
+    Point d'entrée des routes : tampon si activé, sinon UPSERT + commit immédiat.
+    Lève GeofenceViolation (GEOFENCE_MODE=enforce) avant toute écriture.
+    """
+    check_punch(lat, lon)
+    buf = get_buffer()
+    if buf is not None:
+        return buf.submit(user_id, action, lat, lon, source)
+    now = datetime.utcnow()
+    return upsert_punch(user_id, action, now, work_date_of(now), lat, lon, source)
+
+
+def buffer_stats() -> Dict[str, Any]:
+    buf = get_buffer()
+    return buf.stats() if buf is not None else {"enabled": False}
@@ -0,0 +1,180 @@
+# app/services/punch_sync.py
+# Synchronisation en masse des pointages hors-ligne (kiosques / mobiles).
+from __future__ import annotations
+
+import calendar
+from collections import defaultdict
+from datetime import datetime, date, timedelta, timezone
+from typing import Any, Dict, List, Tuple
+
+from flask import current_app
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+from ..extensions import db
+from ..models.attendance import Attendance
+from . import rollup_service
+from .attendance_service import compute_late_minutes, compute_total_hours, work_date_of
+from .geofence import GeofenceViolation, check_punch
+from .nonce_store import NonceStoreFull
+from .security import action_allowed, consume_token, verify_token
+
+ACTIONS = ("checkin", "checkout")
+
+
+class SyncError(ValueError):
+    """Pointage rejeté (message renvoyé tel quel dans le résultat)."""
+
+
+def _epoch(at: datetime) -> int:
+    return calendar.timegm(at.timetuple())
+
+
+def _parse_at(value: Any) -> datetime:
+    """ISO 8601 -> datetime UTC naïf (même convention que datetime.utcnow())."""
+    if not value:
+        raise SyncError("horodatage manquant")
+    try:
+        dt = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        raise SyncError(f"horodatage invalide: {value!r}")
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+
+def _validate(item: Any, now: datetime, max_age: timedelta, skew: timedelta) -> Tuple[str, datetime, dict]:
+    if not isinstance(item, dict):
+        raise SyncError("élément invalide")
+    action = item.get("action")
+    if action not in ACTIONS:
+        raise SyncError("action invalide")
+    at = _parse_at(item.get("at"))
+    if at > now + skew:
+        raise SyncError("horodatage dans le futur")
+    if at < now - max_age:
+        raise SyncError("pointage trop ancien")
+    token = item.get("token")
+    if not token:
+        raise SyncError("QR requis")
+    # Le QR doit être valide au moment du pointage, pas de la synchro
+    try:
+        ok = verify_token(str(token), now=_epoch(at))
+    except (ValueError, TypeError):
+        ok = False
+    if not ok:
+        raise SyncError("QR invalide ou expiré")
+    if not action_allowed(str(token), action):
+        raise SyncError("QR émis pour une autre action")
+    lat, lon = item.get("lat"), item.get("lon")
+    try:
+        site_id, status = check_punch(lat, lon)
+    except GeofenceViolation as e:
+        raise SyncError(str(e))
+    return action, at, {"token": str(token), "lat": lat, "lon": lon, "site_id": site_id, "geo_status": status}
+
+
+def sync_punches(user_id: int, items: List[Any]) -> Dict[str, Any]:
+    """
+    Valide, dédoublonne et applique un lot de pointages hors-ligne.
+    Une requête pour charger les lignes Attendance concernées, un COMMIT pour le lot.
+    Retourne {"applied": n, "results": [{index, id, status, error?}, ...]}
+    (status : applied / merged / duplicate / replayed / unavailable / rejected ;
+    unavailable = table des nonces QR saturée, à renvoyer plus tard).
+    """
+    cfg = current_app.config
+    now = datetime.utcnow()
+    max_age = timedelta(days=int(cfg.get("PUNCH_SYNC_MAX_AGE_DAYS", 7)))
+    skew = timedelta(seconds=int(cfg.get("PUNCH_SYNC_MAX_SKEW_S", 300)))
+
+    results: List[Dict[str, Any]] = []
+    accepted: List[Tuple[int, str, datetime, dict]] = []
+    seen: set = set()
+
+    # 1) Validation + dédoublonnage en une passe
+    for i, item in enumerate(items):
+        res: Dict[str, Any] = {"index": i, "id": item.get("id") if isinstance(item, dict) else None}
+        results.append(res)
+        try:
+            action, at, geo = _validate(item, now, max_age, skew)
+        except SyncError as e:
+            res.update(status="rejected", error=str(e))
+            continue
+        key = (action, at)
+        if key in seen or (res["id"] is not None and ("id", res["id"]) in seen):
+            res["status"] = "duplicate"
+            continue
+        seen.add(key)
+        if res["id"] is not None:
+            seen.add(("id", res["id"]))
+        # Même portée que /attendance/punch : un QR ne sert qu'une fois, en ligne ou en lot
+        try:
+            fresh = consume_token(geo["token"], scope=f"{user_id}:{action}", now=_epoch(at))
+        except NonceStoreFull:
+            res.update(status="unavailable", error="Pointage momentanément indisponible, réessayez.")
+            continue
+        if not fresh:
+            res.update(status="replayed", error="QR déjà utilisé")
+            continue
+        accepted.append((i, action, at, geo))
+
+    if not accepted:
+        return {"applied": 0, "results": results}
+
+    try:
+        applied = _apply(user_id, accepted, results)
+    except IntegrityError:
+        # Pointage en ligne concurrent sur une même journée : on recharge et on refusionne
+        db.session.rollback()
+        applied = _apply(user_id, accepted, results)
+    return {"applied": applied, "results": results}
+
+
+def _apply(user_id: int, accepted: List[Tuple[int, str, datetime, dict]],
+           results: List[Dict[str, Any]]) -> int:
+    # 2) Une requête pour toutes les journées concernées
+    days = sorted({work_date_of(at) for _, _, at, _ in accepted})
+    rows: Dict[date, Attendance] = {
+        a.work_date: a
+        for a in db.session.execute(
+            select(Attendance).where(Attendance.user_id == user_id, Attendance.work_date.in_(days))
+        ).scalars()
+    }
+
+    # 3) Fusion (même règle que l'UPSERT : check-in le plus tôt, check-out le plus tard)
+    checkins: Dict[date, int] = defaultdict(int)
+    applied = 0
+    for i, action, at, geo in sorted(accepted, key=lambda t: t[2]):
+        day = work_date_of(at)
+        att = rows.get(day)
+        if att is None:
+            att = rows[day] = Attendance(user_id=user_id, work_date=day)
+            db.session.add(att)
+        changed = False
+        if att.check_in is None or (action == "checkin" and at < att.check_in):
+            att.check_in = at
+            att.late_minutes = compute_late_minutes(at)
+            changed = True
+        if action == "checkout" and (att.check_out is None or at > att.check_out):
+            att.check_out = at
+            changed = True
+        if changed:
+            att.total_hours = compute_total_hours(att.check_in, att.check_out)
+            att.latitude = geo["lat"]
+            att.longitude = geo["lon"]
+            att.site_id = geo["site_id"]
+            att.geo_status = geo["geo_status"]
+            att.source = "qr"
+            applied += 1
+        if action == "checkin":
+            checkins[day] += 1
+        results[i]["status"] = "applied" if changed else "merged"
+
+    db.session.flush()
+    for i, _action, at, _geo in accepted:
+        results[i]["attendance_id"] = rows[work_date_of(at)].id  # avant le COMMIT (pas de rechargement)
+    dep = rollup_service.department_of(user_id)
+    for day in days:
+        rollup_service.refresh_day(day, dep, checkins=checkins[day])
+    db.session.commit()
+    return applied
@@ -0,0 +1,99 @@
+# app/services/qr_render.py
+# Rendu des QR de pointage par tranche de temps.
+# Tous les appels d'une même tranche signent le même jeton (ts = début de
+# tranche) : l'image est donc identique, rendue une fois et gardée en LRU.
+# Les réponses portent un ETag stable sur la tranche (304 côté kiosque).
+from __future__ import annotations
+
+import hashlib
+import io
+import threading
+import time
+from functools import lru_cache
+from typing import Callable, Dict, Tuple
+
+import qrcode
+import qrcode.image.svg
+from flask import Response, current_app, request
+
+from .security import sign_token
+
+FORMATS = {"png": "image/png", "svg": "image/svg+xml"}
+
+
+def bucket_seconds() -> int:
+    return max(1, int(current_app.config.get("QR_BUCKET_SECONDS", 60)))
+
+
+def current_bucket(now: float | None = None) -> Tuple[int, int]:
+    """(début de la tranche courante, secondes restantes avant la suivante)."""
+    size = bucket_seconds()
+    now = int(time.time() if now is None else now)
+    start = now - now % size
+    return start, start + size - now
+
+
+@lru_cache(maxsize=512)
+def render(data: str, fmt: str = "png") -> bytes:
+    buf = io.BytesIO()
+    if fmt == "svg":
+        # Un seul <path> : le plus compact des rendus SVG de qrcode
+        qrcode.make(data, image_factory=qrcode.image.svg.SvgPathImage).save(buf)
+    else:
+        qrcode.make(data).save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def qr_response(data: str, fmt: str, max_age: int, private: bool = True) -> Response:
+    """Réponse image cacheable ; 304 si le client a déjà cette tranche."""
+    fmt = fmt if fmt in FORMATS else "png"
+    etag = hashlib.sha1(f"{fmt}|{data}".encode()).hexdigest()
+    if etag in request.if_none_match:
+        resp = Response(status=304)
+    else:
+        resp = Response(render(data, fmt), mimetype=FORMATS[fmt])
+    resp.set_etag(etag)
+    resp.cache_control.max_age = max(0, max_age)
+    if private:
+        resp.cache_control.private = True
+    else:
+        resp.cache_control.public = True
+    return resp
+
+
+def cache_info():
+    return render.cache_info()
+
+
+# -------------------------------
+# Jeton partagé des kiosques (flux SSE)
+# -------------------------------
+_shared: Dict[Tuple[str, int], dict] = {}
+_shared_lock = threading.Lock()
+
+
+def kiosk_payload(action: str, build_url: Callable[[str], str], now: float | None = None) -> dict:
+    """
+    Jeton de kiosque de la tranche courante, signé une seule fois par
+    (action, tranche) quel que soit le nombre de kiosques abonnés.
+    """
+    start, _ = current_bucket(now)
+    key = (action, start)
+    with _shared_lock:
+        hit = _shared.get(key)
+        if hit is None:
+            size = bucket_seconds()
+            ttl = int(current_app.config.get("QR_TOKEN_TTL", 120)) + size
+            token = sign_token(f"action:{action}|kiosk", ttl_seconds=ttl, ts=start)
+            hit = _shared[key] = {
+                "action": action,
+                "bucket": start,
+                "token": token,
+                "url": build_url(token),
+                "next_at": start + size,
+                "expires_at": start + ttl,
+            }
+            # On ne garde que la tranche courante
+            for k in [k for k in _shared if k[1] < start]:
+                del _shared[k]
+    return hit
@@ -2,9 +2,9 @@
 import hmac, time, hashlib, urllib.parse
 from flask import current_app
 
-def sign_url(path_with_query: str, ttl=60):
+def sign_url(path_with_query: str, ttl=60, exp: int | None = None):
     secret = current_app.config["SECRET_KEY"].encode()
-    exp = int(time.time()) + ttl
+    exp = int(time.time()) + ttl if exp is None else int(exp)
     payload = f"{path_with_query}|{exp}".encode()
     sig = hmac.new(secret, payload, hashlib.sha256).hexdigest()
     return f"{path_with_query}&exp={exp}&sig={sig}"
@@ -0,0 +1,111 @@
+# app/services/rate_history.py
+# Historique des taux horaires (user_hourly_rates).
+# Toute modification de User.hourly_rate par l'ORM ouvre un nouvel intervalle
+# à la date du jour (événement before_flush) ; set_rate() permet une date
+# d'effet explicite (augmentation rétroactive ou planifiée).
+# Les requêtes de coût joignent chaque ligne datée au taux valable ce jour-là
+# (rate_on / rate_expr) : un mois passé ne change plus quand le taux change.
+from __future__ import annotations
+
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, event, func, inspect as sa_inspect, or_, select
+from sqlalchemy.orm import Session
+
+from ..extensions import db
+from ..models.user import User
+from ..models.user_hourly_rate import UserHourlyRate
+
+EPOCH = date(1970, 1, 1)  # début du premier intervalle d'un·e salarié·e
+_HANDLED = "rate_history_handled"
+
+R = UserHourlyRate
+
+
+# -------------------------------
+# Jointure par intervalle
+# -------------------------------
+def rate_on(user_col, day_col):
+    """Condition de jointure vers le taux de `user_col` valable le jour `day_col`."""
+    return and_(R.user_id == user_col, R.valid_from <= day_col,
+                or_(R.valid_to.is_(None), day_col < R.valid_to))
+
+
+def rate_expr():
+    """Taux historisé, sinon taux courant (salarié·e sans historique)."""
+    return func.coalesce(R.rate, User.hourly_rate, 0.0)
+
+
+def intervals(user_ids) -> Dict[int, List[Tuple[date, Optional[date], float]]]:
+    """{user_id: [(valid_from, valid_to, taux), ...]} triés par date."""
+    out: Dict[int, List[Tuple[date, Optional[date], float]]] = {}
+    if not user_ids:
+        return out
+    for uid, d0, d1, rate in db.session.execute(
+        select(R.user_id, R.valid_from, R.valid_to, R.rate)
+        .where(R.user_id.in_(list(user_ids))).order_by(R.user_id, R.valid_from)
+    ):
+        out.setdefault(uid, []).append((d0, d1, rate))
+    return out
+
+
+# -------------------------------
+# Écriture
+# -------------------------------
+def _split(session: Session, user: User, rate: float, effective: date, previous: Optional[float]) -> None:
+    with session.no_autoflush:
+        rows = list(session.execute(
+            select(R).where(R.user_id == user.id).order_by(R.valid_from)
+        ).scalars())
+    if not rows:
+        if previous is not None and effective > EPOCH:
+            session.add(R(user=user, rate=previous, valid_from=EPOCH, valid_to=effective))
+        session.add(R(user=user, rate=rate, valid_from=effective if previous is not None else EPOCH))
+        return
+    current = next((r for r in rows if r.valid_from <= effective and (r.valid_to is None or effective < r.valid_to)), None)
+    if current is None:  # avant le premier intervalle
+        session.add(R(user=user, rate=rate, valid_from=effective, valid_to=rows[0].valid_from))
+    elif current.valid_from == effective:
+        current.rate = rate
+    else:
+        session.add(R(user=user, rate=rate, valid_from=effective, valid_to=current.valid_to))
+        current.valid_to = effective
+
+
+def set_rate(user: User, rate: float, effective: date | None = None) -> None:
+    """
+    Applique `rate` à partir de `effective` (aujourd'hui par défaut), jusqu'au
+    prochain changement déjà enregistré. Le taux courant de la fiche suit si
+    la date d'effet est passée. Pas de COMMIT.
+    """
+    effective = effective or date.today()
+    session = db.session
+    session.info.setdefault(_HANDLED, set()).add(user.id)
+    _split(session, user, float(rate), effective, user.hourly_rate)
+    if effective <= date.today():
+        with session.no_autoflush:
+            later = session.execute(
+                select(func.count()).select_from(R).where(R.user_id == user.id, R.valid_from > date.today())
+            ).scalar()
+        if not later:
+            user.hourly_rate = float(rate)
+
+
+def _before_flush(session: Session, flush_context, instances) -> None:
+    handled = session.info.pop(_HANDLED, set())
+    for obj in list(session.new):
+        if isinstance(obj, User):
+            rate = obj.hourly_rate
+            if rate is None:
+                rate = User.__table__.c.hourly_rate.default.arg
+            session.add(R(user=obj, rate=float(rate), valid_from=EPOCH))
+    for obj in list(session.dirty):
+        if not isinstance(obj, User) or obj.id in handled:
+            continue
+        hist = sa_inspect(obj).attrs.hourly_rate.history
+        if hist.added and hist.deleted and hist.added[0] != hist.deleted[0]:
+            _split(session, obj, float(hist.added[0]), date.today(), hist.deleted[0])
+
+
+event.listen(Session, "before_flush", _before_flush)
@@ -0,0 +1,156 @@
+# app/services/rollup_service.py
+from __future__ import annotations
+
+from datetime import date, datetime
+from typing import Optional, Tuple
+
+from sqlalchemy import func, select, delete, case, literal
+
+from ..extensions import db
+from ..models.attendance import Attendance
+from ..models.user import User
+from ..models.daily_attendance_stat import DailyAttendanceStat
+from .sql_compat import upsert_insert
+
+NO_DEPARTMENT = 0
+
+
+def department_of(user_id: int) -> int:
+    # current_user est déjà dans l'identity map : pas de requête en général
+    u = db.session.get(User, user_id)
+    return (u.department_id if u and u.department_id else NO_DEPARTMENT)
+
+
+# -------------------------------
+# Maintenance (même transaction que le pointage)
+# -------------------------------
+def refresh_day(work_date: date, department_id: int, checkins: int = 0) -> None:
+    """
+    Recalcule la ligne (jour, département) depuis `attendances` en une instruction
+    INSERT ... SELECT ... ON CONFLICT DO UPDATE ; ne fait PAS de commit.
+    Idempotent : utilisé après les pointages en UPSERT, dont l'état précédent n'est pas connu.
+    """
+    dep = func.coalesce(User.department_id, NO_DEPARTMENT)
+    now = datetime.utcnow()
+    agg = (
+        select(
+            literal(work_date, DailyAttendanceStat.work_date.type),
+            literal(department_id),
+            func.coalesce(func.sum(case((Attendance.check_in.isnot(None), 1), else_=0)), 0),
+            literal(checkins),
+            func.coalesce(func.sum(Attendance.total_hours), 0.0),
+            func.coalesce(func.sum(Attendance.late_minutes), 0.0),
+            literal(now, DailyAttendanceStat.updated_at.type),
+        )
+        .select_from(Attendance)
+        .join(User, User.id == Attendance.user_id)
+        .where(Attendance.work_date == work_date, dep == department_id)
+    )
+    cols = ["work_date", "department_id", "present_count", "checkin_count",
+            "total_hours", "late_minutes", "updated_at"]
+    T = DailyAttendanceStat.__table__
+    ins = upsert_insert(T)
+    if ins is not None:
+        stmt = ins.from_select(cols, agg)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[T.c.work_date, T.c.department_id],
+            set_={
+                "present_count": stmt.excluded.present_count,
+                "checkin_count": T.c.checkin_count + stmt.excluded.checkin_count,
+                "total_hours": stmt.excluded.total_hours,
+                "late_minutes": stmt.excluded.late_minutes,
+                "updated_at": stmt.excluded.updated_at,
+            },
+        )
+        db.session.execute(stmt)
+        return
+
+    values = dict(zip(cols, db.session.execute(agg).one()))
+    row = db.session.execute(
+        select(DailyAttendanceStat).where(
+            DailyAttendanceStat.work_date == work_date,
+            DailyAttendanceStat.department_id == department_id,
+        )
+    ).scalar_one_or_none()
+    if row is None:
+        row = DailyAttendanceStat(work_date=work_date, department_id=department_id, checkin_count=0)
+        db.session.add(row)
+    row.present_count = int(values["present_count"] or 0)
+    row.checkin_count = (row.checkin_count or 0) + checkins
+    row.total_hours = float(values["total_hours"] or 0.0)
+    row.late_minutes = float(values["late_minutes"] or 0.0)
+    row.updated_at = now
+
+
+# -------------------------------
+# Reconstruction (backfill)
+# -------------------------------
+def rebuild(start: Optional[date] = None, end: Optional[date] = None) -> int:
+    """
+    Recalcule le rollup depuis `attendances` sur [start, end] (tout l'historique par défaut)
+    en un DELETE + un INSERT ... SELECT ... GROUP BY. Retourne le nombre de lignes produites.
+    """
+    window = []
+    if start:
+        window.append(Attendance.work_date >= start)
+    if end:
+        window.append(Attendance.work_date <= end)
+
+    purge = delete(DailyAttendanceStat)
+    if start:
+        purge = purge.where(DailyAttendanceStat.work_date >= start)
+    if end:
+        purge = purge.where(DailyAttendanceStat.work_date <= end)
+    db.session.execute(purge)
+
+    dep = func.coalesce(User.department_id, NO_DEPARTMENT)
+    present = func.sum(case((Attendance.check_in.isnot(None), 1), else_=0))
+    agg = (
+        select(
+            Attendance.work_date,
+            dep,
+            present,
+            present,  # l'historique ne garde pas les re-pointages
+            func.coalesce(func.sum(Attendance.total_hours), 0.0),
+            func.coalesce(func.sum(Attendance.late_minutes), 0.0),
+            literal(datetime.utcnow()),
+        )
+        .join(User, User.id == Attendance.user_id)
+        .where(*window)
+        .group_by(Attendance.work_date, dep)
+    )
+    T = DailyAttendanceStat.__table__
+    res = db.session.execute(
+        T.insert().from_select(
+            ["work_date", "department_id", "present_count", "checkin_count",
+             "total_hours", "late_minutes", "updated_at"],
+            agg,
+        )
+    )
+    db.session.commit()
+    return res.rowcount or 0
+
+
+# -------------------------------
+# Lectures (quelques lignes par jour)
+# -------------------------------
+def day_totals(d: date) -> Tuple[int, float]:
+    """(présents, heures) pour un jour, tous départements confondus."""
+    present, hours = db.session.execute(
+        select(
+            func.coalesce(func.sum(DailyAttendanceStat.present_count), 0),
+            func.coalesce(func.sum(DailyAttendanceStat.total_hours), 0.0),
+        ).where(DailyAttendanceStat.work_date == d)
+    ).one()
+    return int(present or 0), float(hours or 0.0)
+
+
+def range_totals(start: date, end: date) -> Tuple[int, float]:
+    """(jours-présence, heures) sur [start, end]."""
+    present, hours = db.session.execute(
+        select(
+            func.coalesce(func.sum(DailyAttendanceStat.present_count), 0),
+            func.coalesce(func.sum(DailyAttendanceStat.total_hours), 0.0),
+        ).where(DailyAttendanceStat.work_date >= start, DailyAttendanceStat.work_date <= end)
+    ).one()
+    return int(present or 0), float(hours or 0.0)
@@ -0,0 +1,158 @@
+# app/services/schema_adapter.py
+# Résolution (une seule fois, au démarrage) du mapping de colonnes du modèle
+# Attendance, et compilation du chemin d'écriture du pointage.
+# Les routes n'ont plus aucune réflexion à faire par requête.
+# Le schéma natif passe par l'UPSERT (qui maintient aussi le rollup journalier).
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, List, Optional, Tuple
+
+from flask import Flask, current_app
+from sqlalchemy import literal
+
+from ..extensions import db
+from ..models.attendance import Attendance
+from .attendance_service import work_date_of
+
+EXT_KEY = "attendance_schema"
+
+CANDIDATES = {
+    "checkin": ("check_in", "checkin", "check_in_at", "in_time", "clock_in", "started_at", "start_at"),
+    "checkout": ("check_out", "checkout", "check_out_at", "out_time", "clock_out", "ended_at", "end_at"),
+    "date": ("date", "work_date", "day"),
+    "ts": ("timestamp", "time_at", "ts", "created_at"),
+    "event": ("type", "event", "action"),
+    "lat": ("geo_lat", "latitude", "lat"),
+    "lng": ("geo_lon", "longitude", "lng", "lon"),
+    "acc": ("accuracy", "acc"),
+    "source": ("source",),
+    "hours": ("total_hours",),
+}
+
+# writer(user_id, action, lat, lng, accuracy, now) -> mode ("per_day" | "event")
+Writer = Callable[[int, str, Optional[float], Optional[float], Optional[float], datetime], str]
+
+
+@dataclass(frozen=True)
+class AttendanceSchema:
+    checkin: Optional[str] = None
+    checkout: Optional[str] = None
+    date: Optional[str] = None
+    ts: Optional[str] = None
+    event: Optional[str] = None
+    lat: Optional[str] = None
+    lng: Optional[str] = None
+    acc: Optional[str] = None
+    source: Optional[str] = None
+    hours: Optional[str] = None
+    export_columns: Tuple = field(default=(), compare=False)
+    export_headers: Tuple[str, ...] = field(default=(), compare=False)
+
+    @property
+    def native(self) -> bool:
+        """Schéma du modèle livré : pointage via UPSERT / group commit."""
+        return (self.checkin, self.checkout, self.date) == ("check_in", "check_out", "work_date")
+
+    @property
+    def mode(self) -> str:
+        return "per_day" if (self.checkin and self.checkout) else "event"
+
+
+def resolve(model=Attendance) -> AttendanceSchema:
+    cols = set(model.__table__.columns.keys())
+
+    def pick(role: str) -> Optional[str]:
+        return next((c for c in CANDIDATES[role] if c in cols), None)
+
+    found = {role: pick(role) for role in CANDIDATES}
+
+    def col(role: str, label: str, default=None):
+        name = found[role]
+        return getattr(model, name) if name else literal(default).label(label)
+
+    lat_label, lng_label = found["lat"] or "lat", found["lng"] or "lon"
+    export_columns = (
+        col("hours", "total_hours", 0),
+        col("source", "source"),
+        col("lat", lat_label),
+        col("lng", lng_label),
+    )
+    export_headers = ("total_hours", "source", lat_label, lng_label)
+    return AttendanceSchema(**found, export_columns=export_columns, export_headers=export_headers)
+
+
+# -------------------------------
+# Compilation du chemin d'écriture
+# -------------------------------
+def compile_writer(schema: AttendanceSchema, model=Attendance) -> Writer:
+    if schema.native:
+        from .punch_buffer import record_punch
+
+        def write_native(user_id, action, lat, lng, acc, now):
+            record_punch(user_id, action, lat, lng, source="manual")
+            return "per_day"
+        return write_native
+
+    A_user = model.user_id
+    A_in = getattr(model, schema.checkin) if schema.checkin else None
+    A_out = getattr(model, schema.checkout) if schema.checkout else None
+    A_date = getattr(model, schema.date) if schema.date else None
+    geo: List[Tuple[str, str]] = [(c, k) for c, k in ((schema.lat, "lat"), (schema.lng, "lng"), (schema.acc, "acc")) if c]
+
+    if schema.mode == "per_day":
+        def write_per_day(user_id, action, lat, lng, acc, now):
+            values = {"lat": lat, "lng": lng, "acc": acc}
+            today = work_date_of(now)
+            if A_date is not None:
+                row = db.session.query(model).filter(A_user == user_id, A_date == today).first()
+            else:
+                # Pas de colonne 'date' : dernière ligne 'ouverte' (sans checkout)
+                row = (db.session.query(model)
+                       .filter(A_user == user_id, A_out.is_(None))
+                       .order_by(A_in.desc()).first())
+            if row is None:
+                kwargs = {"user_id": user_id}
+                if schema.date:
+                    kwargs[schema.date] = today
+                row = model(**kwargs)
+                db.session.add(row)
+            setattr(row, schema.checkin if action == "checkin" else schema.checkout, now)
+            for col, key in geo:
+                setattr(row, col, values[key])
+            db.session.commit()
+            return "per_day"
+        return write_per_day
+
+    def write_event(user_id, action, lat, lng, acc, now):
+        values = {"lat": lat, "lng": lng, "acc": acc}
+        kwargs = {"user_id": user_id}
+        if schema.ts:
+            kwargs[schema.ts] = now
+        if schema.event:
+            kwargs[schema.event] = action
+        for col, key in geo:
+            kwargs[col] = values[key]
+        # Sans colonne d'horodatage : on compte sur created_at (server_default)
+        db.session.add(model(**kwargs))
+        db.session.commit()
+        return "event"
+    return write_event
+
+
+# -------------------------------
+# Intégration Flask
+# -------------------------------
+def init_app(app: Flask) -> None:
+    schema = resolve()
+    app.extensions[EXT_KEY] = (schema, compile_writer(schema))
+    app.logger.debug("Attendance schema: mode=%s native=%s", schema.mode, schema.native)
+
+
+def get_schema() -> AttendanceSchema:
+    return current_app.extensions[EXT_KEY][0]
+
+
+def get_writer() -> Writer:
+    return current_app.extensions[EXT_KEY][1]
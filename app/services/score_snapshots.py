@@ -0,0 +1,193 @@
+# app/services/score_snapshots.py
+# Instantanés des indicateurs de score des mois clôturés (monthly_scores).
+# Un mois « closed » se lit en une requête indexée au lieu d'être recalculé
+# depuis les pointages. Toute écriture rétroactive (pointage, heure sup,
+# congé) sur un mois clôturé le repasse en « stale », dans la même
+# transaction : il est alors recalculé en direct jusqu'à la prochaine clôture.
+from __future__ import annotations
+
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import delete, event, insert, inspect as sa_inspect, select, update
+from sqlalchemy.orm import Session
+
+from ..extensions import db
+from ..models.attendance import Attendance
+from ..models.leave import Leave
+from ..models.monthly_score import MonthlyScore, ScoreMonth
+from ..models.overtime import Overtime
+from ..models.user import User
+from . import data_version
+from .award_engine import MonthFeatures
+
+CLOSED, STALE = "closed", "stale"
+_PENDING = "score_snapshots_pending"
+
+# Colonnes dont dépendent les indicateurs (une mise à jour d'autres colonnes,
+# ex. site_id / geo_status, ne rend pas un mois périmé)
+_DATE_COLS = {"work_date", "start_date", "end_date"}
+_TRACKED = {
+    Attendance.__tablename__: {"user_id", "work_date", "check_in", "total_hours"},
+    Overtime.__tablename__: {"user_id", "work_date", "hours", "status"},
+    Leave.__tablename__: {"user_id", "start_date", "end_date", "status"},
+}
+
+
+def month_of(d: date) -> str:
+    return f"{d.year:04d}-{d.month:02d}"
+
+
+def months_between(start: date, end: date) -> List[str]:
+    out, y, m = [], start.year, start.month
+    while (y, m) <= (end.year, end.month):
+        out.append(f"{y:04d}-{m:02d}")
+        y, m = (y + 1, 1) if m == 12 else (y, m + 1)
+    return out
+
+
+# -------------------------------
+# Lecture / écriture des instantanés
+# -------------------------------
+def read(ym: str) -> Optional[MonthFeatures]:
+    """Indicateurs du mois s'il est clôturé et à jour, sinon None."""
+    sm = db.session.get(ScoreMonth, ym)
+    if sm is None or sm.status != CLOSED:
+        return None
+    f = MonthFeatures(workdays=sm.workdays)
+    rows = db.session.execute(
+        select(MonthlyScore.user_id, User.first_name, User.last_name, MonthlyScore.present_days,
+               MonthlyScore.total_hours, MonthlyScore.overtime_hours, MonthlyScore.leave_days)
+        .join(User, User.id == MonthlyScore.user_id)
+        .where(MonthlyScore.month == ym)
+    )
+    for uid, first, last, p, h, o, d in rows:
+        f.user_ids.append(uid)
+        f.names.append(f"{first} {last}")
+        f.present_days.append(p)
+        f.total_hours.append(h)
+        f.overtime_hours.append(o)
+        f.leave_days.append(d)
+    return f
+
+
+def write(ym: str, f: MonthFeatures) -> int:
+    """Remplace l'instantané du mois (sans COMMIT) ; retourne le nombre de lignes."""
+    db.session.execute(delete(MonthlyScore).where(MonthlyScore.month == ym))
+    rows = [
+        {"month": ym, "user_id": uid, "present_days": p, "total_hours": h,
+         "overtime_hours": o, "leave_days": d}
+        for uid, p, h, o, d in zip(f.user_ids, f.present_days, f.total_hours,
+                                   f.overtime_hours, f.leave_days)
+    ]
+    if rows:
+        db.session.execute(insert(MonthlyScore), rows)
+    sm = db.session.get(ScoreMonth, ym)
+    if sm is None:
+        sm = ScoreMonth(month=ym)
+        db.session.add(sm)
+    sm.status, sm.workdays = CLOSED, f.workdays
+    sm.closed_at, sm.stale_since = datetime.utcnow(), None
+    return len(rows)
+
+
+def stale_months() -> List[str]:
+    return list(db.session.execute(
+        select(ScoreMonth.month).where(ScoreMonth.status == STALE).order_by(ScoreMonth.month)
+    ).scalars())
+
+
+def mark_stale(*months: str, session: Session | None = None) -> None:
+    """Écritures hors ORM (SQL brut, autre connexion) : péremption explicite."""
+    _stale(session or db.session, set(months))
+
+
+def _stale(session: Session, months: Set[str]) -> None:
+    # Le mois en cours ne peut pas être clôturé : inutile d'interroger la base
+    current = month_of(date.today())
+    months = {m for m in months if m < current}
+    if months:
+        res = session.connection().execute(
+            update(ScoreMonth.__table__)
+            .where(ScoreMonth.month.in_(sorted(months)), ScoreMonth.status == CLOSED)
+            .values(status=STALE, stale_since=datetime.utcnow())
+        )
+        # UPDATE sur la connexion : sans cela, les mémos (SCORE_TABLES) ne voient rien
+        if res.rowcount:
+            data_version.touch_on_commit(session, ScoreMonth.__tablename__)
+
+
+# -------------------------------
+# Détection des écritures rétroactives (événements de session)
+# -------------------------------
+def _pending(session: Session) -> Set[str]:
+    return session.info.setdefault(_PENDING, set())
+
+
+def months_of_values(values: Iterable[dict]) -> Set[str]:
+    """Mois des colonnes de date présentes dans des paramètres d'instruction."""
+    months: Set[str] = set()
+    for v in values:
+        days = [v.get(c) for c in _DATE_COLS if isinstance(v.get(c), date)]
+        if "start_date" in v and "end_date" in v and len(days) >= 2:
+            months.update(months_between(min(days), max(days)))
+        else:
+            months.update(month_of(d) for d in days)
+    return months
+
+
+def months_of_object(obj, changed_only: bool, tracked: Dict[str, Set[str]] = _TRACKED) -> Set[str]:
+    """Mois touchés par l'écriture d'un objet ORM des tables `tracked` (ancienne date comprise)."""
+    state = sa_inspect(obj)
+    cols = tracked.get(getattr(state.mapper.local_table, "name", None))
+    if not cols:
+        return set()
+    if changed_only and not any(state.attrs[c].history.has_changes() for c in cols if c in state.attrs):
+        return set()
+    values = [{c: getattr(obj, c, None) for c in _DATE_COLS}]
+    # Ancienne date d'une ligne déplacée
+    old = {c: state.attrs[c].history.deleted[0] for c in _DATE_COLS
+           if c in state.attrs and state.attrs[c].history.deleted}
+    if old:
+        values.append({**values[0], **old})
+    return months_of_values(values)
+
+
+def _after_flush(session: Session, flush_context) -> None:
+    months = session.info.pop(_PENDING, set())
+    for obj in (*session.new, *session.deleted):
+        months |= months_of_object(obj, changed_only=False)
+    for obj in session.dirty:
+        months |= months_of_object(obj, changed_only=True)
+    if months:
+        _stale(session, months)
+
+
+def _collect_execute(state) -> None:
+    if not (state.is_insert or state.is_update or state.is_delete):
+        return
+    name = getattr(getattr(state.statement, "table", None), "name", None)
+    if name not in _TRACKED:
+        return
+    params = state.parameters
+    values = params if isinstance(params, list) else [params or {}]
+    if state.is_update and not any(_TRACKED[name] & set(v) for v in values):
+        return
+    _pending(state.session).update(months_of_values(values))
+
+
+def _before_commit(session: Session) -> None:
+    months = session.info.pop(_PENDING, None)
+    if months:
+        _stale(session, months)
+
+
+def _after_rollback(session: Session) -> None:
+    session.info.pop(_PENDING, None)
+
+
+event.listen(Session, "after_flush", _after_flush)
+event.listen(Session, "do_orm_execute", _collect_execute)
+# insert=True : avant data_version._before_commit (incréments dans la même transaction)
+event.listen(Session, "before_commit", _before_commit, insert=True)
+event.listen(Session, "after_rollback", _after_rollback)
@@ -1,24 +1,87 @@
-
 import hmac, hashlib, time
 from flask import current_app
+from .nonce_store import get_store
 
-def sign_token(payload: str, ttl_seconds: int = 120) -> str:
+def sign_token(payload: str, ttl_seconds: int = 120, ts: int | None = None) -> str:
+    """`ts` fixe l'horodatage signé (ex. début de tranche pour les QR pré-rendus)."""
     secret = current_app.config["SECRET_KEY"].encode()
-    ts = str(int(time.time()))
+    ts = str(int(time.time()) if ts is None else int(ts))
     base = f"{payload}|ts:{ts}"
     sig = hmac.new(secret, base.encode(), hashlib.sha256).hexdigest()
     return f"{base}|sig:{sig}|ttl:{ttl_seconds}"
 
-def verify_token(token: str) -> bool:
+def _token_key(token: str) -> str:
+    return hashlib.sha1(token.encode()).hexdigest()
+
+def _claims(token: str) -> dict:
+    return dict(kv.split(":", 1) for kv in token.split("|") if ":" in kv)
+
+def _check_signature(token: str):
+    """(ts, ttl) si la signature est valide, sinon None."""
     secret = current_app.config["SECRET_KEY"].encode()
-    parts = dict(kv.split(":", 1) for kv in token.split("|") if ":" in kv)
+    parts = _claims(token)
     required = ("ts", "sig", "ttl")
     if not all(k in parts for k in required):
-        return False
+        return None
     base = token.split("|sig:")[0]
     expected = hmac.new(secret, base.encode(), hashlib.sha256).hexdigest()
     if not hmac.compare_digest(expected, parts["sig"]):
+        return None
+    return int(parts["ts"]), int(parts["ttl"])
+
+def _window(token: str):
+    """
+    (ts, ttl) du jeton, depuis le cache de vérification si possible.
+    Seuls les jetons valides sont mis en cache (jusqu'à leur expiration).
+    """
+    store = get_store()
+    key = "v:" + _token_key(token)
+    hit = store.get(key)
+    if hit is not None:
+        ts, ttl = hit.split(":")
+        return int(ts), int(ttl)
+    window = _check_signature(token)
+    if window is not None:
+        remaining = window[0] + window[1] - int(time.time())
+        if remaining > 0:
+            store.set(key, f"{window[0]}:{window[1]}", remaining)
+    return window
+
+def verify_token(token: str, now: int | None = None) -> bool:
+    """
+    Vérifie signature + TTL. `now` (epoch) permet de valider un pointage
+    hors-ligne à l'heure où il a été fait plutôt qu'à sa synchronisation.
+    """
+    window = _window(token)
+    if window is None:
+        return False
+    now = int(time.time()) if now is None else int(now)
+    ts, ttl = window
+    # Horloge du serveur légèrement en retard sur celle du kiosque qui a signé
+    skew = int(current_app.config.get("QR_CLOCK_SKEW_S", 30))
+    return -skew <= (now - ts) <= ttl
+
+def token_action(token: str) -> str | None:
+    """Action liée au jeton (`action:checkin|...`), None s'il n'en porte pas."""
+    return _claims(token.split("|sig:")[0]).get("action")  # partie signée seulement
+
+def action_allowed(token: str, action: str) -> bool:
+    """Un QR de check-in n'autorise pas un check-out (et inversement)."""
+    bound = token_action(token)
+    return bound is None or bound == action
+
+def consume_token(token: str, scope: str, now: int | None = None) -> bool:
+    """
+    Vérifie le jeton (à `now`, voir verify_token) et le marque comme utilisé
+    pour `scope` (ex. "42:checkin"). False si invalide/expiré ou déjà consommé ;
+    NonceStoreFull (nonce_store) si la table des nonces est saturée.
+    Le nonce vit tant que le jeton peut encore être présenté : son TTL, plus la
+    fenêtre de synchro hors-ligne (PUNCH_SYNC_MAX_AGE_DAYS), partagée par
+    /attendance/punch et /attendance/punch/bulk.
+    """
+    if not verify_token(token, now=now):
         return False
-    now = int(time.time())
-    ts = int(parts["ts"]); ttl = int(parts["ttl"])
-    return (now - ts) <= ttl
+    ts, ttl = _window(token)
+    offline = int(current_app.config.get("PUNCH_SYNC_MAX_AGE_DAYS", 7)) * 86400
+    remaining = ts + ttl + offline - int(time.time())
+    return get_store().add(f"n:{_token_key(token)}:{scope}", "1", max(1, remaining))
@@ -0,0 +1,24 @@
+# app/services/sql_compat.py
+from __future__ import annotations
+
+from ..extensions import db
+
+
+def dialect_name() -> str:
+    return db.engine.dialect.name  # 'sqlite', 'postgresql', ...
+
+
+def upsert_insert(table):
+    """
+    INSERT supportant ON CONFLICT (sqlite / postgresql), sinon None :
+    l'appelant doit alors prévoir un chemin SELECT + INSERT/UPDATE.
+    """
+    table = getattr(table, "__table__", table)
+    dialect = dialect_name()
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+        return insert(table)
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+        return insert(table)
+    return None
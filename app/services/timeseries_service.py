@@ -0,0 +1,128 @@
+# app/services/timeseries_service.py
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Tuple
+
+from sqlalchemy import func, cast, Date, select
+
+from ..extensions import db
+
+BUCKETS = ("day", "week", "month")
+
+LABEL_FORMATS = {
+    "day": "%d/%m",
+    "week": "%d/%m",     # lundi de la semaine
+    "month": "%m/%Y",
+}
+
+
+# -------------------------------
+# Bornes des buckets (côté Python)
+# -------------------------------
+def bucket_start(d: date, bucket: str) -> date:
+    """Premier jour du bucket contenant `d` (semaine = lundi)."""
+    if bucket == "week":
+        return d - timedelta(days=d.weekday())
+    if bucket == "month":
+        return d.replace(day=1)
+    return d
+
+
+def next_bucket(d: date, bucket: str) -> date:
+    if bucket == "week":
+        return d + timedelta(days=7)
+    if bucket == "month":
+        return date(d.year + (d.month == 12), d.month % 12 + 1, 1)
+    return d + timedelta(days=1)
+
+
+def month_bounds(ym: str) -> Tuple[date, date]:
+    """[1er du mois, 1er du mois suivant) : bornes demi-ouvertes, comparables à l'index."""
+    y, m = map(int, ym.split("-"))
+    start = date(y, m, 1)
+    return start, next_bucket(start, "month")
+
+
+def iter_buckets(start: date, end: date, bucket: str) -> Iterable[date]:
+    cur = bucket_start(start, bucket)
+    while cur <= end:
+        yield cur
+        cur = next_bucket(cur, bucket)
+
+
+# -------------------------------
+# Expression SQL du bucket (selon le dialecte)
+# -------------------------------
+def bucket_expr(date_col, bucket: str):
+    """
+    Expression SQL qui ramène `date_col` au début de son bucket.
+    - sqlite     : date(...) / strftime(...)
+    - postgresql : date_trunc(...)::date
+    """
+    if bucket == "day":
+        return date_col
+
+    dialect = db.engine.dialect.name
+    if dialect == "sqlite":
+        if bucket == "week":
+            # 'weekday 0' avance au dimanche suivant (ou reste), -6 jours => lundi
+            return func.date(date_col, "weekday 0", "-6 days")
+        return func.strftime("%Y-%m-01", date_col)
+
+    return cast(func.date_trunc(bucket, date_col), Date)
+
+
+def _as_date(v: Any) -> date:
+    if isinstance(v, datetime):
+        return v.date()
+    if isinstance(v, date):
+        return v
+    return date.fromisoformat(str(v)[:10])
+
+
+# -------------------------------
+# Série temporelle : 1 seule requête GROUP BY
+# -------------------------------
+def series(
+    date_col,
+    value_expr,
+    start: date,
+    end: date,
+    bucket: str = "day",
+    filters: Iterable[Any] = (),
+    cast_fn=float,
+) -> List[Tuple[date, Any]]:
+    """
+    Agrège `value_expr` par bucket entre `start` et `end` (inclus) en une
+    requête, puis complète les buckets vides avec 0.
+    Retourne [(début_bucket, valeur), ...] dans l'ordre chronologique.
+    """
+    if bucket not in BUCKETS:
+        raise ValueError(f"bucket invalide: {bucket!r}")
+
+    key = bucket_expr(date_col, bucket).label("bucket")
+    stmt = (
+        select(key, value_expr.label("value"))
+        .where(date_col >= start, date_col <= end, *filters)
+        .group_by(key)
+    )
+    found: Dict[date, Any] = {
+        _as_date(b): v for b, v in db.session.execute(stmt).all() if b is not None
+    }
+    return [(b, cast_fn(found.get(b) or 0)) for b in iter_buckets(start, end, bucket)]
+
+
+def chart_payload(points: List[Tuple[date, Any]], bucket: str = "day") -> Dict[str, list]:
+    """Format attendu par Chart.js côté dashboard : {labels, values}."""
+    fmt = LABEL_FORMATS.get(bucket, "%d/%m")
+    return {
+        "labels": [b.strftime(fmt) for b, _ in points],
+        "values": [v for _, v in points],
+    }
+
+
+def window(days: int, end: date | None = None) -> Tuple[date, date]:
+    """Fenêtre glissante de `days` jours se terminant à `end` (aujourd'hui par défaut)."""
+    end = end or date.today()
+    return end - timedelta(days=max(1, days) - 1), end
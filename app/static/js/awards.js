@@ -0,0 +1,28 @@
+(function () {
+  const form = document.getElementById("award-weights");
+  const btn  = document.getElementById("award-preview-btn");
+  const card = document.getElementById("award-preview");
+  const list = document.getElementById("award-preview-list");
+  if (!form || !btn) return;
+
+  // Classement recalculé côté serveur sans enregistrer les pondérations
+  btn.addEventListener("click", async () => {
+    const fd = new FormData(form);
+    const weights = {};
+    ["presence", "hours", "overtime", "leaves"].forEach(k => { weights[k] = parseFloat(fd.get(k) || 0); });
+    const res = await fetch(form.dataset.preview, {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({ month: fd.get("month"), weights: [weights], top: 10 }),
+    });
+    const data = await res.json();
+    if (!data.ok) { alert(data.error || "Erreur"); return; }
+    list.innerHTML = "";
+    data.results[0].ranking.forEach(r => {
+      const li = document.createElement("li");
+      li.textContent = `${r.full_name} — ${r.score.toFixed(3)}`;
+      list.appendChild(li);
+    });
+    card.classList.remove("d-none");
+  });
+})();
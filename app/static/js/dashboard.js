@@ -9,12 +9,8 @@
     if (el) el.textContent = now.toLocaleString();
   } catch {}
 
-  // Auto-refresh si un autre onglet pointe
-  window.addEventListener("storage", (ev) => {
-    if (ev.key === "rh_refresh") location.reload();
-  });
-
   // Helpers charts
+  const charts = {};
   const mkChart = (canvas, cfg) => new Chart(canvas, cfg);
 
   // -------- Utils de normalisation ----------
@@ -53,95 +49,126 @@
   }
 
   // -------- 1) KPIs & compteurs ----------
-  fetch("/api/dashboard/stats")
-    .then(r => r.json())
-    .then(s => {
-      $("#kpi-present").textContent        = s.present_today ?? s.present ?? "0";
-      $("#kpi-hours").textContent          = Number(s.hours_today ?? 0).toFixed(2);
-      $("#kpi-leaves-pending").textContent = s.leave_pending ?? s.leaves_pending ?? "0";
-      $("#kpi-ot-pending").textContent     = s.overtime_pending ?? s.ot_pending ?? "0";
-
-      if (s.present_vs_yesterday != null) {
-        const v = Number(s.present_vs_yesterday);
-        $("#kpi-present-sub").textContent = `${v >= 0 ? "+" : ""}${v} vs hier`;
-      } else {
-        $("#kpi-present-sub").textContent = "—";
-      }
-      if (s.hours_vs_yesterday != null) {
-        const v = Number(s.hours_vs_yesterday || 0);
-        $("#kpi-hours-sub").textContent = `${v >= 0 ? "+" : ""}${v.toFixed(2)} h vs hier`;
-      } else {
-        $("#kpi-hours-sub").textContent = "—";
-      }
-    })
-    .catch(() => {
-      $("#kpi-present").textContent = "0";
-      $("#kpi-hours").textContent   = "0.00";
-      $("#kpi-leaves-pending").textContent = "0";
-      $("#kpi-ot-pending").textContent     = "0";
+  function renderStats(s) {
+    $("#kpi-present").textContent        = s.present_today ?? s.present ?? "0";
+    $("#kpi-hours").textContent          = Number(s.hours_today ?? 0).toFixed(2);
+    $("#kpi-leaves-pending").textContent = s.leave_pending ?? s.leaves_pending ?? "0";
+    $("#kpi-ot-pending").textContent     = s.overtime_pending ?? s.ot_pending ?? "0";
+
+    if (s.present_vs_yesterday != null) {
+      const v = Number(s.present_vs_yesterday);
+      $("#kpi-present-sub").textContent = `${v >= 0 ? "+" : ""}${v} vs hier`;
+    } else {
       $("#kpi-present-sub").textContent = "—";
-      $("#kpi-hours-sub").textContent   = "—";
-    });
+    }
+    if (s.hours_vs_yesterday != null) {
+      const v = Number(s.hours_vs_yesterday || 0);
+      $("#kpi-hours-sub").textContent = `${v >= 0 ? "+" : ""}${v.toFixed(2)} h vs hier`;
+    } else {
+      $("#kpi-hours-sub").textContent = "—";
+    }
+  }
+
+  function resetStats() {
+    $("#kpi-present").textContent = "0";
+    $("#kpi-hours").textContent   = "0.00";
+    $("#kpi-leaves-pending").textContent = "0";
+    $("#kpi-ot-pending").textContent     = "0";
+    $("#kpi-present-sub").textContent = "—";
+    $("#kpi-hours-sub").textContent   = "—";
+  }
 
   // -------- 2) Présence 14 jours ----------
-  fetch("/api/charts/presence?days=14")
-    .then(r => r.json())
-    .then(d => {
-      const labels = arr(d.labels || d.dates);
-      const values = arr(d.values || d.counts);
-      mkChart($("#presenceChart"), {
-        type: "line",
-        data: { labels, datasets: [{ label: "Présents", data: values, tension: .35, fill: false }] },
-        options: {
-          responsive: true, maintainAspectRatio: false,
-          scales: { y: { beginAtZero: true, ticks: { precision: 0 } } },
-          plugins: { legend: { display: false }, tooltip: { mode: "index", intersect: false } }
-        }
-      });
-      if (labels.length) {
-        $("#presenceRangeLabel").textContent = `${labels[0]} → ${labels[labels.length - 1]}`;
+  function renderPresence(d) {
+    const labels = arr(d.labels || d.dates);
+    const values = arr(d.values || d.counts);
+    charts.presence = mkChart($("#presenceChart"), {
+      type: "line",
+      data: { labels, datasets: [{ label: "Présents", data: values, tension: .35, fill: false }] },
+      options: {
+        responsive: true, maintainAspectRatio: false,
+        scales: { y: { beginAtZero: true, ticks: { precision: 0 } } },
+        plugins: { legend: { display: false }, tooltip: { mode: "index", intersect: false } }
       }
-    })
-    .catch(err => console.error("presence chart error:", err));
+    });
+    if (labels.length) {
+      $("#presenceRangeLabel").textContent = `${labels[0]} → ${labels[labels.length - 1]}`;
+    }
+  }
 
   // -------- 3) Heures sup 14 jours ----------
-  fetch("/api/charts/overtime?days=14")
-    .then(r => r.json())
-    .then(d => {
-      const labels = arr(d.labels || d.dates);
-      const values = arr(d.values || d.hours);
-      mkChart($("#overtimeChart"), {
-        type: "bar",
-        data: { labels, datasets: [{ label: "Heures sup", data: values }] },
-        options: {
-          responsive: true, maintainAspectRatio: false,
-          plugins: { legend: { display: false } },
-          scales: { y: { beginAtZero: true } }
-        }
-      });
-    })
-    .catch(err => console.error("overtime chart error:", err));
+  function renderOvertime(d) {
+    const labels = arr(d.labels || d.dates);
+    const values = arr(d.values || d.hours);
+    charts.overtime = mkChart($("#overtimeChart"), {
+      type: "bar",
+      data: { labels, datasets: [{ label: "Heures sup", data: values }] },
+      options: {
+        responsive: true, maintainAspectRatio: false,
+        plugins: { legend: { display: false } },
+        scales: { y: { beginAtZero: true } }
+      }
+    });
+  }
 
   // -------- 4) Coûts par département (mois en cours) ----------
-  fetch("/api/charts/department-costs")
+  function renderDeptCosts(d) {
+    const pairs  = normalizePairs(d);
+    const labels = pairs.map(x => x.label);
+    const values = pairs.map(x => x.value);
+
+    mkChart($("#deptChart"), {
+      type: "bar",
+      data: { labels, datasets: [{ label: "Coût", data: values }] },
+      options: {
+        indexAxis: "x",
+        responsive: true, maintainAspectRatio: false,
+        plugins: { legend: { display: false } },
+        scales: { y: { beginAtZero: true } }
+      }
+    });
+  }
+
+  // Un seul appel pour tous les widgets (ETag : le navigateur revalide en 304)
+  fetch("/api/dashboard/bundle?days=14", { credentials: "same-origin" })
     .then(r => r.json())
-    .then(d => {
-      const pairs  = normalizePairs(d);
-      const labels = pairs.map(x => x.label);
-      const values = pairs.map(x => x.value);
-
-      mkChart($("#deptChart"), {
-        type: "bar",
-        data: { labels, datasets: [{ label: "Coût", data: values }] },
-        options: {
-          indexAxis: "x",
-          responsive: true, maintainAspectRatio: false,
-          plugins: { legend: { display: false } },
-          scales: { y: { beginAtZero: true } }
-        }
-      });
+    .then(b => {
+      renderStats(b.stats || {});
+      renderPresence(b.presence || {});
+      renderOvertime(b.overtime || {});
+      renderDeptCosts(b.department_costs || []);
     })
-    .catch(err => console.error("dept costs error:", err));
+    .catch(err => {
+      console.error("dashboard bundle error:", err);
+      resetStats();
+    })
+    .finally(listen);
+
+  // -------- 5) Mises à jour en direct (SSE) ----------
+  // Le serveur pousse les champs modifiés après chaque pointage / demande :
+  // on patche compteurs et dernier point des courbes, sans recharger la page.
+  function patchLastPoint(chart, value) {
+    if (!chart || value == null) return;
+    const data = chart.data.datasets[0].data;
+    if (!data.length) return;
+    data[data.length - 1] = Number(value);
+    chart.update("none");
+  }
+
+  const stats = {};
+  function applyStats(delta) {
+    Object.assign(stats, delta);
+    renderStats(stats);
+    if ("present_today" in delta) patchLastPoint(charts.presence, delta.present_today);
+    if ("overtime_hours_today" in delta) patchLastPoint(charts.overtime, delta.overtime_hours_today);
+  }
+
+  function listen() {
+    if (!window.EventSource) return;
+    const es = new EventSource("/api/dashboard/stream");
+    es.addEventListener("stats", ev => applyStats(JSON.parse(ev.data)));
+    es.addEventListener("delta", ev => applyStats(JSON.parse(ev.data)));
+  }
 })();
 // ------- Chart.js polish (version SAFE) -------
 if (window.Chart) {
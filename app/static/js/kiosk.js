@@ -0,0 +1,22 @@
+(function () {
+  const box    = document.getElementById("kiosk-qr");
+  const status = document.getElementById("kiosk-status");
+  if (!box || !window.EventSource) return;
+
+  // QR rendu côté navigateur : le serveur ne pousse que le jeton signé
+  function draw(url){
+    const qr = qrcode(0, "M");
+    qr.addData(url);
+    qr.make();
+    box.innerHTML = qr.createSvgTag({ cellSize: 8, margin: 2, scalable: true });
+  }
+
+  const es = new EventSource(box.dataset.stream);
+  es.addEventListener("token", ev => {
+    const data = JSON.parse(ev.data);
+    draw(data.url);
+    const until = new Date(data.expires_at * 1000).toLocaleTimeString();
+    status.textContent = `QR valide jusqu'à ${until}`;
+  });
+  es.onerror = () => { status.textContent = "Reconnexion…"; };
+})();
@@ -0,0 +1,32 @@
+"""department budgets and overhead
+
+Revision ID: a7c3e9f2b5d8
+Revises: f6b1d3e8a2c4
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7c3e9f2b5d8'
+down_revision = 'f6b1d3e8a2c4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('departments', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('budget_monthly', sa.Numeric(precision=14, scale=2), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('overhead_rate', sa.Numeric(precision=5, scale=2), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('currency', sa.String(length=8), nullable=False, server_default='XOF'))
+        batch_op.add_column(sa.Column('is_active', sa.Boolean(), nullable=False, server_default=sa.true()))
+
+
+def downgrade():
+    with op.batch_alter_table('departments', schema=None) as batch_op:
+        batch_op.drop_column('is_active')
+        batch_op.drop_column('currency')
+        batch_op.drop_column('overhead_rate')
+        batch_op.drop_column('budget_monthly')
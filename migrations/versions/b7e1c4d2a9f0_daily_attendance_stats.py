@@ -0,0 +1,56 @@
+"""daily attendance stats rollup
+
+Revision ID: b7e1c4d2a9f0
+Revises: edc55a98bc6b
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e1c4d2a9f0'
+down_revision = 'edc55a98bc6b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('daily_attendance_stats',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('work_date', sa.Date(), nullable=False),
+    sa.Column('department_id', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('present_count', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('checkin_count', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('total_hours', sa.Float(), nullable=False, server_default='0'),
+    sa.Column('late_minutes', sa.Float(), nullable=False, server_default='0'),
+    sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('work_date', 'department_id', name='uq_daily_att_stats_day_dep')
+    )
+    with op.batch_alter_table('daily_attendance_stats', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_daily_attendance_stats_work_date'), ['work_date'], unique=False)
+
+    # Backfill de l'historique (équivalent de `flask rollup rebuild`)
+    op.execute("""
+        INSERT INTO daily_attendance_stats
+            (work_date, department_id, present_count, checkin_count, total_hours, late_minutes, updated_at)
+        SELECT a.work_date,
+               COALESCE(u.department_id, 0),
+               SUM(CASE WHEN a.check_in IS NOT NULL THEN 1 ELSE 0 END),
+               SUM(CASE WHEN a.check_in IS NOT NULL THEN 1 ELSE 0 END),
+               COALESCE(SUM(a.total_hours), 0),
+               COALESCE(SUM(a.late_minutes), 0),
+               CURRENT_TIMESTAMP
+        FROM attendances a
+        JOIN users u ON u.id = a.user_id
+        GROUP BY a.work_date, COALESCE(u.department_id, 0)
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('daily_attendance_stats', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_daily_attendance_stats_work_date'))
+
+    op.drop_table('daily_attendance_stats')
@@ -0,0 +1,26 @@
+"""payroll_costs stale_since
+
+Revision ID: c2f7a9d4e6b1
+Revises: b8d4f1a6c9e3
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c2f7a9d4e6b1'
+down_revision = 'b8d4f1a6c9e3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('payroll_costs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('stale_since', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('payroll_costs', schema=None) as batch_op:
+        batch_op.drop_column('stale_since')
@@ -0,0 +1,46 @@
+"""geofence sites and attendance site/status
+
+Revision ID: c3f8a1e6d5b2
+Revises: b7e1c4d2a9f0
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3f8a1e6d5b2'
+down_revision = 'b7e1c4d2a9f0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('geo_sites',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=120), nullable=False),
+    sa.Column('kind', sa.String(length=10), nullable=False, server_default='circle'),
+    sa.Column('center_lat', sa.Float(), nullable=True),
+    sa.Column('center_lon', sa.Float(), nullable=True),
+    sa.Column('radius_m', sa.Float(), nullable=True),
+    sa.Column('polygon', sa.Text(), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=False, server_default=sa.true()),
+    sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+    sa.CheckConstraint("kind IN ('circle','polygon')", name='ck_geo_site_kind'),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+    with op.batch_alter_table('attendances', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('site_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('geo_status', sa.String(length=10), nullable=True))
+        batch_op.create_foreign_key('fk_attendances_site_id_geo_sites', 'geo_sites', ['site_id'], ['id'], ondelete='SET NULL')
+
+
+def downgrade():
+    with op.batch_alter_table('attendances', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_attendances_site_id_geo_sites', type_='foreignkey')
+        batch_op.drop_column('geo_status')
+        batch_op.drop_column('site_id')
+
+    op.drop_table('geo_sites')
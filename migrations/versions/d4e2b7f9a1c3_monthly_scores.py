@@ -0,0 +1,45 @@
+"""monthly score snapshots and month close state
+
+Revision ID: d4e2b7f9a1c3
+Revises: c3f8a1e6d5b2
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4e2b7f9a1c3'
+down_revision = 'c3f8a1e6d5b2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('score_months',
+    sa.Column('month', sa.String(length=7), nullable=False),
+    sa.Column('status', sa.String(length=10), nullable=False, server_default='closed'),
+    sa.Column('workdays', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('closed_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+    sa.Column('stale_since', sa.DateTime(), nullable=True),
+    sa.CheckConstraint("status IN ('closed','stale')", name='ck_score_month_status'),
+    sa.PrimaryKeyConstraint('month')
+    )
+    op.create_table('monthly_scores',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('month', sa.String(length=7), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('present_days', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('total_hours', sa.Float(), nullable=False, server_default='0'),
+    sa.Column('overtime_hours', sa.Float(), nullable=False, server_default='0'),
+    sa.Column('leave_days', sa.Float(), nullable=False, server_default='0'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('month', 'user_id', name='uq_monthly_scores_month_user')
+    )
+
+
+def downgrade():
+    op.drop_table('monthly_scores')
+    op.drop_table('score_months')
@@ -0,0 +1,26 @@
+"""payroll_costs frozen_at
+
+Revision ID: e5a9c2d7f3b1
+Revises: d4e2b7f9a1c3
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5a9c2d7f3b1'
+down_revision = 'd4e2b7f9a1c3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('payroll_costs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('frozen_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('payroll_costs', schema=None) as batch_op:
+        batch_op.drop_column('frozen_at')
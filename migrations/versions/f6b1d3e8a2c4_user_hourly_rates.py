@@ -0,0 +1,40 @@
+"""effective-dated user hourly rates
+
+Revision ID: f6b1d3e8a2c4
+Revises: e5a9c2d7f3b1
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f6b1d3e8a2c4'
+down_revision = 'e5a9c2d7f3b1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('user_hourly_rates',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('rate', sa.Float(), nullable=False),
+    sa.Column('valid_from', sa.Date(), nullable=False),
+    sa.Column('valid_to', sa.Date(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+    sa.CheckConstraint('valid_to IS NULL OR valid_to > valid_from', name='ck_user_hourly_rates_interval'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'valid_from', name='uq_user_hourly_rates_user_from')
+    )
+    # Historique initial : le taux actuel, valable depuis toujours
+    op.execute(
+        "INSERT INTO user_hourly_rates (user_id, rate, valid_from) "
+        "SELECT id, hourly_rate, '1970-01-01' FROM users"
+    )
+
+
+def downgrade():
+    op.drop_table('user_hourly_rates')
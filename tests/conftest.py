@@ -1,10 +1,10 @@
-
 import os, pytest
+from contextlib import contextmanager
+from sqlalchemy import event
 from app import create_app
 from app.extensions import db
 
-@pytest.fixture()
-def app():
+def _app():
     os.environ["DATABASE_URL"] = "sqlite:///:memory:"
     app = create_app()
     with app.app_context():
@@ -13,6 +13,40 @@ def app():
         db.session.remove()
         db.drop_all()
 
+@pytest.fixture()
+def app():
+    os.environ.setdefault("DATA_VERSION_BACKEND", "memory")  # un seul processus
+    yield from _app()
+
+@pytest.fixture()
+def db_versions_app(monkeypatch):
+    """Même application, versions de données en base (backend de production)."""
+    monkeypatch.setenv("DATA_VERSION_BACKEND", "db")
+    yield from _app()
+
 @pytest.fixture()
 def client(app):
     return app.test_client()
+
+@pytest.fixture()
+def login():
+    """login(client, user) : session Flask-Login posée sans passer par le formulaire."""
+    def _login(client, user):
+        with client.session_transaction() as sess:
+            sess["_user_id"] = str(user.id)
+            sess["_fresh"] = True
+    return _login
+
+@pytest.fixture()
+def sql_log(app):
+    """`with sql_log() as stmts:` -> instructions SQL envoyées à la base dans le bloc."""
+    @contextmanager
+    def record():
+        stmts = []
+        listener = lambda conn, cur, statement, *a: stmts.append(statement)
+        event.listen(db.engine, "before_cursor_execute", listener)
+        try:
+            yield stmts
+        finally:
+            event.remove(db.engine, "before_cursor_execute", listener)
+    return record
@@ -0,0 +1,52 @@
+import pytest
+from datetime import date, datetime
+from app.extensions import db
+from app.models.user import User
+from app.models.attendance import Attendance
+from app.models.daily_attendance_stat import DailyAttendanceStat
+from app.services.attendance_service import upsert_punch
+
+def test_upsert_punch_merges_in_sql(app, sql_log):
+    with app.app_context():
+        u = User(email="a@x", first_name="A", last_name="One"); u.set_password("x")
+        db.session.add(u); db.session.commit()
+        day = date(2025, 3, 3)
+
+        with sql_log() as stmts:
+            upsert_punch(u.id, "checkin", datetime(2025, 3, 3, 8, 30), day, None, None)
+            upsert_punch(u.id, "checkin", datetime(2025, 3, 3, 8, 45), day, None, None)   # double tap
+            row = upsert_punch(u.id, "checkout", datetime(2025, 3, 3, 17, 0), day, 1.0, 2.0, "qr")
+        inserts = [s for s in stmts if s.lstrip().upper().startswith("INSERT INTO ATTENDANCES")]
+
+        assert len(inserts) == 3
+        assert "ON CONFLICT" in inserts[0].upper()
+        assert row.check_in == datetime(2025, 3, 3, 8, 30)
+        assert row.total_hours == 8.5
+        assert row.late_minutes == 30.0
+
+        # check-in plus tôt (sync hors-ligne) : heures et retard recalculés
+        row = upsert_punch(u.id, "checkin", datetime(2025, 3, 3, 8, 0), day, None, None)
+        assert row.total_hours == 9.0
+        assert row.late_minutes == 0.0
+        assert Attendance.query.count() == 1
+
+        stat = DailyAttendanceStat.query.one()
+        assert (stat.present_count, stat.total_hours, stat.checkin_count) == (1, 9.0, 3)
+
+@pytest.mark.parametrize("sql_upsert", [True, False])
+def test_late_synced_checkout_keeps_checkin(app, monkeypatch, sql_upsert):
+    from app.services import attendance_service
+    if not sql_upsert:  # dialecte sans ON CONFLICT : chemin ORM, mêmes règles
+        monkeypatch.setattr(attendance_service, "upsert_insert", lambda table: None)
+    with app.app_context():
+        u = User(email="a@x", first_name="A", last_name="One"); u.set_password("x")
+        db.session.add(u); db.session.commit()
+        day = date(2025, 3, 3)
+        upsert_punch(u.id, "checkin", datetime(2025, 3, 3, 9, 15), day, None, None)
+        # Check-out hors-ligne horodaté avant le check-in connu
+        upsert_punch(u.id, "checkout", datetime(2025, 3, 3, 9, 0), day, None, None)
+        att = db.session.execute(db.select(Attendance)).scalar_one()
+        db.session.refresh(att)
+        assert att.check_in == datetime(2025, 3, 3, 9, 15)
+        assert att.late_minutes == 75.0
+        assert att.check_out == datetime(2025, 3, 3, 9, 0) and att.total_hours == 0.0
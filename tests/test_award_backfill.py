@@ -0,0 +1,59 @@
+import pytest
+from datetime import date, datetime, timedelta
+from app.extensions import db
+from app.models.user import User
+from app.models.attendance import Attendance
+from app.models.overtime import Overtime
+from app.models.leave import Leave
+from app.models.award import Award
+from app.models.enums import RequestStatus, LeaveStatus, LeaveType
+from app.services.award_service import backfill_winners, compute_month_scores
+
+def _att(uid, day, hours=8.0):
+    return Attendance(user_id=uid, work_date=day, total_hours=hours,
+                      check_in=datetime.combine(day, datetime.min.time()) + timedelta(hours=8))
+
+def test_backfill_matches_month_by_month_and_history(app, login):
+    with app.app_context():
+        a = User(email="a@x", first_name="A", last_name="One"); a.set_password("x")
+        b = User(email="b@x", first_name="B", last_name="Two"); b.set_password("x")
+        db.session.add_all([a, b]); db.session.commit()
+        db.session.add_all([
+            _att(a.id, date(2025, 1, 6)), _att(a.id, date(2025, 1, 7)), _att(b.id, date(2025, 1, 6)),
+            _att(b.id, date(2025, 2, 3)), _att(b.id, date(2025, 2, 4), 9.0), _att(a.id, date(2025, 2, 3), 4.0),
+            Overtime(user_id=a.id, work_date=date(2025, 3, 4), hours=2.0, status=RequestStatus.APPROVED),
+            Leave(user_id=b.id, type=LeaveType.ANNUAL, status=LeaveStatus.APPROVED,
+                  start_date=date(2025, 1, 27), end_date=date(2025, 2, 7)),
+        ])
+        db.session.commit()
+
+        done = backfill_winners("2025-01", "2025-03")
+        assert [m for m, _, _ in done] == ["2025-01", "2025-02", "2025-03"]
+        for ym, uid, score in done:
+            top = compute_month_scores(ym)[0]
+            assert (uid, round(score, 9)) == (top.user_id, round(top.score, 9))
+        feb = Award.query.filter_by(month="2025-02").one()
+        assert feb.details["leave_days"] == 5.0 and feb.details["total_hours"] == 17.0
+
+        # Relance : mise à jour, pas de doublon
+        backfill_winners("2025-02", "2025-02")
+        assert Award.query.count() == 3
+
+        # Mois en cours : refusé, comme close_month
+        with pytest.raises(ValueError):
+            backfill_winners("2025-01", date.today().strftime("%Y-%m"))
+        assert Award.query.count() == 3
+        admin_id = a.id
+
+    client = app.test_client()
+    with app.app_context():
+        login(client, db.session.get(User, admin_id))
+    r = client.get("/api/awards/history?per_page=2")
+    data = r.get_json()
+    assert r.status_code == 200 and data["total"] == 3
+    assert [i["month"] for i in data["items"]] == ["2025-03", "2025-02"]
+    r = client.get("/api/awards/history?per_page=2&page=2")
+    assert [i["month"] for i in r.get_json()["items"]] == ["2025-01"]
+    # Au-delà de la dernière page : page vide, total inchangé
+    r = client.get("/api/awards/history?per_page=2&page=5")
+    assert r.get_json()["items"] == [] and r.get_json()["total"] == 3
@@ -0,0 +1,132 @@
+import random
+from datetime import date, datetime, timedelta
+from app.extensions import db
+from app.models.user import User
+from app.models.enums import Role
+from app.models.attendance import Attendance
+from app.services import award_engine
+from app.services.award_engine import MonthFeatures
+from app.services.award_service import DEFAULT_WEIGHTS, compute_month_scores, preview
+
+def _features():
+    return MonthFeatures(
+        workdays=20,
+        user_ids=[3, 1, 2],
+        names=["C", "A", "B"],
+        present_days=[20, 20, 10],
+        total_hours=[160.0, 160.0, 80.0],
+        overtime_hours=[0.0, 0.0, 10.0],
+        leave_days=[0.0, 0.0, 10.0],
+    )
+
+def test_ranking_tie_break_on_id():
+    f = _features()
+    scores = award_engine.score(f, DEFAULT_WEIGHTS)
+    assert [f.user_ids[i] for i in award_engine.ranking(f, scores)] == [1, 3, 2]
+
+def test_rank_many_matches_single_runs():
+    f = _features()
+    sets = [DEFAULT_WEIGHTS, {"overtime": 1.0}, {"leaves": 1.0, "presence": 0.1}]
+    many = award_engine.rank_many(f, sets, top=2)
+    for w, rows in zip(sets, many):
+        scores = award_engine.score(f, w)
+        assert [uid for uid, _, _ in rows] == [f.user_ids[i] for i in award_engine.ranking(f, scores, 2)]
+    assert many[1][0][0] == 2
+
+def test_preview_route(app, login):
+    with app.app_context():
+        admin = User(email="adm@x", first_name="A", last_name="D", role=Role.ADMIN); admin.set_password("x")
+        u = User(email="u@x", first_name="U", last_name="One"); u.set_password("x")
+        db.session.add_all([admin, u]); db.session.commit()
+        wd = date(2025, 3, 3)
+        db.session.add(Attendance(user_id=u.id, work_date=wd, total_hours=8.0,
+                                  check_in=datetime.combine(wd, datetime.min.time()) + timedelta(hours=8)))
+        db.session.commit()
+        expected = compute_month_scores("2025-03")
+        res = preview("2025-03", [DEFAULT_WEIGHTS], top=5)[0]["ranking"]
+        assert [r["user_id"] for r in res] == [s.user_id for s in expected]
+        admin_id = admin.id
+
+    client = app.test_client()
+    with app.app_context():
+        login(client, db.session.get(User, admin_id))
+    r = client.post("/admin/awards/preview", json={"month": "2025-03",
+                                                   "weights": [DEFAULT_WEIGHTS, {"hours": 1}]})
+    assert r.status_code == 200 and len(r.get_json()["results"]) == 2
+    r = client.post("/admin/awards/preview", json={"month": "2025-03", "weights": [{}] * 101})
+    assert r.status_code == 400
+
+def test_top_k_matches_full_ranking_with_ties():
+    f = MonthFeatures(
+        workdays=20,
+        user_ids=list(range(1, 41)),
+        names=[str(i) for i in range(1, 41)],
+        present_days=[(i * 7) % 21 for i in range(40)],
+        total_hours=[float((i * 13) % 5) for i in range(40)],
+        overtime_hours=[0.0] * 40,
+        leave_days=[0.0] * 40,
+    )
+    scores = award_engine.score(f, DEFAULT_WEIGHTS)
+    full = award_engine.ranking(f, scores)
+    for k in (0, 1, 3, 10, 40, 50):
+        assert award_engine.top_k(f, scores, k) == full[:k]
+
+def test_current_leader_uses_top_k(app):
+    from app.services.award_service import top_scores
+    with app.app_context():
+        for n in range(5):
+            u = User(email=f"u{n}@x", first_name="U", last_name=str(n)); u.set_password("x")
+            db.session.add(u); db.session.flush()
+            for d in range(n + 1):
+                day = date(2025, 3, 3 + d)
+                db.session.add(Attendance(user_id=u.id, work_date=day, total_hours=8.0,
+                                          check_in=datetime.combine(day, datetime.min.time())))
+        db.session.commit()
+        top = top_scores("2025-03", 2)
+        assert [r.user_id for r in top] == [r.user_id for r in compute_month_scores("2025-03")[:2]]
+        assert top_scores("2025-03", 1)[0].full_name == "U 4"
+
+# Référence en Python pur : mêmes formules et même bris d'égalité, ligne par ligne
+def _py_scores(f, w):
+    mh, mo, wd = max(f.total_hours + [1.0]), max(f.overtime_hours + [1.0]), max(1.0, f.workdays)
+    wv = award_engine.weight_vector(w)
+    return [sum(a * b for a, b in zip(wv, (r, h / mh, o / mo, ld / wd)))
+            for r, h, o, ld in zip(f.presence_rates(), f.total_hours, f.overtime_hours, f.leave_days)]
+
+def _py_ranking(f, scores):
+    rates = f.presence_rates()
+    return sorted(range(len(f)), key=lambda i: (-scores[i], -rates[i], -f.total_hours[i], f.user_ids[i]))
+
+def _random_features(rng, n):
+    ids = rng.sample(range(1, 10 * n), n)
+    # Valeurs entières peu nombreuses : beaucoup d'ex aequo à départager
+    return MonthFeatures(
+        workdays=20, user_ids=ids, names=[str(i) for i in ids],
+        present_days=[rng.randint(15, 20) for _ in ids],
+        total_hours=[float(rng.choice((120, 140, 160))) for _ in ids],
+        overtime_hours=[float(rng.choice((0, 4, 8))) for _ in ids],
+        leave_days=[float(rng.choice((0, 1, 5))) for _ in ids],
+    )
+
+def test_vectorized_engine_matches_pure_python():
+    rng = random.Random(42)
+    sets = [DEFAULT_WEIGHTS, {"presence": 1.0}, {"hours": 1.0, "leaves": 0.5}, {}]
+    for n in (0, 1, 7, 200):
+        f = _random_features(rng, n)
+        many = award_engine.score_many(f, sets)
+        assert many.shape == (len(sets), n)
+        for w, row in zip(sets, many):
+            ref = _py_scores(f, w)
+            assert [round(x, 9) for x in row.tolist()] == [round(x, 9) for x in ref]
+            # Même classement (ex aequo compris) à partir des mêmes scores
+            assert award_engine.ranking(f, row) == _py_ranking(f, row.tolist())
+            for k in (1, 5, n):
+                assert award_engine.top_k(f, row, k) == _py_ranking(f, row.tolist())[:k]
+
+def test_all_tied_scores_fall_back_to_presence_hours_then_id():
+    f = MonthFeatures(workdays=20, user_ids=[9, 4, 7, 2], names=["9", "4", "7", "2"],
+                      present_days=[10, 10, 20, 10], total_hours=[80.0, 80.0, 80.0, 90.0],
+                      overtime_hours=[0.0] * 4, leave_days=[0.0] * 4)
+    scores = award_engine.score(f, {})  # pondérations nulles : tous à 0
+    assert [f.user_ids[i] for i in award_engine.ranking(f, scores)] == [7, 2, 4, 9]
+    assert award_engine.top_k(f, scores, 2) == award_engine.ranking(f, scores)[:2]
@@ -0,0 +1,36 @@
+from datetime import date, datetime, timedelta
+from app.extensions import db
+from app.models.user import User
+from app.models.attendance import Attendance
+from app.services.award_service import compute_month_scores, get_weights, set_weights, score_cache_info, invalidate_scores
+
+def test_scores_memoized_until_data_or_weights_change(app, sql_log):
+    with app.app_context():
+        u = User(email="a@x", first_name="A", last_name="One"); u.set_password("x")
+        db.session.add(u); db.session.commit()
+        day = date(2025, 3, 3)
+        db.session.add(Attendance(user_id=u.id, work_date=day, total_hours=8.0,
+                                  check_in=datetime.combine(day, datetime.min.time()) + timedelta(hours=8)))
+        db.session.commit()
+
+        first = compute_month_scores("2025-03")
+        with sql_log() as stmts:
+            again = compute_month_scores("2025-03")
+            get_weights()
+        assert stmts == []
+        assert [r.score for r in again] == [r.score for r in first]
+        assert score_cache_info()["hits"] >= 1
+
+        # Nouvelles pondérations : nouvelle clé
+        set_weights({"presence": 0.0, "hours": 1.0})
+        assert compute_month_scores("2025-03")[0].score == 1.0
+
+        # Nouveau pointage committé : recalcul
+        db.session.add(Attendance(user_id=u.id, work_date=date(2025, 3, 4), total_hours=4.0))
+        db.session.commit()
+        assert compute_month_scores("2025-03")[0].total_hours == 12.0
+
+        misses = score_cache_info()["misses"]
+        invalidate_scores("2025-03")
+        compute_month_scores("2025-03")
+        assert score_cache_info()["misses"] == misses + 1
@@ -0,0 +1,42 @@
+from datetime import date, datetime, timedelta
+from app.extensions import db
+from app.models.user import User
+from app.models.attendance import Attendance
+from app.models.overtime import Overtime
+from app.models.leave import Leave
+from app.models.enums import RequestStatus, LeaveStatus, LeaveType
+from app.services.award_service import compute_month_scores
+
+def test_month_scores_in_one_statement(app, sql_log):
+    with app.app_context():
+        u1 = User(email="a@x", first_name="A", last_name="One"); u1.set_password("x")
+        u2 = User(email="b@x", first_name="B", last_name="Two"); u2.set_password("x")
+        off = User(email="c@x", first_name="C", last_name="Off", is_active=False); off.set_password("x")
+        db.session.add_all([u1, u2, off]); db.session.commit()
+
+        # mars 2025 : 21 jours ouvrés, le 1er est un samedi
+        for day in range(3, 8):
+            wd = date(2025, 3, day)
+            db.session.add(Attendance(user_id=u1.id, work_date=wd, total_hours=8.0,
+                                      check_in=datetime.combine(wd, datetime.min.time()) + timedelta(hours=8)))
+        db.session.add(Attendance(user_id=u2.id, work_date=date(2025, 3, 3), total_hours=4.0))  # sans check-in
+        db.session.add(Attendance(user_id=u1.id, work_date=date(2025, 4, 1), total_hours=8.0))  # hors mois
+        db.session.add(Overtime(user_id=u1.id, work_date=date(2025, 3, 4), hours=2.0, status=RequestStatus.APPROVED))
+        db.session.add(Overtime(user_id=u2.id, work_date=date(2025, 3, 4), hours=5.0, status=RequestStatus.PENDING))
+        # vendredi 28/02 -> mardi 11/03 : 7 jours ouvrés en mars ; + un congé refusé
+        db.session.add(Leave(user_id=u2.id, type=LeaveType.ANNUAL, status=LeaveStatus.APPROVED,
+                             start_date=date(2025, 2, 28), end_date=date(2025, 3, 11)))
+        db.session.add(Leave(user_id=u2.id, type=LeaveType.ANNUAL, status=LeaveStatus.REJECTED,
+                             start_date=date(2025, 3, 17), end_date=date(2025, 3, 18)))
+        db.session.commit()
+
+        with sql_log() as stmts:
+            rows = compute_month_scores("2025-03")
+
+        assert len([s for s in stmts if "attendances" in s or "leaves" in s]) == 1
+        by_id = {r.user_id: r for r in rows}
+        assert set(by_id) == {u1.id, u2.id}
+        a, b = by_id[u1.id], by_id[u2.id]
+        assert (a.present_days, a.total_hours, a.overtime_hours, a.leave_days) == (5, 40.0, 2.0, 0.0)
+        assert (b.present_days, b.total_hours, b.overtime_hours, b.leave_days) == (0, 4.0, 0.0, 7.0)
+        assert a.workdays == 21 and rows[0].user_id == u1.id
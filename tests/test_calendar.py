@@ -0,0 +1,32 @@
+from datetime import date, timedelta
+from app.services.calendar_service import WorkCalendar, easter
+
+def _naive(cal, a, b):
+    n, cur = 0, a
+    while cur <= b:
+        n += cal.is_workday(cur)
+        cur += timedelta(days=1)
+    return n
+
+def test_easter_and_french_holidays():
+    assert easter(2025) == date(2025, 4, 20) and easter(2024) == date(2024, 3, 31)
+    cal = WorkCalendar("FR")
+    assert not cal.is_workday(date(2025, 4, 21))   # lundi de Pâques
+    assert not cal.is_workday(date(2025, 5, 29))   # Ascension
+    assert not cal.is_workday(date(2025, 7, 14))
+    assert cal.is_workday(date(2025, 7, 15))
+    assert cal.count(date(2025, 3, 1), date(2025, 3, 31)) == 21
+    assert cal.count(date(2025, 5, 1), date(2025, 5, 31)) == 19  # 22 jours de semaine - 1er, 8 et 29 mai
+
+def test_counts_match_workday_list_across_years():
+    cal = WorkCalendar("FR", extra=["12-24", "2025-08-14"])
+    assert not cal.is_workday(date(2025, 8, 14)) and not cal.is_workday(date(2026, 12, 24))
+    a, b = date(2024, 11, 15), date(2026, 2, 3)
+    days = cal.workdays(a, b)
+    assert len(days) == cal.count(a, b) == _naive(cal, a, b)
+    assert all(d.weekday() < 5 for d in days)
+    assert cal.count(b, a) == 0
+
+def test_no_holidays_custom_weekend():
+    cal = WorkCalendar("none", weekend=(4, 5))
+    assert cal.is_workday(date(2025, 12, 25)) and not cal.is_workday(date(2025, 12, 26))
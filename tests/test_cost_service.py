@@ -0,0 +1,84 @@
+from datetime import date
+from app.extensions import db
+from app.models.department import Department
+from app.models.user import User
+from app.models.attendance import Attendance
+from app.services.cost_service import department_costs, department_cost_series
+from app.services.timeseries_service import month_bounds
+
+def test_month_bounds_half_open():
+    assert month_bounds("2025-12") == (date(2025, 12, 1), date(2026, 1, 1))
+
+def test_costs_by_month_and_series(app, sql_log):
+    with app.app_context():
+        it, hr = Department(name="IT", code="IT"), Department(name="RH", code="RH")
+        db.session.add_all([it, hr]); db.session.commit()
+        u = User(email="a@x", first_name="A", last_name="One", department_id=it.id, hourly_rate=10.0); u.set_password("x")
+        db.session.add(u); db.session.commit()
+        db.session.add_all([
+            Attendance(user_id=u.id, work_date=date(2025, 1, 31), total_hours=8.0),
+            Attendance(user_id=u.id, work_date=date(2025, 2, 1), total_hours=5.0),
+            Attendance(user_id=u.id, work_date=date(2025, 3, 3), total_hours=2.0),
+        ])
+        db.session.commit()
+
+        with sql_log() as stmts:
+            costs = department_costs("2025-02")
+        assert [(c["department"], c["cost"]) for c in costs] == [("IT", 50.0), ("RH", 0.0)]
+        assert not any("strftime" in s for s in stmts)
+
+        s = department_cost_series("2024-12", "2025-03")
+        assert s["months"] == ["2024-12", "2025-01", "2025-02", "2025-03"]
+        by = {d["department"]: d["costs"] for d in s["series"]}
+        assert by == {"IT": [0.0, 80.0, 50.0, 20.0], "RH": [0.0, 0.0, 0.0, 0.0]}
+
+def test_series_matches_department_costs(app):
+    from app.models.overtime import Overtime
+    from app.models.enums import RequestStatus
+    from app.services import payroll_cube
+    with app.app_context():
+        a, b = Department(name="Audit", code="AUD"), Department(name="Ops", code="OPS")
+        db.session.add_all([a, b]); db.session.commit()
+        u = User(email="a@x", first_name="A", last_name="One", department_id=b.id, hourly_rate=10.0); u.set_password("x")
+        db.session.add(u); db.session.commit()
+        db.session.add_all([
+            Attendance(user_id=u.id, work_date=date(2025, 1, 6), total_hours=8.0),
+            Overtime(user_id=u.id, work_date=date(2025, 1, 6), hours=2.0, status=RequestStatus.APPROVED),
+        ])
+        db.session.commit()
+        payroll_cube.materialize("2025-01")
+
+        s = department_cost_series("2025-01", "2025-02")
+        assert s["series"] == [{"department": "Audit", "costs": [0.0, 0.0]},
+                               {"department": "Ops", "costs": [105.0, 0.0]}]
+        # Même total que department_costs (heures sup comprises)
+        assert sorted(r["cost"] for r in department_costs("2025-01")) == [0.0, 105.0]
+
+def test_month_totals_bounds_use_year_month_index(app):
+    from sqlalchemy import event
+    from app.services import payroll_cube
+    with app.app_context():
+        it = Department(name="IT", code="IT")
+        db.session.add(it); db.session.commit()
+        u = User(email="a@x", first_name="A", last_name="One", department_id=it.id, hourly_rate=10.0); u.set_password("x")
+        db.session.add(u); db.session.commit()
+        for d in (date(2024, 11, 4), date(2024, 12, 2), date(2025, 1, 6), date(2025, 2, 3), date(2025, 3, 3)):
+            db.session.add(Attendance(user_id=u.id, work_date=d, total_hours=float(d.month)))
+        db.session.commit()
+        for ym in ("2024-11", "2024-12", "2025-01", "2025-02", "2025-03"):
+            payroll_cube.materialize(ym)
+
+        dep_id, seen = it.id, []
+        listener = lambda conn, cur, statement, params, *a: seen.append((statement, params))
+        event.listen(db.engine, "before_cursor_execute", listener)
+        try:
+            totals = payroll_cube.month_totals(["2024-12", "2025-01", "2025-02"], [dep_id])
+        finally:
+            event.remove(db.engine, "before_cursor_execute", listener)
+        assert totals == {("2024-12", dep_id): 120.0, ("2025-01", dep_id): 10.0, ("2025-02", dep_id): 20.0}
+        # Une seule requête, sur le cube, servie par l'index (year, month)
+        ((statement, params),) = seen
+        assert "payroll_costs" in statement and "* " not in statement
+        plan = " ".join(str(r[-1]) for r in db.session.connection().exec_driver_sql(
+            "EXPLAIN QUERY PLAN " + statement, params))
+        assert "ix_payroll_costs_year_month" in plan
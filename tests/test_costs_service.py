@@ -0,0 +1,77 @@
+from datetime import date
+from sqlalchemy import text
+from app.extensions import db
+from app.models.department import Department
+from app.models.user import User
+from app.models.attendance import Attendance
+from app.models.enums import Role
+from app.services import costs_service
+from app.services.costs_service import summarize_month
+
+def test_summary_from_cube_cached_until_commit(app, sql_log):
+    with app.app_context():
+        it = Department(name="IT", code="IT", budget_monthly=1000, overhead_rate=10)
+        rh = Department(name="RH", code="RH", budget_monthly=500)
+        old = Department(name="Old", code="OLD", is_active=False)
+        db.session.add_all([it, rh, old]); db.session.commit()
+        u = User(email="a@x", first_name="A", last_name="One", department_id=it.id, hourly_rate=10.0); u.set_password("x")
+        db.session.add(u); db.session.commit()
+        db.session.add(Attendance(user_id=u.id, work_date=date(2025, 3, 3), total_hours=8.0))
+        db.session.commit()
+
+        s = summarize_month(2025, 3)
+        assert s["source"] == "payroll_costs"
+        assert [(r["code"], r["actual"], r["actual_with_overhead"], r["variance"]) for r in s["rows"]] == [
+            ("IT", 80.0, 88.0, 912.0), ("RH", 0.0, 0.0, 500.0)]
+        assert (s["total_budget"], s["total_actual"]) == (1500.0, 88.0)
+
+        # Deuxième lecture : aucune requête (ni réflexion, ni PRAGMA)
+        with sql_log() as stmts:
+            assert summarize_month(2025, 3) == s
+        assert stmts == []
+
+        rh.overhead_rate = 0; it.budget_monthly = 2000
+        db.session.commit()
+        assert summarize_month(2025, 3)["rows"][0]["variance"] == 1912.0
+
+def test_summary_from_payslips_when_present(app, login):
+    client = app.test_client()
+    with app.app_context():
+        admin = User(email="adm@x", first_name="A", last_name="D", role=Role.ADMIN); admin.set_password("x")
+        db.session.add_all([admin, Department(name="IT", code="IT", budget_monthly=100)]); db.session.commit()
+        db.session.execute(text(
+            "CREATE TABLE payslips (id INTEGER PRIMARY KEY, department_id INTEGER, period DATE, net_amount NUMERIC)"))
+        db.session.execute(text(
+            "INSERT INTO payslips (department_id, period, net_amount) VALUES "
+            "(1, '2025-03-01', 40), (1, '2025-03-31', 20), (1, '2025-04-01', 999)"))
+        db.session.commit()
+        app.extensions.pop(costs_service.EXT_KEY, None)  # nouveau sondage (redémarrage)
+
+        s = summarize_month(2025, 3)
+        assert s["source"] == "payslips"
+        assert (s["rows"][0]["actual"], s["rows"][0]["variance"]) == (60.0, 40.0)
+        login(client, admin)
+
+    r = client.get("/costs/api/summary?period=2025-03")
+    assert r.status_code == 200 and r.headers.get("Last-Modified") is None
+    tag = r.headers["ETag"]
+    assert client.get("/costs/api/summary?period=2025-03", headers={"If-None-Match": tag}).status_code == 304
+
+    # Bulletin ajouté hors session ORM : ni cache ni ETag périmés
+    with app.app_context():
+        with db.engine.begin() as conn:
+            conn.execute(text("INSERT INTO payslips (department_id, period, net_amount) VALUES (1, '2025-03-15', 5)"))
+        assert summarize_month(2025, 3)["rows"][0]["actual"] == 65.0
+    r = client.get("/costs/api/summary?period=2025-03", headers={"If-None-Match": tag})
+    assert r.status_code == 200 and r.get_json()["rows"][0]["actual"] == 65.0
+
+def test_summary_route(app, login):
+    client = app.test_client()
+    with app.app_context():
+        admin = User(email="adm@x", first_name="A", last_name="D", role=Role.ADMIN); admin.set_password("x")
+        db.session.add_all([admin, Department(name="IT", code="IT", budget_monthly=100)]); db.session.commit()
+        login(client, admin)
+    r = client.get("/costs/api/summary?period=2025-03")
+    assert r.status_code == 200 and r.get_json()["rows"][0]["budget_monthly"] == 100.0
+    assert client.get("/costs/api/summary?period=2025-13").status_code == 400
+    assert client.get("/costs/").status_code == 200
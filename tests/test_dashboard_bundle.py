@@ -0,0 +1,97 @@
+import time
+from datetime import date
+from unittest import mock
+from werkzeug.http import http_date
+from app.extensions import db
+from app.models.user import User
+from app.models.overtime import Overtime
+from app.services.attendance_service import punch_in
+
+def test_bundle_has_every_widget_and_revalidates(app, client, login, sql_log):
+    with app.app_context():
+        u = User(email="d@x", first_name="D", last_name="B"); u.set_password("x")
+        db.session.add(u); db.session.commit()
+        punch_in(u.id, None, None)
+        db.session.add(Overtime(user_id=u.id, work_date=date.today(), hours=2)); db.session.commit()
+        login(client, u)
+
+        r = client.get("/api/dashboard/bundle")
+        assert r.status_code == 200
+        b = r.get_json()
+        assert b["stats"]["present_today"] == 1 and b["stats"]["present_vs_yesterday"] == 1
+        assert b["stats"]["overtime_pending"] == 1 and b["stats"]["leave_pending"] == 0
+        assert len(b["presence"]["values"]) == 14 and b["presence"]["values"][-1] == 1
+        assert "department_costs" in b and "overtime" in b
+
+        # rien n'a changé : 304 sans requête SQL
+        with sql_log() as stmts:
+            r2 = client.get("/api/dashboard/bundle", headers={"If-None-Match": r.headers["ETag"]})
+        assert r2.status_code == 304
+        assert not [s for s in stmts if "daily_attendance_stats" in s or "overtimes" in s]
+
+        db.session.add(Overtime(user_id=u.id, work_date=date.today(), hours=1)); db.session.commit()
+        r3 = client.get("/api/dashboard/bundle", headers={"If-None-Match": r.headers["ETag"]})
+        assert r3.status_code == 200 and r3.get_json()["stats"]["overtime_pending"] == 2
+
+        # Les coûts embarqués suivent le cube et l'historique des taux
+        from app.models.department import Department
+        from app.services import payroll_cube
+        from app.services.rate_history import set_rate
+        dep = Department(name="IT", code="IT"); db.session.add(dep); db.session.flush()
+        u.department_id = dep.id; db.session.commit()
+        tag = client.get("/api/dashboard/bundle").headers["ETag"]
+        payroll_cube.materialize(date.today().strftime("%Y-%m"))
+        r4 = client.get("/api/dashboard/bundle", headers={"If-None-Match": tag})
+        assert r4.status_code == 200
+        set_rate(u, 15.0, date.today()); db.session.commit()
+        assert client.get("/api/dashboard/bundle", headers={"If-None-Match": r4.headers["ETag"]}).status_code == 200
+
+def test_read_apis_send_validators(app, client, login):
+    with app.app_context():
+        u = User(email="c@x", first_name="C", last_name="H"); u.set_password("x")
+        db.session.add(u); db.session.commit()
+        login(client, u)
+
+        later = mock.patch("app.services.http_cache.time.time", return_value=time.time() + 2)
+        with later:
+            r = client.get("/api/charts/overtime?days=7")
+            assert r.status_code == 200 and r.headers.get("ETag") and r.last_modified
+            assert "no-cache" in r.headers["Cache-Control"]
+            since = {"If-Modified-Since": r.headers["Last-Modified"]}
+            assert client.get("/api/charts/overtime?days=7", headers=since).status_code == 304
+
+        # COMMIT dans la seconde en cours : pas de Last-Modified, If-Modified-Since ignoré
+        db.session.add(Overtime(user_id=u.id, work_date=date.today(), hours=1)); db.session.commit()
+        since = {"If-Modified-Since": http_date(int(time.time()))}
+        r = client.get("/api/charts/overtime?days=7", headers=since)
+        assert r.status_code == 200 and r.last_modified is None
+        # autre paramètre => autre ETag
+        r2 = client.get("/api/charts/overtime?days=30")
+        assert r2.headers["ETag"] != r.headers["ETag"]
+        assert client.get("/api/awards/current").headers.get("ETag")
+
+def test_stream_pushes_deltas_after_commit(app, client, login):
+    import json, threading
+    with app.app_context():
+        u = User(email="s@x", first_name="S", last_name="E"); u.set_password("x")
+        db.session.add(u); db.session.commit()
+        uid = u.id
+        login(client, u)
+        app.config["DASHBOARD_STREAM_MIN_INTERVAL_S"] = 0
+
+        r = client.get("/api/dashboard/stream", buffered=False)
+        chunks = iter(r.response)
+        next(chunks)  # retry
+        first = next(chunks).decode()
+        assert first.startswith("event: stats") and json.loads(first.split("data: ", 1)[1])["present_today"] == 0
+
+        def punch():
+            with app.app_context():
+                punch_in(uid, None, None)
+        t = threading.Timer(0.2, punch); t.start()
+        delta = next(chunks).decode()
+        t.join()
+        r.close()
+        assert delta.startswith("event: delta")
+        data = json.loads(delta.split("data: ", 1)[1])
+        assert data["present_today"] == 1 and "leave_pending" not in data
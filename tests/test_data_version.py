@@ -0,0 +1,112 @@
+from datetime import date
+from unittest import mock
+import pytest
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+from app.extensions import db
+from app.models.user import User
+from app.models.employee_of_month import EmployeeOfMonth
+from app.services import data_version
+
+def _eom_selects(stmts):
+    return [s for s in stmts if s.lstrip().upper().startswith("SELECT") and "employee_of_month" in s]
+
+def test_commit_bumps_versions_of_written_tables(app):
+    with app.app_context():
+        before = data_version.versions("users", "awards")
+        u = User(email="v@x", first_name="V", last_name="W"); u.set_password("x")
+        db.session.add(u); db.session.commit()
+        after = data_version.versions("users", "awards")
+        assert after[0] == before[0] + 1 and after[1] == before[1]
+
+        db.session.execute(db.update(User).values(first_name="X"))
+        db.session.rollback()
+        assert data_version.versions("users") == after[:1]
+
+def test_eom_context_is_cached_until_eom_changes(app, client, sql_log):
+    with app.app_context():
+        u = User(email="e@x", first_name="Eve", last_name="Month"); u.set_password("x")
+        db.session.add(u); db.session.commit()
+        db.session.add(EmployeeOfMonth(user_id=u.id, period=date(2025, 8, 1))); db.session.commit()
+
+        with sql_log() as stmts:
+            assert client.get("/auth/login").status_code == 200
+            n = len(_eom_selects(stmts))
+            assert n >= 1
+            for _ in range(3):
+                client.get("/auth/login")
+            assert len(_eom_selects(stmts)) == n  # état stable : aucune requête EOM
+
+            db.session.add(EmployeeOfMonth(user_id=u.id, period=date(2025, 9, 1))); db.session.commit()
+            client.get("/auth/login")
+            assert len(_eom_selects(stmts)) > n
+        with app.test_request_context():
+            ctx = app.template_context_processors[None][-1]()
+        assert ctx["employee_of_month"]["period"] == "2025-09-01"
+
+def test_database_backend_is_shared_between_workers(db_versions_app):
+    app = db_versions_app
+    with app.app_context():
+        other = data_version.DatabaseVersions(app)  # autre worker, mêmes compteurs
+        before = other.get_many(["users", "awards"])
+        u = User(email="w@x", first_name="W", last_name="K"); u.set_password("x")
+        db.session.add(u); db.session.commit()
+        assert other.get_many(["users", "awards"]) == (before[0] + 1, before[1])
+        assert data_version.versions("users") == other.get_many(["users"])
+        assert other.last_modified(["users"]) is not None
+
+        # Incrément dans la transaction des données : un seul COMMIT ...
+        commits = []
+        event.listen(db.engine, "commit", lambda conn: commits.append(1))
+        u.first_name = "Z"; db.session.commit()
+        assert len(commits) == 1 and other.get_many(["users"]) == (before[0] + 2,)
+
+        # ... et un échec d'incrément annule les données au lieu d'être ignoré
+        with mock.patch.object(data_version.DatabaseVersions, "_bump", side_effect=OperationalError("x", {}, Exception("locked"))):
+            u.first_name = "Y"
+            with pytest.raises(OperationalError):
+                db.session.commit()
+        db.session.rollback()
+        assert db.session.get(User, u.id).first_name == "Z"
+        assert other.get_many(["users"]) == (before[0] + 2,)
+
+def test_database_backend_conditional_get(db_versions_app, login):
+    import time
+    from app.models.overtime import Overtime
+    app = db_versions_app
+    client = app.test_client()
+    with app.app_context():
+        u = User(email="c@x", first_name="C", last_name="H"); u.set_password("x")
+        db.session.add(u); db.session.commit()
+        login(client, u)
+        db.session.add(Overtime(user_id=u.id, work_date=date.today(), hours=1)); db.session.commit()
+
+        with mock.patch("app.services.http_cache.time.time", return_value=time.time() + 2):
+            r = client.get("/api/charts/overtime?days=7")
+            assert r.status_code == 200 and r.last_modified  # date lue dans data_versions
+            assert client.get("/api/charts/overtime?days=7",
+                              headers={"If-None-Match": r.headers["ETag"]}).status_code == 304
+            assert client.get("/api/charts/overtime?days=7",
+                              headers={"If-Modified-Since": r.headers["Last-Modified"]}).status_code == 304
+
+        # Écriture par un autre worker (autre connexion) : nouvel ETag ici aussi
+        data_version.DatabaseVersions(app).bump(["overtimes"])
+        r2 = client.get("/api/charts/overtime?days=7", headers={"If-None-Match": r.headers["ETag"]})
+        assert r2.status_code == 200 and r2.headers["ETag"] != r.headers["ETag"]
+
+def test_database_backend_cached_until_commit(db_versions_app):
+    app = db_versions_app
+    with app.app_context():
+        calls = []
+        build = lambda: calls.append(1) or len(calls)
+        assert data_version.cached("k", ("users",), build) == 1
+        assert data_version.cached("k", ("users",), build) == 1
+
+        u = User(email="m@x", first_name="M", last_name="N"); u.set_password("x")
+        db.session.add(u); db.session.commit()
+        assert data_version.cached("k", ("users",), build) == 2
+        db.session.execute(db.update(User).values(first_name="O")); db.session.rollback()
+        assert data_version.cached("k", ("users",), build) == 2  # rien de committé
+
+        data_version.DatabaseVersions(app).bump(["users"])  # autre worker
+        assert data_version.cached("k", ("users",), build) == 3
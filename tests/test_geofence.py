@@ -0,0 +1,98 @@
+import random
+import time
+from datetime import date
+from app.extensions import db
+from app.models.user import User
+from app.models.enums import Role
+from app.models.attendance import Attendance
+from app.models.geo_site import GeoSite
+from app.services import geofence
+from app.services.geofence import SiteIndex, _to_site, haversine_m
+
+def _sites():
+    office = GeoSite(name="Siège", kind="circle", center_lat=48.8566, center_lon=2.3522, radius_m=150)
+    depot = GeoSite(name="Dépôt", kind="polygon")
+    depot.points = [(45.0, 4.0), (45.0, 4.01), (45.01, 4.01), (45.01, 4.0)]
+    return [office, depot]
+
+def test_index_locates_circles_and_polygons(app):
+    with app.app_context():
+        db.session.add_all(_sites()); db.session.commit()
+        office, depot = GeoSite.query.order_by(GeoSite.id).all()
+        # beaucoup de sites lointains : ne doivent pas ralentir la recherche
+        far = [_to_site(GeoSite(id=1000 + i, kind="circle", center_lat=10, center_lon=10 + i * 0.05, radius_m=100))
+               for i in range(2000)]
+        index = SiteIndex([_to_site(office), _to_site(depot), *far])
+
+        assert index.locate(48.8570, 2.3525) == office.id
+        assert index.locate(45.005, 4.005) == depot.id
+        assert index.locate(45.02, 4.005) is None
+        assert len(index.candidates(48.8570, 2.3525)) == 1
+        assert index.locate_many([(48.8570, 2.3525), (0.0, 0.0)]) == [office.id, None]
+        assert abs(haversine_m(48.8566, 2.3522, 48.8566 + 150 / 111320, 2.3522) - 150) < 1
+
+        t0 = time.perf_counter()
+        for _ in range(1000):
+            index.locate(48.8570, 2.3525)
+        assert (time.perf_counter() - t0) / 1000 < 1e-3
+
+def test_overlapping_sites_resolve_to_lowest_id(app):
+    with app.app_context():
+        circle = _to_site(GeoSite(id=7, kind="circle", center_lat=45.0, center_lon=4.0, radius_m=500))
+        square = _to_site(GeoSite(id=3, kind="polygon", points=[[44.99, 3.99], [44.99, 4.01], [45.01, 4.01], [45.01, 3.99]]))
+        huge = _to_site(GeoSite(id=9, kind="circle", center_lat=45.0, center_lon=4.0, radius_m=200_000))
+        index = SiteIndex([circle, huge, square], cell_deg=0.001)
+        assert index.large == [huge]
+        assert index.locate(45.0, 4.0) == 3
+        assert index.locate_many([(45.0, 4.0), (45.5, 4.0)]) == [index.locate(45.0, 4.0), index.locate(45.5, 4.0)] == [3, 9]
+
+def test_locate_many_matches_locate(app):
+    with app.app_context():
+        rng = random.Random(7)
+        sites = [_to_site(GeoSite(id=i, kind="circle", center_lat=45.0 + rng.uniform(-0.02, 0.02),
+                                  center_lon=4.0 + rng.uniform(-0.02, 0.02), radius_m=rng.uniform(50, 1500)))
+                 for i in range(1, 30)]
+        sites.append(_to_site(GeoSite(id=30, kind="polygon", points=[[44.99, 3.99], [44.99, 4.0], [45.0, 4.0]])))
+        sites.append(_to_site(GeoSite(id=31, kind="circle", center_lat=45.0, center_lon=4.0, radius_m=200_000)))
+        index = SiteIndex(sites, cell_deg=0.005)
+        points = [(45.0 + rng.uniform(-0.04, 0.04), 4.0 + rng.uniform(-0.04, 0.04)) for _ in range(2000)]
+        points += [(46.5, 4.0), (0.0, 0.0)]
+        expected = [index.locate(lat, lon) for lat, lon in points]
+        assert index.locate_many(points) == expected
+        assert {31, None} <= set(expected) and len(set(expected)) > 5
+
+def test_enforce_mode_rejects_outside_punch_and_revalidates(app, client, login):
+    with app.app_context():
+        u = User(email="g@x", first_name="G", last_name="F"); u.set_password("x")
+        db.session.add(u); db.session.add_all(_sites()); db.session.commit()
+        login(client, u)
+
+        app.config["GEOFENCE_MODE"] = "enforce"
+        r = client.post("/attendance/punch", json={"action": "checkin", "lat": 0.0, "lon": 0.0})
+        assert r.status_code == 403
+        r = client.post("/attendance/punch", json={"action": "checkin"})  # sans position
+        assert r.status_code == 403
+        r = client.post("/attendance/punch", json={"action": "checkin", "lat": 48.8567, "lon": 2.3523})
+        assert r.status_code == 200
+        att = Attendance.query.one()
+        assert att.geo_status == "inside" and att.site_id is not None
+
+        # le site disparaît : la revalidation reclasse l'historique
+        db.session.delete(db.session.get(GeoSite, att.site_id)); db.session.commit()
+        geofence.invalidate()
+        assert geofence.revalidate(start=date.today()) == 1
+        db.session.refresh(att)
+        assert (att.site_id, att.geo_status) == (None, "outside")
+
+def test_admin_creates_site(app, client, login):
+    with app.app_context():
+        admin = User(email="adm@x", first_name="A", last_name="D", role=Role.ADMIN); admin.set_password("x")
+        db.session.add(admin); db.session.commit()
+        login(client, admin)
+
+        r = client.post("/admin/geofence/", data={"name": "Agence", "kind": "circle",
+                                                  "center_lat": "43.6", "center_lon": "1.44", "radius_m": "200"})
+        assert r.status_code == 302
+        assert client.get("/admin/geofence/").status_code == 200
+        r = client.get("/admin/geofence/check?lat=43.6&lon=1.44")
+        assert r.get_json()["status"] == "inside"
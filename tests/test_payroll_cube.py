@@ -0,0 +1,106 @@
+from datetime import date
+from app.extensions import db
+from app.models.department import Department
+from app.models.user import User
+from app.models.attendance import Attendance
+from app.models.overtime import Overtime
+from app.models.leave import Leave
+from app.models.payroll_cost import PayrollCost
+from app.models.enums import RequestStatus, LeaveStatus, LeaveType
+from app.services import payroll_cube
+from app.services.cost_service import department_costs
+
+def test_cube_materializes_freezes_and_refreshes(app):
+    app.config["OVERTIME_MULTIPLIER"] = 1.5
+    with app.app_context():
+        it = Department(name="IT", code="IT")
+        db.session.add(it); db.session.commit()
+        u = User(email="a@x", first_name="A", last_name="One", department_id=it.id, hourly_rate=10.0); u.set_password("x")
+        db.session.add(u); db.session.commit()
+        db.session.add_all([
+            Attendance(user_id=u.id, work_date=date(2025, 3, 3), total_hours=8.0),
+            Overtime(user_id=u.id, work_date=date(2025, 3, 3), hours=2.0, status=RequestStatus.APPROVED),
+            Overtime(user_id=u.id, work_date=date(2025, 3, 4), hours=9.0, status=RequestStatus.PENDING),
+            # lundi 31/03 -> mercredi 02/04 : 1 jour ouvré en mars
+            Leave(user_id=u.id, type=LeaveType.ANNUAL, status=LeaveStatus.APPROVED,
+                  start_date=date(2025, 3, 31), end_date=date(2025, 4, 2)),
+        ])
+        db.session.commit()
+
+        # Lecture sans écriture : calcul direct, rien dans le cube
+        (row,) = department_costs("2025-03")
+        assert (row["base_salary"], row["overtime_cost"], row["leave_cost"]) == (80.0, 30.0, 80.0)
+        assert row["cost"] == 190.0 and not row["frozen"]
+        assert PayrollCost.query.count() == 0
+
+        # Gel explicite ; une correction après gel ne change plus le cube
+        payroll_cube.freeze("2025-03")
+        db.session.add(Attendance(user_id=u.id, work_date=date(2025, 3, 4), total_hours=8.0))
+        db.session.commit()
+        row = department_costs("2025-03")[0]
+        assert row["base_salary"] == 80.0 and row["frozen"]
+
+        # Réouverture : lu en direct, puis rematérialisé par refresh-stale
+        payroll_cube.unfreeze("2025-03")
+        assert department_costs("2025-03")[0]["base_salary"] == 160.0
+        assert payroll_cube.refresh_stale() == ["2025-03"]
+        assert department_costs("2025-03")[0]["base_salary"] == 160.0
+        assert PayrollCost.query.count() == 1
+
+def test_open_month_refreshes_incrementally(app):
+    with app.app_context():
+        it = Department(name="IT", code="IT")
+        db.session.add(it); db.session.commit()
+        u = User(email="a@x", first_name="A", last_name="One", department_id=it.id, hourly_rate=10.0); u.set_password("x")
+        db.session.add(u); db.session.commit()
+        today = date.today()
+        ym = today.strftime("%Y-%m")
+        assert department_costs(ym)[0]["cost"] == 0.0
+        db.session.add(Attendance(user_id=u.id, work_date=today, total_hours=3.0)); db.session.commit()
+        row = department_costs(ym)[0]
+        assert row["cost"] == 30.0 and not row["frozen"]
+
+def test_source_write_marks_open_rows_stale(app, sql_log):
+    with app.app_context():
+        it = Department(name="IT", code="IT")
+        db.session.add(it); db.session.commit()
+        u = User(email="a@x", first_name="A", last_name="One", department_id=it.id, hourly_rate=10.0); u.set_password("x")
+        db.session.add(u); db.session.commit()
+        db.session.add(Attendance(user_id=u.id, work_date=date(2025, 3, 3), total_hours=8.0)); db.session.commit()
+        payroll_cube.materialize("2025-03")
+
+        # À jour : une seule requête, sur le cube
+        with sql_log() as stmts:
+            assert department_costs("2025-03")[0]["cost"] == 80.0
+        assert len(stmts) == 1 and "attendances" not in stmts[0]
+
+        db.session.add(Attendance(user_id=u.id, work_date=date(2025, 3, 4), total_hours=2.0)); db.session.commit()
+        assert payroll_cube.stale_months() == ["2025-03"]
+        with sql_log() as stmts:
+            assert department_costs("2025-03")[0]["cost"] == 100.0
+        assert not any(s.lstrip().upper().startswith(("INSERT", "UPDATE")) for s in stmts)
+        assert PayrollCost.query.one().base_salary == 80  # lecture sans écriture
+
+def test_punch_in_month_leaves_previous_month_fresh(app):
+    from datetime import datetime
+    from app.services.attendance_service import upsert_punch
+    with app.app_context():
+        it = Department(name="IT", code="IT")
+        db.session.add(it); db.session.commit()
+        u = User(email="a@x", first_name="A", last_name="One", department_id=it.id, hourly_rate=10.0); u.set_password("x")
+        db.session.add(u); db.session.commit()
+        db.session.add_all([Attendance(user_id=u.id, work_date=date(2025, 2, 3), total_hours=8.0),
+                            Attendance(user_id=u.id, work_date=date(2025, 3, 3), total_hours=8.0)])
+        db.session.commit()
+        payroll_cube.materialize("2025-02"); payroll_cube.materialize("2025-03")
+
+        # Pointage (instruction Core) puis saisie ORM en mars : février reste à jour
+        upsert_punch(u.id, "checkin", datetime(2025, 3, 4, 8, 0), date(2025, 3, 4), None, None, "manual", True)
+        assert payroll_cube.stale_months() == ["2025-03"]
+        payroll_cube.refresh_stale()
+        db.session.add(Attendance(user_id=u.id, work_date=date(2025, 3, 5), total_hours=1.0)); db.session.commit()
+        assert payroll_cube.stale_months() == ["2025-03"]
+
+        # Changement de taux : tous les mois ouverts
+        u.hourly_rate = 12.0; db.session.commit()
+        assert payroll_cube.stale_months() == ["2025-02", "2025-03"]
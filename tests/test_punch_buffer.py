@@ -0,0 +1,62 @@
+import threading
+from app.extensions import db
+from app.models.user import User
+from app.models.attendance import Attendance
+from app.services.punch_buffer import PunchBuffer
+
+def test_buffer_groups_punches_and_acks_after_commit(app):
+    with app.app_context():
+        users = []
+        for i in range(20):
+            u = User(email=f"u{i}@x", first_name="U", last_name=str(i)); u.set_password("x")
+            users.append(u)
+        db.session.add_all(users); db.session.commit()
+        ids = [u.id for u in users]
+        db.session.remove()
+
+        buf = PunchBuffer(app, window_ms=200, max_batch=50)
+        results, errors = {}, []
+
+        def worker(uid):
+            try:
+                results[uid] = buf.submit(uid, "checkin", None, None)
+            except Exception as e:  # pragma: no cover
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker, args=(uid,)) for uid in ids]
+        for t in threads: t.start()
+        for t in threads: t.join(10)
+
+        assert not errors
+        assert len(results) == 20
+        stats = buf.stats()
+        assert stats["punches"] == 20
+        assert stats["batches"] < 20
+        assert stats["latency_ms"]["p50"] is not None
+        assert Attendance.query.count() == 20
+
+def test_writer_survives_unexpected_error(app):
+    with app.app_context():
+        u = User(email="a@x", first_name="A", last_name="One"); u.set_password("x")
+        db.session.add(u); db.session.commit()
+        uid = u.id
+        db.session.remove()
+
+        buf = PunchBuffer(app, window_ms=0, timeout_s=2.0)
+        flush = buf._flush
+
+        def broken(batch):
+            raise RuntimeError("boom")
+
+        buf._flush = broken
+        try:
+            buf.submit(uid, "checkin", None, None)
+        except RuntimeError as e:
+            assert str(e) == "boom"  # pas un PunchTimeout
+        else:  # pragma: no cover
+            raise AssertionError("erreur attendue")
+
+        buf._flush = flush
+        buf.submit(uid, "checkin", None, None)
+        assert buf._thread.is_alive()
+        assert Attendance.query.count() == 1
@@ -0,0 +1,88 @@
+import calendar
+from datetime import datetime, timedelta
+from unittest import mock
+from app.extensions import db
+from app.models.user import User
+from app.models.attendance import Attendance
+from app.services.security import sign_token
+
+def test_bulk_sync_validates_dedupes_and_merges(app, client, login):
+    with app.app_context():
+        u = User(email="a@x", first_name="A", last_name="One"); u.set_password("x")
+        db.session.add(u); db.session.commit()
+        login(client, u)
+
+        yesterday = (datetime.utcnow() - timedelta(days=1)).date()
+        t_in = datetime.combine(yesterday, datetime.min.time()) + timedelta(hours=8)
+        t_out = t_in + timedelta(hours=8)
+
+        # QR signés au moment des pointages (hors-ligne)
+        with mock.patch("app.services.security.time.time", return_value=calendar.timegm(t_in.timetuple())):
+            tok_in = sign_token("action:checkin")
+        with mock.patch("app.services.security.time.time", return_value=calendar.timegm(t_out.timetuple())):
+            tok_out = sign_token("action:checkout")
+
+        punches = [
+            {"id": "a", "action": "checkin", "at": t_in.isoformat() + "Z", "token": tok_in, "lat": 1, "lon": 2},
+            {"id": "a", "action": "checkin", "at": t_in.isoformat() + "Z", "token": tok_in},        # doublon
+            {"id": "b", "action": "checkout", "at": t_out.isoformat() + "Z", "token": tok_out},
+            {"id": "c", "action": "checkout", "at": t_out.isoformat() + "Z", "token": tok_in},      # QR expiré à cette heure
+            {"id": "d", "action": "dance", "at": t_out.isoformat() + "Z", "token": tok_out},
+        ]
+        r = client.post("/attendance/punch/bulk", json={"punches": punches})
+        assert r.status_code == 200
+        statuses = [x["status"] for x in r.get_json()["results"]]
+        assert statuses == ["applied", "duplicate", "applied", "rejected", "rejected"]
+
+        att = Attendance.query.one()
+        assert att.check_in == t_in and att.check_out == t_out
+        assert att.total_hours == 8.0
+
+def test_bulk_sync_binds_qr_action_and_local_work_date(app, client, monkeypatch, login):
+    import time
+    monkeypatch.setenv("TZ", "Etc/GMT-2")  # UTC+2
+    time.tzset()
+    try:
+        with app.app_context():
+            u = User(email="a@x", first_name="A", last_name="One"); u.set_password("x")
+            db.session.add(u); db.session.commit()
+            login(client, u)
+
+            day = (datetime.utcnow() - timedelta(days=2)).date()
+            t_in = datetime.combine(day, datetime.min.time()) + timedelta(hours=23)  # 01:00 locale le lendemain
+            with mock.patch("app.services.security.time.time", return_value=calendar.timegm(t_in.timetuple())):
+                tok_in = sign_token("action:checkin")
+            punches = [
+                {"id": "x", "action": "checkout", "at": t_in.isoformat() + "Z", "token": tok_in},
+                {"id": "y", "action": "checkin", "at": t_in.isoformat() + "Z", "token": tok_in},
+            ]
+            res = client.post("/attendance/punch/bulk", json={"punches": punches}).get_json()["results"]
+            assert [r["status"] for r in res] == ["rejected", "applied"]
+            assert Attendance.query.one().work_date == day + timedelta(days=1)
+    finally:
+        monkeypatch.delenv("TZ")
+        time.tzset()
+
+def test_bulk_sync_rejects_replayed_tokens(app, client, login):
+    with app.app_context():
+        u = User(email="a@x", first_name="A", last_name="One"); u.set_password("x")
+        db.session.add(u); db.session.commit()
+        login(client, u)
+
+        t_in = datetime.utcnow().replace(microsecond=0) - timedelta(hours=3)
+        with mock.patch("app.services.security.time.time", return_value=calendar.timegm(t_in.timetuple())):
+            tok = sign_token("action:checkin")
+        item = {"action": "checkin", "at": t_in.isoformat() + "Z", "token": tok}
+        first = client.post("/attendance/punch/bulk", json={"punches": [{**item, "id": "a"}]}).get_json()
+        assert first["results"][0]["status"] == "applied"
+
+        # Même QR dans un second lot (autre id, autre heure dans sa validité)
+        later = (t_in + timedelta(seconds=30)).isoformat() + "Z"
+        again = client.post("/attendance/punch/bulk", json={"punches": [{**item, "id": "b", "at": later}]}).get_json()
+        assert (again["applied"], again["results"][0]["status"]) == (0, "replayed")
+        assert again["results"][0]["error"] == "QR déjà utilisé"
+
+        # ... ni sur la route en ligne (même portée user:action)
+        with mock.patch("app.services.security.time.time", return_value=calendar.timegm(t_in.timetuple()) + 10):
+            r = client.post("/attendance/punch", json={"action": "checkin", "token": tok})
+        assert r.status_code == 409
@@ -0,0 +1,50 @@
+import json
+from unittest import mock
+from app.extensions import db
+from app.models.user import User
+from app.services.qr_render import render
+from app.services.security import sign_token, verify_token
+
+def test_qr_is_rendered_once_per_bucket(app, client, login):
+    with app.app_context():
+        u = User(email="k@x", first_name="K", last_name="Q"); u.set_password("x")
+        db.session.add(u); db.session.commit()
+        login(client, u)
+
+        render.cache_clear()
+        # même tranche (ts signé = début de tranche), 50 s puis 10 s avant la suivante
+        with mock.patch("app.routes.qr.current_bucket", return_value=(1_700_000_000, 50)):
+            r1 = client.get("/qr/attendance?action=checkin")
+        with mock.patch("app.routes.qr.current_bucket", return_value=(1_700_000_000, 10)):
+            r2 = client.get("/qr/attendance?action=checkin")
+            r3 = client.get("/qr/attendance?action=checkin", headers={"If-None-Match": r1.headers["ETag"]})
+            svg = client.get("/qr/attendance?action=checkin&format=svg")
+
+        assert r1.status_code == 200 and r1.mimetype == "image/png"
+        assert r1.headers["ETag"] == r2.headers["ETag"] and r1.data == r2.data
+        assert r2.cache_control.max_age == 10
+        assert r3.status_code == 304 and not r3.data
+        assert svg.mimetype == "image/svg+xml" and b"<path" in svg.data
+        assert render.cache_info().hits == 1
+
+def test_kiosk_stream_shares_one_token_per_bucket(app, client, login):
+    with app.app_context():
+        u = User(email="kiosk@x", first_name="K", last_name="S"); u.set_password("x")
+        db.session.add(u); db.session.commit()
+        login(client, u)
+
+        bucket = mock.patch("app.services.qr_render.current_bucket", return_value=(1_700_000_000, 30))
+        with bucket, mock.patch("app.services.qr_render.sign_token", wraps=sign_token) as signer:
+            bodies = []
+            for _ in range(3):  # trois kiosques
+                r = client.get("/qr/attendance/stream?action=checkout", buffered=False)
+                assert r.mimetype == "text/event-stream"
+                chunks = iter(r.response)
+                next(chunks)  # retry
+                bodies.append(next(chunks))
+                r.close()
+        assert signer.call_count == 1
+        assert len(set(bodies)) == 1
+        data = json.loads(bodies[0].decode().split("data: ", 1)[1])
+        assert data["action"] == "checkout" and data["token"] in data["url"]
+        assert verify_token(data["token"], now=1_700_000_030)
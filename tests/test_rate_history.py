@@ -0,0 +1,42 @@
+from datetime import date
+from app.extensions import db
+from app.models.department import Department
+from app.models.user import User
+from app.models.attendance import Attendance
+from app.models.user_hourly_rate import UserHourlyRate
+from app.services.cost_service import department_cost_series, department_costs
+from app.services.rate_history import EPOCH, set_rate
+
+def _intervals(uid):
+    return [(r.valid_from, r.valid_to, r.rate) for r in
+            UserHourlyRate.query.filter_by(user_id=uid).order_by(UserHourlyRate.valid_from)]
+
+def test_rate_changes_are_effective_dated(app):
+    with app.app_context():
+        it = Department(name="IT", code="IT")
+        db.session.add(it); db.session.commit()
+        u = User(email="a@x", first_name="A", last_name="One", department_id=it.id, hourly_rate=10.0); u.set_password("x")
+        db.session.add(u); db.session.commit()
+        assert _intervals(u.id) == [(EPOCH, None, 10.0)]
+
+        db.session.add_all([
+            Attendance(user_id=u.id, work_date=date(2025, 1, 6), total_hours=8.0),
+            Attendance(user_id=u.id, work_date=date(2025, 2, 3), total_hours=8.0),
+        ])
+        db.session.commit()
+
+        # Augmentation rétroactive au 1er février
+        set_rate(u, 12.0, date(2025, 2, 1)); db.session.commit()
+        assert u.hourly_rate == 12.0
+        assert _intervals(u.id) == [(EPOCH, date(2025, 2, 1), 10.0), (date(2025, 2, 1), None, 12.0)]
+
+        # Modification simple de la fiche : nouvel intervalle à aujourd'hui
+        u.hourly_rate = 20.0; db.session.commit()
+        today = date.today()
+        assert _intervals(u.id)[-2:] == [(date(2025, 2, 1), today, 12.0), (today, None, 20.0)]
+
+        s = department_cost_series("2025-01", "2025-02")
+        assert s["series"][0]["costs"] == [80.0, 96.0]
+        assert department_costs("2025-01")[0]["base_salary"] == 80.0
+        db.session.add(Attendance(user_id=u.id, work_date=today, total_hours=1.0)); db.session.commit()
+        assert department_costs(today.strftime("%Y-%m"))[0]["base_salary"] == 20.0
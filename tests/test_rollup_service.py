@@ -0,0 +1,34 @@
+from datetime import date
+from app.extensions import db
+from app.models.user import User
+from app.models.department import Department
+from app.models.daily_attendance_stat import DailyAttendanceStat
+from app.services.attendance_service import punch_in, punch_out
+from app.services.rollup_service import day_totals, rebuild
+
+def _rows():
+    return sorted(
+        (r.work_date, r.department_id, r.present_count, round(r.total_hours, 2), round(r.late_minutes, 2))
+        for r in DailyAttendanceStat.query.all()
+    )
+
+def test_punches_maintain_rollup_and_rebuild_matches(app):
+    with app.app_context():
+        d = Department(name="IT", code="IT")
+        u1 = User(email="a@x", first_name="A", last_name="One", department=d); u1.set_password("x")
+        u2 = User(email="b@x", first_name="B", last_name="Two"); u2.set_password("x")
+        db.session.add_all([d, u1, u2]); db.session.commit()
+
+        punch_in(u1.id, None, None)
+        punch_in(u1.id, None, None)      # double pointage : toujours 1 présent
+        punch_out(u1.id, None, None)
+        punch_out(u2.id, None, None)     # check-out sans check-in : crée la présence
+
+        present, _hours = day_totals(date.today())
+        assert present == 2
+        deps = {r.department_id for r in DailyAttendanceStat.query.all()}
+        assert deps == {d.id, 0}
+
+        incremental = _rows()
+        rebuild()
+        assert _rows() == incremental
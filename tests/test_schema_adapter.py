@@ -0,0 +1,26 @@
+from app.extensions import db
+from app.models.user import User
+from app.models.attendance import Attendance
+from app.services.schema_adapter import resolve
+
+def test_resolve_native_schema():
+    schema = resolve()
+    assert schema.native and schema.mode == "per_day"
+    assert (schema.lat, schema.lng) == ("latitude", "longitude")
+    assert schema.export_headers == ("total_hours", "source", "latitude", "longitude")
+
+def test_mark_uses_compiled_writer(app, client, login):
+    with app.app_context():
+        u = User(email="m@x", first_name="M", last_name="X"); u.set_password("x")
+        db.session.add(u); db.session.commit()
+        login(client, u)
+
+        r = client.post("/attendance/api/mark", json={"action": "checkin", "lat": 1.5, "lng": 2.5})
+        assert r.status_code == 200 and r.get_json()["mode"] == "per_day"
+        assert client.post("/attendance/api/mark", json={"action": "nope"}).status_code == 400
+
+        att = Attendance.query.one()
+        assert att.check_in is not None and att.latitude == 1.5
+
+        csv = client.get("/exports/attendance.csv").get_data(as_text=True)
+        assert csv.splitlines()[0].endswith("total_hours,source,latitude,longitude")
@@ -0,0 +1,71 @@
+import pytest
+from datetime import date, datetime, timedelta
+from app.extensions import db
+from app.models.user import User
+from app.models.attendance import Attendance
+from app.models.monthly_score import ScoreMonth
+from app.services.award_service import close_month, compute_month_scores, refresh_stale_months
+
+def _att(user, day, hours=8.0):
+    return Attendance(user_id=user.id, work_date=day, total_hours=hours,
+                      check_in=datetime.combine(day, datetime.min.time()) + timedelta(hours=8))
+
+def test_closed_month_is_read_from_snapshot_until_corrected(app, sql_log):
+    with app.app_context():
+        u = User(email="a@x", first_name="A", last_name="One"); u.set_password("x")
+        db.session.add(u); db.session.commit()
+        db.session.add_all([_att(u, date(2025, 3, 3)), _att(u, date(2025, 3, 4))])
+        db.session.commit()
+
+        live = compute_month_scores("2025-03")
+        assert close_month("2025-03") == 1
+
+        with sql_log() as stmts:
+            snap = compute_month_scores("2025-03")
+        assert not [s for s in stmts if "attendances" in s]
+        assert [(r.user_id, r.total_hours, r.score) for r in snap] == [(r.user_id, r.total_hours, r.score) for r in live]
+
+        # Une écriture d'un autre mois ne touche pas la clôture
+        db.session.add(_att(u, date(2025, 4, 1))); db.session.commit()
+        assert db.session.get(ScoreMonth, "2025-03").status == "closed"
+
+        # Correction rétroactive : le mois passe en « stale », calcul en direct
+        db.session.add(_att(u, date(2025, 3, 5))); db.session.commit()
+        assert db.session.get(ScoreMonth, "2025-03").status == "stale"
+        assert compute_month_scores("2025-03")[0].present_days == 3
+
+        assert refresh_stale_months() == ["2025-03"]
+        assert db.session.get(ScoreMonth, "2025-03").status == "closed"
+        assert compute_month_scores("2025-03")[0].total_hours == 24.0
+
+def test_cannot_close_current_month(app):
+    with app.app_context():
+        with pytest.raises(ValueError):
+            close_month(date.today().strftime("%Y-%m"))
+
+def test_retroactive_upsert_punch_marks_closed_month_stale(app):
+    from app.services.attendance_service import upsert_punch
+    with app.app_context():
+        u = User(email="a@x", first_name="A", last_name="One"); u.set_password("x")
+        db.session.add(u); db.session.commit()
+        db.session.add(_att(u, date(2025, 3, 3))); db.session.commit()
+        close_month("2025-03")
+
+        upsert_punch(u.id, "checkin", datetime(2025, 3, 10, 8, 0), date(2025, 3, 10), None, None)
+        assert db.session.get(ScoreMonth, "2025-03").status == "stale"
+
+def test_mark_stale_after_foreign_write_invalidates_memo(app):
+    from sqlalchemy import text
+    from app.services.score_snapshots import mark_stale
+    with app.app_context():
+        u = User(email="a@x", first_name="A", last_name="One"); u.set_password("x")
+        db.session.add(u); db.session.commit()
+        db.session.add(_att(u, date(2025, 3, 3))); db.session.commit()
+        close_month("2025-03")
+        assert compute_month_scores("2025-03")[0].total_hours == 8.0  # mémo rempli
+
+        # Écriture sur une autre connexion, puis péremption explicite
+        with db.engine.begin() as conn:
+            conn.execute(text("UPDATE attendances SET total_hours = 10"))
+        mark_stale("2025-03"); db.session.commit()
+        assert compute_month_scores("2025-03")[0].total_hours == 10.0
@@ -0,0 +1,68 @@
+from unittest import mock
+from app.extensions import db
+from app.models.user import User
+import pytest
+from app.services.nonce_store import MemoryStore, NonceStoreFull
+from app.services.security import sign_token, verify_token, consume_token
+
+def test_verification_is_cached_and_replay_rejected(app):
+    with app.test_request_context():
+        tok = sign_token("action:checkin", ttl_seconds=60)
+        assert verify_token(tok)
+        with mock.patch("app.services.security._check_signature") as check:
+            assert verify_token(tok)
+            check.assert_not_called()
+        assert not verify_token(tok.replace("checkin", "checkout"))
+
+        assert consume_token(tok, scope="1:checkin")
+        assert not consume_token(tok, scope="1:checkin")
+        assert consume_token(tok, scope="2:checkin")
+
+def test_memory_store_is_bounded():
+    store = MemoryStore(max_entries=3)
+    for i in range(10):
+        store.set(f"k{i}", "v", 60)
+    assert len(store) == 3
+    assert store.get("k0") is None and store.get("k9") == "v"
+    assert store.add("n", "1", 60) and not store.add("n", "1", 60)
+
+def test_punch_rejects_replayed_qr(app, client, login):
+    with app.app_context():
+        u = User(email="q@x", first_name="Q", last_name="R"); u.set_password("x")
+        db.session.add(u); db.session.commit()
+        login(client, u)
+        tok = sign_token("action:checkin")
+
+        body = {"action": "checkin", "token": tok}
+        assert client.post("/attendance/punch", json=body).status_code == 200
+        assert client.post("/attendance/punch", json=body).status_code == 409
+
+def test_small_clock_skew_tolerated(app):
+    with app.test_request_context():
+        with mock.patch("app.services.security.time.time", return_value=1_700_000_010):
+            tok = sign_token("action:checkin", ttl_seconds=60)
+        assert verify_token(tok, now=1_700_000_000)       # signé 10 s « dans le futur »
+        assert not verify_token(tok, now=1_700_000_010 - 120)
+
+def test_consumed_nonces_are_not_evicted():
+    store = MemoryStore(max_entries=2)
+    with mock.patch("app.services.nonce_store.time.time", return_value=1000.0):
+        assert store.add("n1", "1", 60) and store.add("n2", "1", 60)
+        for i in range(10):  # rafale de vérifications : n'écrase pas les nonces
+            store.set(f"v{i}", "v", 60)
+        with pytest.raises(NonceStoreFull):  # pleine : refus, n1 reste consommé
+            store.add("n3", "1", 60)
+        assert not store.add("n1", "1", 60)  # rejeu : toujours False
+    with mock.patch("app.services.nonce_store.time.time", return_value=1061.0):
+        assert store.add("n3", "1", 60) and store.add("n1", "1", 60)
+
+def test_full_nonce_table_is_503_not_replay(app, client, login):
+    from app.services.nonce_store import EXT_KEY
+    with app.app_context():
+        u = User(email="q@x", first_name="Q", last_name="R"); u.set_password("x")
+        db.session.add(u); db.session.commit()
+        login(client, u)
+        app.extensions[EXT_KEY] = store = MemoryStore(max_entries=1)
+        store.add("autre", "1", 600)
+        r = client.post("/attendance/punch", json={"action": "checkin", "token": sign_token("action:checkin")})
+        assert r.status_code == 503 and "indisponible" in r.get_json()["error"]
@@ -0,0 +1,40 @@
+from datetime import date, datetime, timedelta
+from sqlalchemy import func
+from app.extensions import db
+from app.models.user import User
+from app.models.department import Department
+from app.models.attendance import Attendance
+from app.services.timeseries_service import series, chart_payload
+
+def test_series_fills_gaps_and_buckets_in_one_query(app, sql_log):
+    with app.app_context():
+        d = Department(name="IT", code="IT")
+        u1 = User(email="a@x", first_name="A", last_name="One", department=d); u1.set_password("x")
+        u2 = User(email="b@x", first_name="B", last_name="Two", department=d); u2.set_password("x")
+        db.session.add_all([d, u1, u2]); db.session.commit()
+
+        # lundi 2025-03-03 .. dimanche 2025-03-16
+        start = date(2025, 3, 3)
+        end = start + timedelta(days=13)
+        for day, users in ((0, [u1, u2]), (1, [u1]), (8, [u2])):
+            wd = start + timedelta(days=day)
+            for u in users:
+                db.session.add(Attendance(user_id=u.id, work_date=wd,
+                                          check_in=datetime.combine(wd, datetime.min.time())))
+        db.session.commit()
+
+        with sql_log() as stmts:
+            daily = series(Attendance.work_date, func.count(Attendance.id), start, end, "day",
+                           filters=[Attendance.check_in.isnot(None)], cast_fn=int)
+            weekly = series(Attendance.work_date, func.count(Attendance.id), start, end, "week",
+                            filters=[Attendance.check_in.isnot(None)], cast_fn=int)
+            monthly = series(Attendance.work_date, func.count(Attendance.id), start, end, "month",
+                             filters=[Attendance.check_in.isnot(None)], cast_fn=int)
+
+        assert len(stmts) == 3
+        assert len(daily) == 14
+        assert [v for _, v in daily][:3] == [2, 1, 0]
+        assert sum(v for _, v in daily) == 4
+        assert weekly == [(date(2025, 3, 3), 3), (date(2025, 3, 10), 1)]
+        assert monthly == [(date(2025, 3, 1), 4)]
+        assert chart_payload(weekly, "week")["labels"] == ["03/03", "10/03"]